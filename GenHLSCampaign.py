@@ -0,0 +1,347 @@
+"""
+Campaign script that runs the design space explorations of several targets
+(application, device, clock period, operator configuration) in one process. The script:
+1. Parses user arguments and builds the target list
+2. Prepares a work directory and a database per target
+3. Runs the NSGA-II searches of all targets concurrently on one shared pool of
+   Vitis HLS slots (fair-share/priority scheduling, one memory and timeout policy),
+   each on its own random generator states
+4. Reports the progress per target
+5. Analyzes and exports the database of every target
+"""
+
+import os
+import glob
+import json
+import time
+import shutil
+import argparse
+import itertools
+import threading
+import traceback
+import numpy as np
+
+from pymoo.algorithms.moo.nsga2 import NSGA2
+from pymoo.factory import get_sampling, get_crossover, get_mutation, get_selection
+from pymoo.util.termination.default import MultiObjectiveDefaultTermination
+
+from modules.supervisor import ProcessSupervisor
+from modules.scheduler import AdmissionScheduler
+from modules.campaign import FairShareScheduler
+from modules.checkpoint import Checkpointer, IsolatedRandom
+from modules.synthesisCache import SynthesisCache
+from modules.telemetry import Telemetry
+from modules.options import str2bool, add_problem_arguments, build_problem, DATABASES_DIR, CHECKPOINTS_DIR
+
+# -------------------------------
+# Parse command line arguments
+# -------------------------------
+parser = argparse.ArgumentParser(description='A script for running the genetic algorithm based optimization of several HLS kernels, devices, clock periods and operator configurations on one shared pool of Vitis HLS jobs.')
+
+parser.add_argument('--CAMPAIGN_PATH', type=str, default=None, help='JSON file with the list of targets (application, device_id, clk_period and optionally operator_config, priority, src_extension, name). Overrides the target flags.')
+parser.add_argument('--APPLICATIONS', type=str, nargs='*', default=[], help='The applications (directories of ./Applications) of the campaign.')
+parser.add_argument('--DEVICE_IDS', type=str, nargs='+', default=["xczu7ev-ffvc1156-2-e", "xcu200-fsgd2104-2-e"], help='The target FPGA device ids.')
+parser.add_argument('--CLK_PERIODS', type=str, nargs='+', default=["10", "5", "3.33"], help='The target FPGA clock periods.')
+parser.add_argument('--OPERATOR_CONFIG_PATHS', type=str, nargs='+', default=["./OperatorConfigurations/config_01.json"], help='The genetic algorithm operator configurations.')
+parser.add_argument('--SRC_EXTENSION', type=str, default=".cpp", help='The source code file extension.')
+parser.add_argument('--GENERATIONS', type=int, default=24, help='The number of GA generations of every target.')
+parser.add_argument('--THREADS', type=int, default=os.cpu_count(), help='The number of concurrent evaluations shared by all targets. (default: number of CPUs)')
+add_problem_arguments(parser)
+parser.add_argument('--RESUME', type=str2bool, default=False, help='Continue every target from its last checkpoint.')
+parser.add_argument('--PROGRESS_INTERVAL', type=int, default=60, help='Seconds between two progress reports.')
+
+args = parser.parse_args()
+
+# -------------------------------
+# Extract arguments
+# -------------------------------
+CAMPAIGN_PATH          = args.CAMPAIGN_PATH
+APPLICATIONS           = args.APPLICATIONS
+DEVICE_IDS             = args.DEVICE_IDS
+CLK_PERIODS            = args.CLK_PERIODS
+OPERATOR_CONFIG_PATHS  = args.OPERATOR_CONFIG_PATHS
+SRC_EXTENSION          = args.SRC_EXTENSION
+GENERATIONS            = args.GENERATIONS
+THREAD_NUM             = args.THREADS
+TIMEOUT                = args.TIMEOUT
+MEMORY_LIMIT           = args.MEMORY_LIMIT
+LICENSES               = args.LICENSES
+TRACE                  = args.TRACE
+METRICS                = args.METRICS
+METRICS_INTERVAL       = args.METRICS_INTERVAL
+SYNTH_CACHE            = args.SYNTH_CACHE
+CACHE_PATH             = args.CACHE_PATH
+CACHE_MAX_ENTRIES      = args.CACHE_MAX_ENTRIES
+CACHE_MAX_SIZE         = args.CACHE_MAX_SIZE
+CACHE_REPORTS          = args.CACHE_REPORTS
+TOOL_VERSION           = args.TOOL_VERSION
+MULTI_FIDELITY         = args.MULTI_FIDELITY
+RESUME                 = args.RESUME
+CHECKPOINT_INTERVAL    = args.CHECKPOINT_INTERVAL
+PROGRESS_INTERVAL      = args.PROGRESS_INTERVAL
+
+APPLICATIONS_DIR = './Applications'
+CAMPAIGN_DIR = './Campaign'
+
+# -------------------------------
+# Build the target list
+# -------------------------------
+if CAMPAIGN_PATH is not None:
+    with open(CAMPAIGN_PATH) as f:
+        targets = json.load(f)
+else:
+    targets = [
+        {"application": app, "device_id": device_id, "clk_period": clk_period, "operator_config": config}
+        for app, device_id, clk_period, config in itertools.product(APPLICATIONS, DEVICE_IDS, CLK_PERIODS, OPERATOR_CONFIG_PATHS)
+    ]
+
+if len(targets) == 0:
+    parser.error('No targets: give APPLICATIONS or CAMPAIGN_PATH.')
+
+for target in targets:
+    target.setdefault("operator_config", "./OperatorConfigurations/config_01.json")
+    target.setdefault("priority", 1.0)
+    target.setdefault("src_extension", SRC_EXTENSION)
+
+# The operator configuration is part of the database name only when the campaign sweeps several
+multiple_configs = len(set(target["operator_config"] for target in targets)) > 1
+for target in targets:
+    if "name" not in target:
+        target["name"] = target["application"] + "_" + target["device_id"] + "_" + str(target["clk_period"])
+        if multiple_configs:
+            target["name"] += "_" + os.path.splitext(os.path.basename(target["operator_config"]))[0]
+
+names = [target["name"] for target in targets]
+if len(set(names)) != len(names):
+    parser.error('Duplicate target names in the campaign.')
+
+print("Campaign of " + str(len(targets)) + " targets on " + str(THREAD_NUM) + " shared threads")
+
+# -------------------------------
+# Shared evaluation pool and memory/timeout policy
+# -------------------------------
+os.makedirs(DATABASES_DIR, exist_ok=True)
+os.makedirs(CHECKPOINTS_DIR, exist_ok=True)
+os.makedirs(CAMPAIGN_DIR, exist_ok=True)
+
+scheduler = None
+if MEMORY_LIMIT > 0 or LICENSES > 0:
+    scheduler = AdmissionScheduler(
+        memory_limit=MEMORY_LIMIT,
+        licenses=LICENSES,
+        estimates_path=os.path.join(DATABASES_DIR, "memory_estimates.json")
+    )
+supervisor = ProcessSupervisor(scheduler=scheduler)
+fair_share = FairShareScheduler(THREAD_NUM)
+
+# One cache for all targets: overlapping configurations of different targets are synthesized once
+cache = None
+if SYNTH_CACHE:
+    cache = SynthesisCache(CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_size=CACHE_MAX_SIZE, store_reports=CACHE_REPORTS, version=TOOL_VERSION)
+
+# One trace and metrics file for all targets (the spans of a slot share its thread)
+TRACES_DIR = './Traces'
+if TRACE or METRICS:
+    os.makedirs(TRACES_DIR, exist_ok=True)
+telemetry = Telemetry(
+    trace_path=os.path.join(TRACES_DIR, "campaign.trace.json") if TRACE else None,
+    metrics_path=os.path.join(TRACES_DIR, "campaign.metrics.json") if METRICS else None,
+    interval=METRICS_INTERVAL,
+    threads=THREAD_NUM
+)
+
+# -------------------------------
+# Prepare the targets
+# -------------------------------
+population_size = 40
+offsprings = 40
+
+def prepare(target):
+    """
+    Create the work directory, database, problem and algorithm of a target.
+    """
+    name = target["name"]
+    src_extension = target["src_extension"]
+
+    # Copy the application sources and info into the work directory of the target
+    work_dir = os.path.join(CAMPAIGN_DIR, name)
+    os.makedirs(work_dir, exist_ok=True)
+    app_dir = os.path.join(APPLICATIONS_DIR, target["application"])
+    for pattern in ("*.cpp", "*.c", "*.h", "*.hpp", "*.txt"):
+        for path in glob.glob(os.path.join(app_dir, pattern)):
+            shutil.copy(path, work_dir)
+
+    input_source_info_path = os.path.join(work_dir, "kernel_info.txt")
+    with open(input_source_info_path) as f:
+        top_level_function = f.readline().strip()
+
+    # The source code file that contains the top-level function
+    input_source_path = None
+    for path in sorted(glob.glob(os.path.join(work_dir, "*" + src_extension))):
+        with open(path) as f:
+            if top_level_function in f.read():
+                input_source_path = path
+                break
+    if input_source_path is None:
+        raise ValueError("%s: no %s source contains the top level function %s" % (name, src_extension, top_level_function))
+
+    runner = fair_share.register(name, float(target["priority"]))
+
+    problem = build_problem(
+        args,
+        name,
+        input_source_path,
+        input_source_info_path,
+        src_extension,
+        target["device_id"],
+        str(target["clk_period"]),
+        work_dir=work_dir,
+        supervisor=supervisor,
+        runner=runner,
+        cache=cache,
+        telemetry=telemetry
+    )
+
+    with open(target["operator_config"]) as f:
+        operator_config = json.load(f)
+
+    algorithm = NSGA2(
+        pop_size=population_size,
+        n_offsprings=offsprings,
+        sampling=get_sampling(operator_config["sampling"]),
+        selection=get_selection(operator_config["selection"]),
+        crossover=get_crossover(operator_config["crossover"]),
+        mutation=get_mutation(operator_config["mutation"]),
+        eliminate_duplicates=True
+    )
+
+    termination = MultiObjectiveDefaultTermination(
+        x_tol=1e-8,
+        cv_tol=1e-6,
+        f_tol=0.0025,
+        nth_gen=1,
+        n_last=10,
+        n_max_gen=GENERATIONS,
+        n_max_evals=5000
+    )
+
+    target["work_dir"] = work_dir
+    target["db"] = problem.DB
+    target["problem"] = problem
+    target["runner"] = runner
+    target["algorithm"] = algorithm
+    target["termination"] = termination
+    target["canonicalizer"] = problem.CANONICALIZER
+    target["checkpointer"] = Checkpointer(os.path.join(CHECKPOINTS_DIR, name + ".pkl"), CHECKPOINT_INTERVAL)
+    target["rng"] = IsolatedRandom()
+    target["state"] = "queued"
+    target["result"] = None
+
+# -------------------------------
+# Run the targets
+# -------------------------------
+def run(target):
+    """
+    Optimize one target; its evaluations run on the shared slots. The algorithm steps
+    run on the private random generator states of the target, one target at a time,
+    so that every target is reproducible whatever the interleaving of the others.
+    """
+    target["state"] = "running"
+    start_time = time.time()
+    try:
+        res = target["checkpointer"].minimize(target["problem"], target["algorithm"], target["termination"], resume=RESUME, rng=target["rng"], seed=42, verbose=False)
+
+        if MULTI_FIDELITY and res.X is not None:
+            promoted = target["problem"].promote(np.atleast_2d(res.X), target["runner"])
+            print("[" + target["name"] + "] Promoted configurations to IP export = " + str(promoted))
+
+        target["result"] = res
+        target["state"] = "finished"
+    except Exception:
+        traceback.print_exc()
+        target["state"] = "failed"
+    target["time"] = int(time.time() - start_time)
+    print("[" + target["name"] + "] " + target["state"] + " after " + str(target["time"]) + " s")
+
+def report():
+    """
+    Print one progress line per target.
+    """
+    progress = fair_share.progress()
+    print("Campaign progress (" + time.strftime("%H:%M:%S") + "):")
+    for target in targets:
+        p = progress[target["name"]]
+        print("  [%s] %s | generation %d | evaluations: %d done, %d running, %d queued, %d failed | %d DB entries | priority %g" % (
+            target["name"], target["state"], p["batches"], p["done"], p["running"], p["queued"], p["failed"], len(target["db"].index), p["weight"]))
+
+# From here on, the job directories, tool processes and work directories of the
+# campaign are released on every exit path (including errors and interrupts)
+try:
+    for target in targets:
+        prepare(target)
+
+    try:
+        threads = []
+        for target in targets:
+            thread = threading.Thread(target=run, args=(target,), name="campaign-" + target["name"], daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        start_time = int(time.time())
+        next_report = time.time() + PROGRESS_INTERVAL
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=max(0, next_report - time.time()))
+                if time.time() >= next_report:
+                    report()
+                    next_report += PROGRESS_INTERVAL
+        report()
+        print("Actual Campaign Execution Time = " + str(int(time.time()) - start_time))
+
+        fair_share.close()
+    finally:
+        # Tool processes still running after an error (the slots are daemon threads)
+        supervisor.kill_all()
+
+        telemetry.close()
+
+        if scheduler is not None:
+            scheduler.close()
+
+    supervisor.summary()
+
+    telemetry.summary()
+
+    if scheduler is not None:
+        scheduler.summary()
+
+    if cache is not None:
+        cache.summary()
+
+    # -------------------------------
+    # Analyze and export DB content
+    # -------------------------------
+    for target in targets:
+        print("")
+        print("Target " + target["name"] + " (" + target["state"] + ")")
+        if target["canonicalizer"] is not None:
+            target["canonicalizer"].summary()
+        target["db"].analyze(TIMEOUT)
+        target["db"].export()
+finally:
+    if cache is not None:
+        cache.close()
+
+    # -------------------------------
+    # Clean up intermediate files
+    # -------------------------------
+    for target in targets:
+        # Targets after a failed preparation have no problem
+        if "problem" in target:
+            target["db"].close()
+            target["problem"].WORKSPACE.close()
+        shutil.rmtree(os.path.join(CAMPAIGN_DIR, target["name"]), ignore_errors=True)
+
+for target in targets:
+    if "problem" in target:
+        target["problem"].WORKSPACE.summary()
@@ -15,30 +15,25 @@ import time
 import argparse
 import numpy as np
 
-from pymoo.core.problem import starmap_parallelized_eval
 from pymoo.algorithms.moo.nsga2 import NSGA2
 from pymoo.factory import get_sampling, get_crossover, get_mutation, get_selection
-from pymoo.optimize import minimize
 from pymoo.util.termination.default import MultiObjectiveDefaultTermination
 
 from multiprocessing.pool import ThreadPool
 
 from modules.db import DB
-from modules.preprocessor import Preprocessor
-from modules.hlsDirectiveOptimizationProblem import HLSDirectiveOptimizationProblem
-
-def str2bool(v):
-    """
-    Convert string arguments to boolean for argparse.
-    """
-    if isinstance(v, bool):
-        return v
-    if v.lower() in ('yes', 'true', 't', 'y', '1'):
-        return True
-    elif v.lower() in ('no', 'false', 'f', 'n', '0'):
-        return False
-    else:
-        raise argparse.ArgumentTypeError('Boolean value expected.')
+from modules.supervisor import ProcessSupervisor
+from modules.scheduler import AdmissionScheduler
+from modules.sessionPool import SessionPool
+from modules.distributed import RemoteBackend
+from modules.checkpoint import Checkpointer
+from modules.synthesisCache import SynthesisCache
+from modules.telemetry import Telemetry
+from modules.asyncEngine import AsyncEngine
+from modules.steadyStateNSGA2 import SteadyStateNSGA2
+from modules.warmStart import WarmStartSampling, load_seeds
+from modules.surrogate import Surrogate, SurrogateScreen
+from modules.options import str2bool, add_problem_arguments, build_problem, DATABASES_DIR, CHECKPOINTS_DIR
 
 # -------------------------------
 # Parse command line arguments
@@ -52,12 +47,30 @@ parser.add_argument('--DB_NAME', type=str, required=True, help='The name of the
 parser.add_argument('--GENERATIONS', type=int, default=24, help='The number of GA generations.')
 parser.add_argument('--OPERATOR_CONFIG_PATH', type=str, default="./OperatorConfigurations/config_01.json", help='The path to the JSON file that contains the genetic algorithm operator configuration.')
 parser.add_argument('--THREADS', type=int, default=20, help='The number of used threads.')
-parser.add_argument('--TIMEOUT', type=int, default=3600, help='Vitis HLS timeout in seconds.')
 parser.add_argument('--DEVICE_ID', type=str, default="xczu7ev-ffvc1156-2-e", help='The target FPGA device id. (default: MPSoC ZCU104)')
 parser.add_argument('--CLK_PERIOD', type=str, default="3.33", help='The target FPGA clock period. (default: 3.33)')
+add_problem_arguments(parser)
+parser.add_argument('--PRUNE_DBS', type=str, nargs='*', default=[], help='Additional result databases of the kernel (any device or clock) used as pruning evidence besides DB_NAME.')
+parser.add_argument('--ASYNC_ENGINE', type=str2bool, default=False, help='Launch the syntheses from one asyncio event loop (concurrent job preparation, THREADS job slots) instead of one blocked thread per job. (experimental)')
+parser.add_argument('--SESSIONS', type=int, default=0, help='Number of persistent Vitis HLS sessions. (default: 0, launch vitis_hls per evaluation)')
+parser.add_argument('--SESSION_MAX_JOBS', type=int, default=50, help='Number of synthesis jobs after which a persistent Vitis HLS session is recycled.')
+parser.add_argument('--SURROGATE', type=str2bool, default=False, help='Pre-screen offspring with a random forest surrogate and synthesize only the most promising or uncertain ones.')
+parser.add_argument('--SURROGATE_SYNTH_FRACTION', type=float, default=0.5, help='Fraction of the uncached offspring of a generation that is synthesized when the surrogate is enabled.')
+parser.add_argument('--SURROGATE_DBS', type=str, nargs='*', default=[], help='Additional result databases (same kernel, device and clock) used to train the surrogate.')
+parser.add_argument('--WARM_START_DBS', type=str, nargs='*', default=[], help='Result databases of other devices, clocks or kernel variants whose best configurations seed the initial population.')
+parser.add_argument('--WARM_START_FRACTION', type=float, default=None, help='Fraction of the initial population taken from the warm start databases. (default: warm_start_fraction of the operator configuration, else 0.5)')
+parser.add_argument('--BROKER_DIR', type=str, default=None, help='Broker directory shared with GenHLSWorker.py daemons. If set, the syntheses run on the workers and THREADS is the number of queued jobs.')
+parser.add_argument('--HEARTBEAT_TIMEOUT', type=int, default=60, help='Seconds without worker heartbeat after which its jobs are re-queued.')
+parser.add_argument('--RESUME', type=str2bool, default=False, help='Continue the search from the last checkpoint of DB_NAME.')
+parser.add_argument('--STEADY_STATE', type=str2bool, default=False, help='Use the asynchronous steady-state NSGA-II driver instead of generational evaluation.')
+parser.add_argument('--MAX_EVALS', type=int, default=None, help='Evaluation budget of the steady-state driver. (default: population size + GENERATIONS x offsprings)')
+parser.add_argument('--MAX_TIME', type=int, default=None, help='Optional wall clock budget in seconds of the steady-state driver.')
 
 args = parser.parse_args()
 
+if args.ASYNC_ENGINE and (args.SESSIONS > 0 or args.BROKER_DIR is not None):
+    parser.error('--ASYNC_ENGINE launches local vitis_hls processes, it cannot be combined with --SESSIONS or --BROKER_DIR')
+
 # -------------------------------
 # Extract arguments
 # -------------------------------
@@ -71,103 +84,274 @@ THREAD_NUM             = args.THREADS
 TIMEOUT                = args.TIMEOUT
 DEVICE_ID              = args.DEVICE_ID
 CLOCK_PERIOD           = args.CLK_PERIOD
+MEMORY_LIMIT           = args.MEMORY_LIMIT
+LICENSES               = args.LICENSES
+TRACE                  = args.TRACE
+METRICS                = args.METRICS
+METRICS_INTERVAL       = args.METRICS_INTERVAL
+ASYNC_ENGINE           = args.ASYNC_ENGINE
+SYNTH_CACHE            = args.SYNTH_CACHE
+CACHE_PATH             = args.CACHE_PATH
+CACHE_MAX_ENTRIES      = args.CACHE_MAX_ENTRIES
+CACHE_MAX_SIZE         = args.CACHE_MAX_SIZE
+CACHE_REPORTS          = args.CACHE_REPORTS
+TOOL_VERSION           = args.TOOL_VERSION
+TCL_DIRECTIVES         = args.TCL_DIRECTIVES
+PRUNE_DBS              = args.PRUNE_DBS
+SESSIONS               = args.SESSIONS
+SESSION_MAX_JOBS       = args.SESSION_MAX_JOBS
+MULTI_FIDELITY         = args.MULTI_FIDELITY
+SURROGATE              = args.SURROGATE
+SURROGATE_SYNTH_FRACTION = args.SURROGATE_SYNTH_FRACTION
+SURROGATE_DBS          = args.SURROGATE_DBS
+WARM_START_DBS         = args.WARM_START_DBS
+WARM_START_FRACTION    = args.WARM_START_FRACTION
+BROKER_DIR             = args.BROKER_DIR
+HEARTBEAT_TIMEOUT      = args.HEARTBEAT_TIMEOUT
+RESUME                 = args.RESUME
+CHECKPOINT_INTERVAL    = args.CHECKPOINT_INTERVAL
+STEADY_STATE           = args.STEADY_STATE
+MAX_EVALS              = args.MAX_EVALS
+MAX_TIME               = args.MAX_TIME
 
 # -------------------------------
-# Perform preprocessing
-# -------------------------------
-preprocessor = Preprocessor(INPUT_SOURCE_INFO_PATH)
-(n_var, xl, xu, top_level_function, directives) = preprocessor.preprocess()
-
-# -------------------------------
-# Create/Open application database
+# Create the database and checkpoint directories
 # -------------------------------
-DATABASES_DIR = './Databases'
-command = 'mkdir -p ' + DATABASES_DIR
-os.system(command)
-
-DB_PATH = os.path.join(DATABASES_DIR, DB_NAME + ".sqlite")
-db = DB(DB_PATH)
+os.makedirs(DATABASES_DIR, exist_ok=True)
+os.makedirs(CHECKPOINTS_DIR, exist_ok=True)
 
 # -------------------------------
 # Define the optimization problem
 # -------------------------------
 n_threads = THREAD_NUM
 pool = ThreadPool(n_threads)
-problem = HLSDirectiveOptimizationProblem(
+scheduler = None
+if MEMORY_LIMIT > 0 or LICENSES > 0:
+    scheduler = AdmissionScheduler(
+        memory_limit=MEMORY_LIMIT,
+        licenses=LICENSES,
+        estimates_path=os.path.join(DATABASES_DIR, "memory_estimates.json")
+    )
+supervisor = ProcessSupervisor(scheduler=scheduler)
+
+cache = None
+if SYNTH_CACHE:
+    cache = SynthesisCache(CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_size=CACHE_MAX_SIZE, store_reports=CACHE_REPORTS, version=TOOL_VERSION)
+
+TRACES_DIR = './Traces'
+if TRACE or METRICS:
+    os.makedirs(TRACES_DIR, exist_ok=True)
+telemetry = Telemetry(
+    trace_path=os.path.join(TRACES_DIR, DB_NAME + ".trace.json") if TRACE else None,
+    metrics_path=os.path.join(TRACES_DIR, DB_NAME + ".metrics.json") if METRICS else None,
+    interval=METRICS_INTERVAL,
+    threads=n_threads
+)
+
+# Preprocessing, pruned search space, database, canonicalization and job directories
+problem = build_problem(
+    args,
+    DB_NAME,
     INPUT_SOURCE_PATH,
+    INPUT_SOURCE_INFO_PATH,
     SRC_EXTENSION,
-    n_var,
-    xl,
-    xu,
-    top_level_function,
-    directives,
-    db,
-    DEVICE_ID, 
-    CLOCK_PERIOD, 
-    TIMEOUT,
-    runner=pool.starmap, func_eval=starmap_parallelized_eval
+    DEVICE_ID,
+    CLOCK_PERIOD,
+    prune_dbs=PRUNE_DBS,
+    supervisor=supervisor,
+    runner=lambda function, iterable: pool.map(function, iterable, chunksize=1),
+    cache=cache,
+    telemetry=telemetry
 )
+db = problem.DB
+directives = problem.DIRECTIVES
+pruner = problem.PRUNER
+canonicalizer = problem.CANONICALIZER
+workspace = problem.WORKSPACE
 
-# -------------------------------
-# Load operator configuration
-# -------------------------------
-operator_config = {}
-with open(OPERATOR_CONFIG_PATH) as f:
-    operator_config = json.load(f)
+# The session logs are removed with the job directories
+session_pool = SessionPool(SESSIONS, SESSION_MAX_JOBS, supervisor, log_dir=workspace.root) if SESSIONS > 0 else None
+problem.SESSION_POOL = session_pool
 
-# -------------------------------
-# Set up NSGA-II algorithm
-# -------------------------------
-population_size = 40
-offsprings = 40
-algorithm = NSGA2(
-    pop_size=population_size,
-    n_offsprings=offsprings,
-    sampling=get_sampling(operator_config["sampling"]),
-    selection=get_selection(operator_config["selection"]),
-    crossover=get_crossover(operator_config["crossover"]),
-    mutation=get_mutation(operator_config["mutation"]),
-    eliminate_duplicates=True
-)
+# From here on, the job directories, tool processes, sessions and service threads of the
+# run are released on every exit path (including errors and interrupts)
+remote = None
+screen = None
+engine = None
+try:
+    try:
+        if BROKER_DIR is not None:
+            remote = RemoteBackend(
+                BROKER_DIR,
+                INPUT_SOURCE_PATH,
+                SRC_EXTENSION,
+                problem.TOP_LEVEL_FUNCTION,
+                directives,
+                DEVICE_ID,
+                CLOCK_PERIOD,
+                TIMEOUT,
+                heartbeat_timeout=HEARTBEAT_TIMEOUT,
+                tcl_directives=TCL_DIRECTIVES
+            )
+            problem.REMOTE = remote
 
-# -------------------------------
-# Define termination criteria
-# -------------------------------
-termination = MultiObjectiveDefaultTermination(
-    x_tol=1e-8,
-    cv_tol=1e-6,
-    f_tol=0.0025,
-    nth_gen=1,
-    n_last=10,
-    n_max_gen=GENERATIONS,
-    n_max_evals=5000
-)
+        if SURROGATE:
+            screen = SurrogateScreen(
+                Surrogate(directives),
+                db,
+                synth_fraction=SURROGATE_SYNTH_FRACTION,
+                training_dbs=[DB(path, radices=db.codec.radices, read_only=True) for path in SURROGATE_DBS]
+            )
+            problem.SCREEN = screen
 
-# -------------------------------
-# Run the optimization
-# -------------------------------
-start_time = int(time.time())
-res = minimize(problem, algorithm, termination, seed=42, verbose=True)
-actual_dse_time = int(time.time()) - start_time
-print("Actual DSE Execution Time = " + str(actual_dse_time))
+        if ASYNC_ENGINE:
+            engine = AsyncEngine(problem, n_threads)
+            problem.ENGINE = engine
 
-pool.close()
+        # -------------------------------
+        # Load operator configuration
+        # -------------------------------
+        operator_config = {}
+        with open(OPERATOR_CONFIG_PATH) as f:
+            operator_config = json.load(f)
 
-# -------------------------------
-# Analyze and export DB content
-# -------------------------------
-db.analyze(TIMEOUT)
-db.export()
-db.close()
+        # -------------------------------
+        # Seed the initial sampling from existing databases
+        # -------------------------------
+        sampling = get_sampling(operator_config["sampling"])
+        if len(WARM_START_DBS) > 0:
+            warm_start_fraction = WARM_START_FRACTION if WARM_START_FRACTION is not None else operator_config.get("warm_start_fraction", 0.5)
+            seeds = load_seeds(WARM_START_DBS, directives, DEVICE_ID)
+            if pruner is not None:
+                (seeds, _) = pruner.reduce(seeds)
+            print("Warm start: %d seed configurations, fraction of the initial population = %.2f" % (len(seeds), warm_start_fraction))
+            sampling = WarmStartSampling(seeds, sampling, fraction=warm_start_fraction)
 
-# -------------------------------
-# Clean up intermediate files
-# -------------------------------
-command = 'rm -r GENETIC_DSE_*'
-os.system(command)
-command = 'rm kernel_*' + SRC_EXTENSION
-os.system(command)
-command = 'rm script_*.tcl'
-os.system(command)
-command = 'rm vitis_hls_*.log'
-os.system(command)
+        # -------------------------------
+        # Set up NSGA-II algorithm
+        # -------------------------------
+        population_size = 40
+        offsprings = 40
+        algorithm = NSGA2(
+            pop_size=population_size,
+            n_offsprings=offsprings,
+            sampling=sampling,
+            selection=get_selection(operator_config["selection"]),
+            crossover=get_crossover(operator_config["crossover"]),
+            mutation=get_mutation(operator_config["mutation"]),
+            eliminate_duplicates=True
+        )
+
+        # -------------------------------
+        # Define termination criteria
+        # -------------------------------
+        termination = MultiObjectiveDefaultTermination(
+            x_tol=1e-8,
+            cv_tol=1e-6,
+            f_tol=0.0025,
+            nth_gen=1,
+            n_last=10,
+            n_max_gen=GENERATIONS,
+            n_max_evals=5000
+        )
+
+        # -------------------------------
+        # Set up checkpointing of the search state
+        # -------------------------------
+        CHECKPOINT_PATH = os.path.join(CHECKPOINTS_DIR, DB_NAME + ".pkl")
+        checkpointer = Checkpointer(CHECKPOINT_PATH, CHECKPOINT_INTERVAL * (offsprings if STEADY_STATE else 1))
+
+        # -------------------------------
+        # Run the optimization
+        # -------------------------------
+        start_time = int(time.time())
+        if STEADY_STATE:
+            max_evals = MAX_EVALS if MAX_EVALS is not None else population_size + GENERATIONS * offsprings
+            steady_state = SteadyStateNSGA2(
+                problem,
+                pool,
+                n_threads,
+                population_size,
+                algorithm.initialization.sampling,
+                algorithm.mating.selection,
+                algorithm.mating.crossover,
+                algorithm.mating.mutation,
+                max_evals,
+                max_time=MAX_TIME,
+                seed=42,
+                checkpointer=checkpointer,
+                resume=RESUME
+            )
+            res = steady_state.run()
+        else:
+            res = checkpointer.minimize(problem, algorithm, termination, resume=RESUME, seed=42, verbose=True)
+        actual_dse_time = int(time.time()) - start_time
+        print("Actual DSE Execution Time = " + str(actual_dse_time))
+
+        # -------------------------------
+        # Synthesize Pareto-optimal configurations that only have predicted metrics
+        # -------------------------------
+        if SURROGATE and res.X is not None:
+            verified = screen.verify(problem, np.atleast_2d(res.X), problem.RUNNER)
+            print("Verified surrogate predictions = " + str(verified))
+
+        # -------------------------------
+        # Promote the Pareto front to the export fidelity
+        # -------------------------------
+        if MULTI_FIDELITY and res.X is not None:
+            promoted = problem.promote(np.atleast_2d(res.X), problem.RUNNER)
+            print("Promoted configurations to IP export = " + str(promoted))
+
+    finally:
+        pool.close()
+
+        if session_pool is not None:
+            session_pool.close()
+
+        if remote is not None:
+            remote.close()
+
+        if engine is not None:
+            engine.close()
+
+        # Tool processes still running after an error
+        supervisor.kill_all()
+
+        telemetry.close()
+
+        if scheduler is not None:
+            scheduler.close()
+
+    if engine is not None:
+        engine.summary()
+
+    supervisor.summary()
+
+    telemetry.summary()
+
+    if canonicalizer is not None:
+        canonicalizer.summary()
+
+    if cache is not None:
+        cache.summary()
+
+    if scheduler is not None:
+        scheduler.summary()
+
+    # -------------------------------
+    # Analyze and export DB content
+    # -------------------------------
+    db.analyze(TIMEOUT)
+    db.export()
+finally:
+    if cache is not None:
+        cache.close()
+
+    db.close()
+
+    # -------------------------------
+    # Clean up intermediate files
+    # -------------------------------
+    workspace.close()
+
+workspace.summary()
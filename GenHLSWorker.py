@@ -0,0 +1,40 @@
+"""
+Worker daemon for the distributed evaluation mode of GenHLSOptimizer. The script:
+1. Parses user arguments
+2. Registers with the broker directory shared with the coordinator (heartbeats)
+3. Pulls directive vectors from the queue, synthesizes them with Vitis HLS
+4. Returns the metrics to the coordinator, which keeps the result database
+"""
+
+import argparse
+
+from modules.distributed import Worker
+from modules.scheduler import AdmissionScheduler
+from modules.utils import str2bool
+
+# -------------------------------
+# Parse command line arguments
+# -------------------------------
+parser = argparse.ArgumentParser(description='A worker daemon that runs the Vitis HLS syntheses of a distributed GenHLSOptimizer run.')
+
+parser.add_argument('--BROKER_DIR', type=str, required=True, help='The broker directory shared with the coordinator (e.g. on NFS).')
+parser.add_argument('--WORK_DIR', type=str, default="./", help='The local directory where the synthesis projects are created.')
+parser.add_argument('--THREADS', type=int, default=20, help='The number of concurrent synthesis jobs of this worker.')
+parser.add_argument('--WORKER_ID', type=str, default=None, help='The unique name of this worker. (default: <hostname>-<pid>)')
+parser.add_argument('--MEMORY_LIMIT', type=float, default=0, help='Fraction of the system memory that admitted syntheses may use; the youngest job is paused above 95%%. (default: 0, no memory control)')
+parser.add_argument('--LICENSES', type=int, default=0, help='Maximum number of concurrent Vitis HLS jobs on this host. (default: 0, no cap)')
+parser.add_argument('--LOG_MONITOR', type=str2bool, default=False, help='Abort syntheses early on fatal log errors, learned stalls or an infeasible C synthesis estimate. (opt-in)')
+parser.add_argument('--TMPFS', type=str2bool, default=False, help='Create the job directories on tmpfs (/dev/shm) instead of WORK_DIR.')
+parser.add_argument('--HEARTBEAT_INTERVAL', type=float, default=5, help='The heartbeat period in seconds.')
+
+args = parser.parse_args()
+
+# -------------------------------
+# Serve synthesis jobs
+# -------------------------------
+scheduler = None
+if args.MEMORY_LIMIT > 0 or args.LICENSES > 0:
+    scheduler = AdmissionScheduler(memory_limit=args.MEMORY_LIMIT, licenses=args.LICENSES)
+
+worker = Worker(args.BROKER_DIR, args.WORK_DIR, args.THREADS, worker_id=args.WORKER_ID, heartbeat_interval=args.HEARTBEAT_INTERVAL, scheduler=scheduler, log_monitor=args.LOG_MONITOR, tmpfs=args.TMPFS)
+worker.run()
@@ -0,0 +1,89 @@
+"""
+Offline replay benchmark of the longest-expected-job-first (LPT) dispatch order.
+The samples of existing result databases are replayed in random batches of
+offspring on THREADS simulated worker slots, using the recorded synthesis times.
+Each batch is a generation: it ends when its last synthesis ends.
+
+Reported per database, as the sum of the batch makespans:
+- population order (the order pool.map dispatches offspring in without LPT)
+- LPT by the cost model, trained online on the batches replayed so far
+- LPT by the recorded times (oracle lower bound of the ordering)
+"""
+
+import os
+import sys
+import heapq
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from modules.db import DB
+from modules.preprocessor import Preprocessor
+from modules.costModel import CostModel
+
+def makespan(times, n_slots):
+    """
+    Makespan of a list of jobs dispatched in the given order to the first free slot.
+    """
+    slots = [0.0] * n_slots
+    for t in times:
+        heapq.heappush(slots, heapq.heappop(slots) + t)
+
+    return max(slots)
+
+parser = argparse.ArgumentParser(description='Replay the synthesis times of result databases to measure the makespan reduction of LPT dispatching.')
+
+parser.add_argument('--DB_PATHS', type=str, nargs='+', required=True, help='The paths to the result databases to replay.')
+parser.add_argument('--INPUT_SOURCE_INFO_PATH', type=str, required=True, help='The path to the kernel source code information of the databases.')
+parser.add_argument('--BATCH_SIZE', type=int, default=40, help='The number of offspring per replayed batch.')
+parser.add_argument('--THREADS', type=int, default=10, help='The number of simulated worker slots.')
+parser.add_argument('--MIN_SAMPLES', type=int, default=10, help='The minimum number of samples before the cost model regression is used.')
+parser.add_argument('--REPEATS', type=int, default=10, help='The number of random replay orders per database.')
+parser.add_argument('--SEED', type=int, default=42, help='The random seed of the replay orders.')
+
+args = parser.parse_args()
+
+preprocessor = Preprocessor(args.INPUT_SOURCE_INFO_PATH)
+(n_var, xl, xu, top_level_function, directives) = preprocessor.preprocess()
+
+print("")
+print("%-60s | %8s | %12s | %12s | %12s | %9s | %9s" % ("database", "samples", "population", "LPT model", "LPT oracle", "gain (%)", "oracle (%)"))
+
+for db_path in args.DB_PATHS:
+    db = DB(db_path, read_only=True)
+    (X, Y) = db.get_all()
+    db.close()
+
+    n = len(X)
+    if n == 0:
+        print("%-60s | empty" % os.path.basename(db_path))
+        continue
+
+    T = Y[:, 6]
+    random_state = np.random.RandomState(args.SEED)
+
+    baseline = 0.0
+    model = 0.0
+    oracle = 0.0
+    for _ in range(args.REPEATS):
+        order = random_state.permutation(n)
+        cost_model = CostModel(directives, min_samples=args.MIN_SAMPLES)
+
+        for start in range(0, n, args.BATCH_SIZE):
+            batch = order[start:start + args.BATCH_SIZE]
+
+            baseline += makespan(T[batch], args.THREADS)
+            model += makespan(T[batch[cost_model.order(X[batch])]], args.THREADS)
+            oracle += makespan(np.sort(T[batch])[::-1], args.THREADS)
+
+            # The batch has been synthesized: its times train the model for the next ones
+            known = order[:start + len(batch)]
+            cost_model.fit(X[known], T[known])
+
+    gain = 100.0 * (baseline - model) / baseline if baseline > 0 else 0.0
+    oracle_gain = 100.0 * (baseline - oracle) / baseline if baseline > 0 else 0.0
+
+    print("%-60s | %8d | %12.1f | %12.1f | %12.1f | %9.2f | %9.2f" % (os.path.basename(db_path), n, baseline / args.REPEATS, model / args.REPEATS, oracle / args.REPEATS, gain, oracle_gain))
+
+print("")
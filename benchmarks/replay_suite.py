@@ -0,0 +1,221 @@
+"""
+Offline replay benchmark of the whole optimizer against a simulated Vitis HLS.
+GenHLSOptimizer.py runs unmodified for every operator configuration and thread
+count, with the vitis_hls stub in replay mode on PATH: every C synthesis answers
+with the metrics of the recorded result database and takes its recorded
+synthesis time times TIME_SCALE (vectors that were never recorded get the entry
+of the nearest recorded vector). The runs execute in a scratch directory each,
+with a fresh result database and synthesis cache.
+
+Reported per scenario, in simulated time (wall clock / TIME_SCALE):
+- evaluations per simulated hour
+- cache hit rate, i.e. the fraction of evaluations answered without a synthesis
+- worker idle fraction of the THREADS synthesis slots
+- mean and maximum generation makespan
+- hypervolume of the evaluated feasible points, relative to the recorded Pareto
+  front, at a quarter, half, three quarters and the end of the run
+
+The simulated time includes the optimizer overhead amplified by 1 / TIME_SCALE,
+so scales far below the per-synthesis overhead of the host are not meaningful.
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import shlex
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO_DIR)
+
+from pymoo.factory import get_performance_indicator
+
+# Progress line of the pymoo display: "    n_gen |  n_eval | ..."
+DISPLAY_LINE = re.compile(r"^\s*(\d+)\s*\|\s*(\d+)\s*\|")
+
+# Points of the run (fractions of its simulated duration) the hypervolume is reported at
+HV_CHECKPOINTS = [0.25, 0.5, 0.75, 1.0]
+
+def feasible(metrics):
+    """
+    Whether [latency, bram, dsp, ff, lut, uram] is a successful synthesis within the device.
+    """
+    return metrics[0] > 0 and max(metrics[1:6]) <= 100
+
+def load_recorded(db_path):
+    """
+    Device, clock period and feasible metrics of a recorded result database.
+    """
+    conn = sqlite3.connect(db_path)
+    meta = dict(conn.execute("SELECT name, value FROM meta"))
+    rows = conn.execute("SELECT latency, util_bram, util_dsp, util_ff, util_lut, util_uram FROM results").fetchall()
+    conn.close()
+
+    F = np.array([row for row in rows if feasible(row)], dtype=float)
+
+    return (meta["device_id"], meta["clock_period"], F)
+
+def run_scenario(args, config_path, threads, device_id, clock_period):
+    """
+    Run the optimizer once against the replay stub.
+
+    Returns:
+        tuple: (start, end, generations, trace) - wall clock start and end of the run, (time, n_eval)
+               of every displayed generation, and the trace records of the stub.
+    """
+    scratch = tempfile.mkdtemp(prefix="GenHLS_replay_")
+    try:
+        source_dir = os.path.dirname(os.path.abspath(args.INPUT_SOURCE_PATH))
+        for name in os.listdir(source_dir):
+            if os.path.isfile(os.path.join(source_dir, name)):
+                shutil.copy(os.path.join(source_dir, name), scratch)
+        shutil.copy(args.INPUT_SOURCE_INFO_PATH, os.path.join(scratch, "kernel_info.txt"))
+
+        trace_path = os.path.join(scratch, "trace.jsonl")
+        env = dict(os.environ)
+        env["PATH"] = os.path.join(REPO_DIR, "stubs") + os.pathsep + env.get("PATH", "")
+        env["VITIS_HLS_STUB_REPLAY_DB"] = os.path.abspath(args.DB_PATH)
+        env["VITIS_HLS_STUB_TIME_SCALE"] = str(args.TIME_SCALE)
+        env["VITIS_HLS_STUB_TRACE"] = trace_path
+
+        command = [
+            sys.executable, os.path.join(REPO_DIR, "GenHLSOptimizer.py"),
+            "--INPUT_SOURCE_PATH", os.path.join(scratch, os.path.basename(args.INPUT_SOURCE_PATH)),
+            "--INPUT_SOURCE_INFO_PATH", os.path.join(scratch, "kernel_info.txt"),
+            "--DB_NAME", "replay",
+            "--GENERATIONS", str(args.GENERATIONS),
+            "--OPERATOR_CONFIG_PATH", os.path.abspath(config_path),
+            "--THREADS", str(threads),
+            "--DEVICE_ID", device_id,
+            "--CLK_PERIOD", clock_period,
+            "--SYNTH_CACHE", "true",
+            "--LPT", "true",
+            "--CACHE_PATH", os.path.join(scratch, "cache.sqlite"),
+            "--MEMORY_LIMIT", "0"
+        ] + shlex.split(args.OPTIMIZER_ARGS)
+
+        generations = []
+        start = time.time()
+        process = subprocess.Popen(command, cwd=scratch, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+        log = []
+        for line in process.stdout:
+            m = DISPLAY_LINE.match(line)
+            if m is not None:
+                generations.append((time.time(), int(m.group(2))))
+            log.append(line)
+        process.wait()
+        end = time.time()
+
+        if process.returncode != 0:
+            sys.stdout.write("".join(log[-20:]))
+            raise RuntimeError("The optimizer exited with code %d (%s)" % (process.returncode, config_path))
+
+        trace = []
+        if os.path.exists(trace_path):
+            with open(trace_path) as f:
+                trace = [json.loads(line) for line in f if line.strip()]
+
+        return (start, end, generations, trace)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def scenario_metrics(start, end, generations, trace, threads, scale, hv, ideal, span):
+    """
+    Throughput, cache, idleness, makespan and hypervolume metrics of a run.
+    """
+    n_eval = generations[-1][1] if len(generations) > 0 else 0
+    syntheses = [record for record in trace if record["phase"] == "csynth"]
+
+    # Synthesis slots are busy from the first synthesis to the end of the last one
+    if len(trace) > 0:
+        first = min(record["start"] for record in trace)
+        last = max(record["end"] for record in trace)
+        busy = sum(record["end"] - record["start"] for record in trace)
+        idle = 1.0 - busy / (threads * max(last - first, 1e-9))
+    else:
+        first = start
+        idle = 1.0
+
+    # The first generation (the initial population) starts with the first synthesis
+    ends = [first] + [t for (t, n) in generations]
+    makespans = [(b - a) / scale for a, b in zip(ends[:-1], ends[1:])]
+
+    duration = end - start
+    hypervolumes = []
+    for fraction in HV_CHECKPOINTS:
+        limit = start + fraction * duration
+        F = [record["metrics"] for record in syntheses
+             if record["end"] <= limit and record["metrics"] is not None and feasible(record["metrics"])]
+        if len(F) == 0:
+            hypervolumes.append(0.0)
+            continue
+        F = (np.array(F, dtype=float) - ideal) / span
+        hypervolumes.append(hv.do(F))
+
+    return {
+        "evaluations": n_eval,
+        "syntheses": len(syntheses),
+        "simulated_hours": duration / scale / 3600.0,
+        "evals_per_hour": n_eval / (duration / scale / 3600.0),
+        "cache_hit_rate": 1.0 - len(syntheses) / n_eval if n_eval > 0 else 0.0,
+        "idle_fraction": idle,
+        "makespan_mean": float(np.mean(makespans)) if len(makespans) > 0 else 0.0,
+        "makespan_max": float(np.max(makespans)) if len(makespans) > 0 else 0.0,
+        "hypervolume": hypervolumes
+    }
+
+parser = argparse.ArgumentParser(description='Replay a recorded result database through the optimizer and a simulated Vitis HLS to compare operator configurations and thread counts.')
+
+parser.add_argument('--DB_PATH', type=str, required=True, help='The recorded result database (with directive table) answering the syntheses.')
+parser.add_argument('--INPUT_SOURCE_PATH', type=str, required=True, help='The path to the kernel source code of the database (headers next to it are copied too).')
+parser.add_argument('--INPUT_SOURCE_INFO_PATH', type=str, required=True, help='The path to the kernel source code information of the database.')
+parser.add_argument('--CONFIGS', type=str, nargs='+', default=sorted(glob.glob(os.path.join(REPO_DIR, "OperatorConfigurations", "config_*.json"))), help='The operator configurations to run. (default: all)')
+parser.add_argument('--THREADS', type=int, nargs='+', default=[1, 4, 16], help='The thread counts to run.')
+parser.add_argument('--TIME_SCALE', type=float, default=0.01, help='Factor applied to the recorded synthesis times.')
+parser.add_argument('--GENERATIONS', type=int, default=10, help='The number of GA generations per run.')
+parser.add_argument('--OPTIMIZER_ARGS', type=str, default="", help='Additional arguments passed to GenHLSOptimizer.py (one quoted string).')
+parser.add_argument('--OUTPUT_JSON', type=str, default=None, help='Optional file the metrics of all scenarios are written to.')
+
+args = parser.parse_args()
+
+(device_id, clock_period, F_recorded) = load_recorded(args.DB_PATH)
+if len(F_recorded) == 0:
+    raise SystemExit(args.DB_PATH + " has no feasible entry to replay")
+
+# Objectives normalized by the ranges of the recorded feasible points
+ideal = F_recorded.min(axis=0)
+span = F_recorded.max(axis=0) - ideal
+span[span == 0] = 1.0
+hv = get_performance_indicator("hv", ref_point=np.full(F_recorded.shape[1], 1.1))
+hv_recorded = hv.do((F_recorded - ideal) / span)
+
+print("Replaying " + args.DB_PATH + " (" + device_id + ", " + clock_period + " ns), time scale " + str(args.TIME_SCALE))
+print("%-16s %7s %6s %6s %9s %6s %6s %10s %10s   %s" % (
+    "config", "threads", "evals", "synth", "evals/h", "hit", "idle", "gen mean", "gen max", "HV % at " + "/".join(str(int(100 * f)) for f in HV_CHECKPOINTS) + "% of the run"))
+
+results = []
+for config_path in args.CONFIGS:
+    for threads in args.THREADS:
+        (start, end, generations, trace) = run_scenario(args, config_path, threads, device_id, clock_period)
+        metrics = scenario_metrics(start, end, generations, trace, threads, args.TIME_SCALE, hv, ideal, span)
+        metrics["hypervolume"] = [100.0 * v / hv_recorded for v in metrics["hypervolume"]]
+        metrics["config"] = os.path.basename(config_path)
+        metrics["threads"] = threads
+        results.append(metrics)
+
+        print("%-16s %7d %6d %6d %9.1f %6.2f %6.2f %9.0fs %9.0fs   %s" % (
+            metrics["config"], threads, metrics["evaluations"], metrics["syntheses"], metrics["evals_per_hour"],
+            metrics["cache_hit_rate"], metrics["idle_fraction"], metrics["makespan_mean"], metrics["makespan_max"],
+            " / ".join("%.1f" % v for v in metrics["hypervolume"])), flush=True)
+
+if args.OUTPUT_JSON is not None:
+    with open(args.OUTPUT_JSON, 'w') as f:
+        json.dump({"db_path": args.DB_PATH, "time_scale": args.TIME_SCALE, "scenarios": results}, f, indent=4)
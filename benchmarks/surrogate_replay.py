@@ -0,0 +1,84 @@
+"""
+Offline replay benchmark of the surrogate pre-screening. The samples of an
+existing result database are replayed in random batches of offspring. For each
+batch the surrogate (trained on the samples "synthesized" so far) decides which
+offspring to synthesize; the rest would have been filled with predictions.
+
+Reported per synthesis fraction:
+- the fraction of synthesis runs and synthesis time saved (speedup)
+- the hit rate, i.e. the fraction of the true Pareto front of the database
+  that was synthesized and therefore not lost to a wrong prediction
+"""
+
+import os
+import sys
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pymoo.util.nds.non_dominated_sorting import NonDominatedSorting
+
+from modules.db import DB
+from modules.preprocessor import Preprocessor
+from modules.surrogate import Surrogate, FAILED_METRICS
+
+parser = argparse.ArgumentParser(description='Replay a result database to measure the hit rate / speedup trade-off of the surrogate pre-screening.')
+
+parser.add_argument('--DB_PATH', type=str, required=True, help='The path to the result database to replay.')
+parser.add_argument('--INPUT_SOURCE_INFO_PATH', type=str, required=True, help='The path to the kernel source code information of the database.')
+parser.add_argument('--BATCH_SIZE', type=int, default=40, help='The number of offspring per replayed batch.')
+parser.add_argument('--MIN_SAMPLES', type=int, default=20, help='The minimum number of successful samples before the surrogate is used.')
+parser.add_argument('--SYNTH_FRACTIONS', type=float, nargs='+', default=[0.25, 0.5, 0.75], help='The synthesis fractions to evaluate.')
+parser.add_argument('--SEED', type=int, default=42, help='The random seed of the replay order.')
+
+args = parser.parse_args()
+
+preprocessor = Preprocessor(args.INPUT_SOURCE_INFO_PATH)
+(n_var, xl, xu, top_level_function, directives) = preprocessor.preprocess()
+
+db = DB(args.DB_PATH, read_only=True)
+(X, Y) = db.get_all()
+db.close()
+
+n = len(X)
+if n == 0:
+    print("Empty database " + args.DB_PATH)
+    sys.exit(1)
+
+# True Pareto front of the database (successful and feasible samples)
+ok = ~np.all(Y[:, 0:6] == FAILED_METRICS, axis=1) & np.all(Y[:, 1:6] <= 100, axis=1)
+ok_idx = np.where(ok)[0]
+front = set(ok_idx[NonDominatedSorting().do(Y[ok_idx, 0:6], only_non_dominated_front=True)]) if len(ok_idx) > 0 else set()
+
+total_time = Y[:, 6].sum()
+
+print("")
+print("Database = %s (%d samples, %d Pareto-optimal)" % (args.DB_PATH, n, len(front)))
+print("")
+print("synth fraction | synthesized | runs saved (%) | time saved (%) | speedup | hit rate (%)")
+
+for synth_fraction in args.SYNTH_FRACTIONS:
+    order = np.random.RandomState(args.SEED).permutation(n)
+    surrogate = Surrogate(directives, min_samples=args.MIN_SAMPLES, seed=args.SEED)
+
+    known = []
+    for start in range(0, n, args.BATCH_SIZE):
+        batch = list(order[start:start + args.BATCH_SIZE])
+        n_synth = max(1, int(np.ceil(synth_fraction * len(batch))))
+
+        if len(batch) > n_synth and len(known) > 0 and surrogate.fit(X[known], Y[known]):
+            (selected, _) = surrogate.screen(X[batch], n_synth)
+            known.extend(batch[i] for i in selected)
+        else:
+            known.extend(batch)
+
+    synth_time = Y[known, 6].sum()
+    runs_saved = 100.0 * (n - len(known)) / n
+    time_saved = 100.0 * (total_time - synth_time) / total_time if total_time > 0 else 0.0
+    speedup = total_time / synth_time if synth_time > 0 else float('inf')
+    hit_rate = 100.0 * len(front.intersection(known)) / len(front) if len(front) > 0 else 100.0
+
+    print("%14.2f | %11d | %14.2f | %14.2f | %7.2f | %12.2f" % (synth_fraction, len(known), runs_saved, time_saved, speedup, hit_rate))
+
+print("")
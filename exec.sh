@@ -1,39 +1,7 @@
 #!/bin/bash
 
-# Store the current script's process ID (PID)
-SCRIPT_PID=$$
-echo "Current proc PID "$SCRIPT_PID
-
-# Function to monitor system memory usage and kill the script if memory usage exceeds a threshold
-check_memory() {
-    # Get total memory in MB
-    TOTAL_MEM=$(free --mega | grep Mem | awk '{print $2}')
-    # Get free memory in MB
-    FREE_MEM=$(free --mega | grep Mem | awk '{print $4}')
-    # Get used memory in MB
-    USED_MEM=$(free --mega | grep Mem | awk '{print $3}')
-
-    # Calculate threshold as 95% of total memory
-    THRESHOLD=$(echo "$TOTAL_MEM*0.95 / 1" | bc)
-    echo "Memory threshold "$THRESHOLD" MB"
-
-    # Loop while used memory is less than threshold (wait until memory exceeds threshold)
-    while [ $USED_MEM -lt $THRESHOLD ]
-    do
-        # Update used memory
-        USED_MEM=$(free --mega | grep Mem | awk '{print $3}')
-        # Sleep 1 second before checking again
-        sleep 1
-    done
-
-    # Print warning message when threshold exceeded
-    echo "AUTOMATIC OPTIMIZER EXCEEDED MEMORY THRESHOLD !"
-
-    # Kill the entire script process group (script + child processes)
-    kill -- -$SCRIPT_PID
-}
-
 # Main function to run design space exploration (DSE) on specified devices and clock periods
+# (GenHLSCampaign.py runs all of them concurrently on one shared pool of Vitis HLS jobs)
 run_func() {
 
     # List of FPGA device IDs to run optimization on
@@ -43,13 +11,6 @@ run_func() {
         # List of clock periods (in nanoseconds) to explore
         for CLK_PERIOD in 10 5 3.33; 
         do
-            # Start memory monitoring in background
-            check_memory &
-            BACKGROUND_PROC_PID=$!
-            echo "check_memory background proc PID "$BACKGROUND_PROC_PID
-            # Wait 5 seconds before starting the optimization
-            sleep 5
-
             # Directory for application dataset files
             DIR=./Applications/$APP
 
@@ -81,15 +42,16 @@ run_func() {
 
             THREADS=10
 
+            # Memory is managed by the admission scheduler of the optimizer (opt-in): jobs are
+            # only launched when they fit in MEMORY_LIMIT and paused (not killed) under pressure
+            MEMORY_LIMIT=0.9
+
             # Run the Python optimizer with all the specified parameters
-            python3 GenHLSOptimizer.py --INPUT_SOURCE_PATH $INPUT_SOURCE_PATH --INPUT_SOURCE_INFO_PATH $INPUT_SOURCE_INFO_PATH --DB_NAME $DB_NAME --SRC_EXTENSION $SRC_EXTENSION --DEVICE_ID $DEVICE_ID --CLK_PERIOD $CLK_PERIOD --THREADS $THREADS
+            python3 GenHLSOptimizer.py --INPUT_SOURCE_PATH $INPUT_SOURCE_PATH --INPUT_SOURCE_INFO_PATH $INPUT_SOURCE_INFO_PATH --DB_NAME $DB_NAME --SRC_EXTENSION $SRC_EXTENSION --DEVICE_ID $DEVICE_ID --CLK_PERIOD $CLK_PERIOD --THREADS $THREADS --MEMORY_LIMIT $MEMORY_LIMIT
         
             # Clean up generated files after the run
             clean_func
 
-            # Kill the background memory checking process
-            kill $BACKGROUND_PROC_PID
-
         done
     done
 }
@@ -109,6 +71,7 @@ kill_func() {
 # Function to clean up files generated during optimization runs
 clean_func() {
     rm -r GENETIC_DSE_*
+    rm -r GenHLS_*
     rm vitis_*.log
     rm script_*.tcl
     rm kernel_*.cpp
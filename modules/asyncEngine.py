@@ -0,0 +1,337 @@
+import os
+import time
+import signal
+import asyncio
+import threading
+
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.supervisor import Job
+from modules.failures import FAILURE_UNKNOWN
+
+class AsyncEngine():
+    """
+    Asyncio launch pipeline of the Vitis HLS jobs of a problem.
+
+    One event loop (in its own thread) drives all jobs instead of one blocked
+    evaluator thread per job. Job numbers come from the atomic counter of the
+    problem, the job directories, kernel variants and Tcl scripts of all queued
+    jobs are prepared concurrently on a small thread pool (ahead of a free slot),
+    and a bounded semaphore caps the running jobs. vitis_hls is started with
+    asyncio.create_subprocess_exec in its own process group, so a launch never
+    waits for the file I/O or the process creation of other jobs. Deadlines,
+    pauses of the admission scheduler and the log monitor are honoured as by the
+    ProcessSupervisor. map() is a synchronous adapter for the runner of the problem.
+
+    An error of a single job (job directory, kernel rendering, launch, report parsing)
+    fails only that job, which is stored as an unknown failure. Any other error (e.g. of
+    the DB) cancels the other jobs of the batch, kills their processes and is raised by map().
+    """
+
+    def __init__(self, problem, max_jobs, prep_threads=4):
+        """
+        Args:
+            problem (HLSDirectiveOptimizationProblem): The problem whose syntheses are run.
+            max_jobs (int): Maximum number of concurrently running jobs.
+            prep_threads (int): Threads preparing, parsing and cleaning up the job directories.
+        """
+        self.problem = problem
+        self.max_jobs = max_jobs
+
+        self.prep = ThreadPoolExecutor(max_workers=prep_threads, thread_name_prefix="prep")
+
+        self.lock = Lock()
+        self.active = {}
+        # (launch latency, wall time, status) of every job
+        self.history = []
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="async-engine", daemon=True)
+        self.thread.start()
+
+        # The semaphore belongs to the loop, create it there
+        asyncio.run_coroutine_threadsafe(self._setup(), self.loop).result()
+
+    async def _setup(self):
+        self.semaphore = asyncio.BoundedSemaphore(self.max_jobs)
+        # Free slot numbers (trace tracks of the running jobs)
+        self.slots = list(range(self.max_jobs, 0, -1))
+
+    def map(self, X, fidelity):
+        """
+        Synthesize and store design vectors, blocking the calling thread until all are done.
+        Safe to call from several threads at once (they share the job slots).
+
+        Args:
+            X (list): Design vectors, in dispatch order.
+            fidelity (int): Synthesis fidelity.
+
+        Returns:
+            list: [latency, bram, dsp, ff, lut, uram, synth_time] of every vector, in the order of X.
+        """
+        if len(X) == 0:
+            return []
+        return asyncio.run_coroutine_threadsafe(self._map(X, fidelity), self.loop).result()
+
+    async def _map(self, X, fidelity):
+        tasks = [asyncio.ensure_future(self._evaluate(x, fidelity)) for x in X]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            # Fatal error: do not leave the other jobs of the batch running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _in_prep(self, function, *args):
+        return await self.loop.run_in_executor(self.prep, function, *args)
+
+    async def _evaluate(self, x, fidelity):
+        """
+        Asynchronous counterpart of _dequeue_and_store(): answer a vector from the synthesis
+        cache or synthesize it, and store it in the DB.
+        """
+        problem = self.problem
+        telemetry = problem.TELEMETRY
+
+        (key, cached) = await self._in_prep(problem._cache_lookup, x, fidelity)
+        if cached is not None:
+            telemetry.dequeue()
+            return cached
+
+        attempt = 0
+        while True:
+            reports = {} if key is not None else None
+
+            (metrics, reached, failure, synth_time) = await self._synthesize(x, fidelity, reports, attempt == 0)
+
+            if problem.RETRY_POLICY is None or not problem.RETRY_POLICY.retry(failure, attempt):
+                break
+
+            # Transient failure: the slot is free during the backoff, the retry takes the next free one
+            delay = problem.RETRY_POLICY.delay(attempt)
+            attempt += 1
+            telemetry.count("retries")
+            print("Retry %d of %d in %.0f s after a %s failure !" % (attempt, problem.RETRY_POLICY.retries, delay, failure))
+            await asyncio.sleep(delay)
+
+        return await self._in_prep(problem._store, x, metrics, reached, synth_time, key, reports, failure)
+
+    async def _synthesize(self, x, fidelity, reports, queued):
+        """
+        Prepare a job, run it in a free slot and release its directory.
+
+        Args:
+            queued (bool): Whether the job was counted in the queue of the telemetry.
+
+        Returns:
+            tuple: (metrics, fidelity, failure, synth_time)
+        """
+        problem = self.problem
+        telemetry = problem.TELEMETRY
+
+        my_i = next(problem.job_ids)
+
+        JOB_DIR = None
+        result = None
+        synth_time = 0
+        try:
+            JOB_DIR = await self._in_prep(self._create_workspace, my_i)
+            job = await self._in_prep(problem._prepare_job, x, fidelity, my_i, JOB_DIR)
+
+            async with self.semaphore:
+                if queued:
+                    telemetry.dequeue()
+                    queued = False
+                telemetry.job_started()
+                slot = self.slots.pop()
+                try:
+                    start = time.time()
+                    result = await self._run(job, fidelity, reports, slot)
+                    synth_time = int(time.time()) - int(start)
+                    telemetry.record("job", start, time.time(), job=my_i, track="slot %d" % slot)
+                finally:
+                    self.slots.append(slot)
+                    telemetry.job_finished()
+        except Exception as e:
+            # The job is stored as failed, the other jobs of the batch go on
+            print("Job %d failed: %r" % (my_i, e))
+            telemetry.count("failures_" + FAILURE_UNKNOWN)
+            result = ([0, 101, 101, 101, 101, 101], fidelity, FAILURE_UNKNOWN)
+        finally:
+            if queued:
+                telemetry.dequeue()
+
+            # Remove (or retain) the job directory on every exit path
+            if JOB_DIR is not None:
+                (metrics, reached, failure) = result if result is not None else (None, fidelity, None)
+                failed = metrics is None or failure is not None
+                await self._in_prep(self._release_workspace, my_i, JOB_DIR, x, None if failed else metrics, reached)
+
+        return result + (synth_time,)
+
+    def _create_workspace(self, my_i):
+        with self.problem.TELEMETRY.span("workspace", job=my_i):
+            return self.problem.WORKSPACE.create(my_i)
+
+    def _release_workspace(self, my_i, JOB_DIR, x, metrics, fidelity):
+        with self.problem.TELEMETRY.span("cleanup", job=my_i):
+            self.problem.WORKSPACE.release(JOB_DIR, x, metrics, fidelity)
+
+    async def _run(self, job, fidelity, reports, slot):
+        """
+        Launch a prepared job, wait for it and parse its results.
+
+        Returns:
+            tuple: (metrics, fidelity, failure) as returned by _synthesize().
+        """
+        problem = self.problem
+        telemetry = problem.TELEMETRY
+        supervisor = problem.SUPERVISOR
+        scheduler = supervisor.scheduler
+        track = "slot %d" % slot
+        my_i = job["id"]
+
+        (timeout, monitor) = problem._job_limits(job, fidelity)
+
+        # Blocks (off the loop) until the admission scheduler lets the job start
+        launch_start = time.time()
+        key = problem.TOP_LEVEL_FUNCTION + "@" + problem.DEVICE_ID
+        if scheduler is not None:
+            admission = self.loop.run_in_executor(None, scheduler.admit, key)
+            try:
+                await asyncio.shield(admission)
+            except asyncio.CancelledError:
+                # Give the admission back once it is granted
+                admission.add_done_callback(lambda f: scheduler.cancel(key))
+                raise
+
+        try:
+            process = await asyncio.create_subprocess_exec('vitis_hls', '-f', job["script"], '-l', job["log"], cwd=job["dir"], start_new_session=True)
+        except OSError:
+            if scheduler is not None:
+                scheduler.cancel(key)
+            raise
+
+        handle = Job(my_i, process, time.monotonic())
+        launch_latency = time.time() - launch_start
+        telemetry.record("launch", launch_start, launch_start + launch_latency, job=my_i, track=track)
+
+        with self.lock:
+            self.active[handle.pid] = handle
+
+        if scheduler is not None:
+            scheduler.started(handle, key)
+
+        synth_start = time.time()
+        exited = False
+        try:
+            while True:
+                remaining = handle.deadline(timeout) - time.monotonic()
+                if remaining <= 0:
+                    break
+                if monitor is not None:
+                    remaining = min(remaining, monitor.interval)
+                try:
+                    await asyncio.wait_for(process.wait(), remaining)
+                    exited = True
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                if monitor is not None and handle.paused_since is None and monitor.check(handle.paused_time):
+                    break
+        except asyncio.CancelledError:
+            # The batch was abandoned, do not leave the tool running
+            supervisor._kill_tree(handle.pid)
+            if scheduler is not None:
+                scheduler.finished(handle)
+            with self.lock:
+                del self.active[handle.pid]
+            raise
+
+        aborted = not exited and monitor is not None and monitor.reason is not None
+        timed_out = not exited and not aborted
+
+        # Kill the job on timeout or abort, and leftovers of its process group in all cases
+        if exited:
+            try:
+                os.killpg(handle.pid, signal.SIGKILL)
+            except OSError:
+                pass
+        else:
+            supervisor._kill_tree(handle.pid)
+            await process.wait()
+        wall_time = time.monotonic() - handle.start_time
+
+        if scheduler is not None:
+            scheduler.finished(handle)
+
+        with self.lock:
+            del self.active[handle.pid]
+
+        returncode = process.returncode if exited else None
+        abort_reason = monitor.reason if aborted else None
+        telemetry.record("synthesis", synth_start, time.time(), job=my_i, track=track, paused_time=handle.paused_time, returncode=returncode, timed_out=timed_out, abort_reason=abort_reason)
+
+        if aborted:
+            status = "aborted=" + abort_reason
+            print("Aborted ! (job %d %s wall=%.1fs launch=%.3fs: %s)" % (my_i, status, wall_time, launch_latency, monitor.message))
+        elif timed_out:
+            status = "timeout"
+            print("Timeout ! (job %d %s wall=%.1fs launch=%.3fs)" % (my_i, status, wall_time, launch_latency))
+        else:
+            status = "exit=" + str(returncode)
+            print("Finished ! (job %d %s wall=%.1fs launch=%.3fs)" % (my_i, status, wall_time, launch_latency))
+
+        with self.lock:
+            self.history.append((launch_latency, wall_time, status))
+
+        if monitor is not None:
+            monitor.finish(handle.paused_time)
+
+        return await self._in_prep(problem._job_result, job, fidelity, exited, abort_reason, monitor, reports, returncode)
+
+    def kill_all(self):
+        """
+        Kill the process groups of all running jobs.
+        """
+        with self.lock:
+            pids = list(self.active.keys())
+
+        for pid in pids:
+            self.problem.SUPERVISOR._kill_tree(pid)
+
+    def close(self):
+        """
+        Kill the remaining jobs, stop the event loop and the preparation threads.
+        """
+        self.kill_all()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.prep.shutdown()
+
+    def summary(self):
+        """
+        Print the launch latency and the outcome of the jobs run by the engine.
+        """
+        with self.lock:
+            history = list(self.history)
+
+        jobs = len(history)
+        if jobs == 0:
+            return
+
+        latencies = [latency for (latency, wall_time, status) in history]
+        timeouts = sum(1 for (latency, wall_time, status) in history if status == "timeout")
+        aborts = sum(1 for (latency, wall_time, status) in history if status.startswith("aborted"))
+
+        print("")
+        print("Async Engine Statistics")
+        print("")
+        print("#jobs = %d (timeouts = %d, early aborts = %d)" % (jobs, timeouts, aborts))
+        print("Launch latency = %.3f s mean, %.3f s max" % (sum(latencies) / jobs, max(latencies)))
+        print("Average wall time = %.1f s" % (sum(wall_time for (latency, wall_time, status) in history) / jobs))
+        print("")
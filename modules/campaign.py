@@ -0,0 +1,186 @@
+import threading
+import collections
+
+class _Target:
+    """
+    Bookkeeping of one campaign target.
+    """
+
+    def __init__(self, name, weight):
+        self.name = name
+        self.weight = weight
+        self.queue = collections.deque()
+        self.running = 0
+        self.dispatched = 0
+        self.done = 0
+        self.failed = 0
+        self.batches = 0
+
+class _Batch:
+    """
+    The evaluations of one map call of a target; the caller blocks until all are done.
+    """
+
+    def __init__(self, size):
+        self.results = [None] * size
+        self.remaining = size
+        self.error = None
+
+class FairShareScheduler:
+    """
+    A pool of evaluation slots shared by the optimization runs of a campaign.
+
+    Every target submits its generations through its own map-like runner. A free
+    slot takes the next evaluation of the target with the lowest number of running
+    evaluations per unit of weight (ties: lowest dispatched evaluations per weight),
+    so targets with a higher priority get a proportionally larger share of the slots
+    and no target starves while another one has a long queue.
+    """
+
+    def __init__(self, n_slots):
+        """
+        Args:
+            n_slots (int): Number of concurrent evaluations of all targets.
+        """
+        self.n_slots = n_slots
+        self.targets = collections.OrderedDict()
+
+        self.cond = threading.Condition()
+        self.closing = False
+
+        self.threads = []
+        for i in range(n_slots):
+            thread = threading.Thread(target=self._slot, name="campaign-slot-%d" % i, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def register(self, name, weight=1.0):
+        """
+        Add a target to the campaign.
+
+        Args:
+            name (str): Unique target name.
+            weight (float): Share of the slots relative to the other targets.
+
+        Returns:
+            function: Map function of the target (function, iterable) -> list of results.
+        """
+        if weight <= 0:
+            raise ValueError("The weight of target %s must be positive" % name)
+
+        with self.cond:
+            if name in self.targets:
+                raise ValueError("Target %s is already registered" % name)
+            self.targets[name] = _Target(name, weight)
+
+        return lambda function, iterable: self.map(name, function, iterable)
+
+    def map(self, name, function, iterable):
+        """
+        Evaluate function on every item on the shared slots and block until all are done.
+
+        Args:
+            name (str): Target the evaluations are accounted to.
+            function (function): The evaluation.
+            iterable (iterable): The arguments.
+
+        Returns:
+            list: The results in the order of the arguments.
+        """
+        items = list(iterable)
+        batch = _Batch(len(items))
+
+        with self.cond:
+            target = self.targets[name]
+            target.batches += 1
+            for i, item in enumerate(items):
+                target.queue.append((batch, i, function, item))
+            self.cond.notify_all()
+
+            while batch.remaining > 0:
+                self.cond.wait()
+
+        if batch.error is not None:
+            raise batch.error
+
+        return batch.results
+
+    def _next(self):
+        """
+        Pick the target whose next evaluation runs on a free slot (called with the lock held).
+        """
+        best = None
+        for target in self.targets.values():
+            if len(target.queue) == 0:
+                continue
+            share = (target.running / target.weight, target.dispatched / target.weight)
+            if best is None or share < best[0]:
+                best = (share, target)
+
+        return best[1] if best is not None else None
+
+    def _slot(self):
+        """
+        Evaluation slot: run the queued evaluations in fair-share order.
+        """
+        while True:
+            with self.cond:
+                target = self._next()
+                while target is None and not self.closing:
+                    self.cond.wait()
+                    target = self._next()
+                if target is None:
+                    return
+
+                (batch, i, function, item) = target.queue.popleft()
+                target.running += 1
+                target.dispatched += 1
+
+            error = None
+            try:
+                result = function(item)
+            except BaseException as e:
+                error = e
+
+            with self.cond:
+                target.running -= 1
+                target.done += 1
+                if error is None:
+                    batch.results[i] = result
+                else:
+                    target.failed += 1
+                    if batch.error is None:
+                        batch.error = error
+                batch.remaining -= 1
+                self.cond.notify_all()
+
+    def progress(self):
+        """
+        Snapshot of the per-target counters.
+
+        Returns:
+            dict: Target name -> {weight, queued, running, done, failed, batches}.
+        """
+        with self.cond:
+            return {
+                name: {
+                    "weight": target.weight,
+                    "queued": len(target.queue),
+                    "running": target.running,
+                    "done": target.done,
+                    "failed": target.failed,
+                    "batches": target.batches
+                }
+                for name, target in self.targets.items()
+            }
+
+    def close(self):
+        """
+        Stop the slots once the queued evaluations are done.
+        """
+        with self.cond:
+            self.closing = True
+            self.cond.notify_all()
+
+        for thread in self.threads:
+            thread.join()
@@ -0,0 +1,163 @@
+import re
+
+from threading import Lock
+
+import numpy as np
+
+def strip_comments(source):
+    """
+    Blank out the comments and string literals of a C/C++ source, which may contain
+    braces, semicolons and labels (offsets and line breaks are preserved).
+    """
+    return re.sub(r"//[^\n]*|/\*.*?\*/|\"(\\.|[^\"\\])*\"", lambda m: re.sub(r"[^\n]", " ", m.group(0)), source, flags=re.S)
+
+def loop_nesting(source, loop_labels):
+    """
+    Find the lexical nesting of the labelled loops of a kernel source.
+
+    Args:
+        source (str): Kernel source with the L<k>: action point labels.
+        loop_labels (set): Label numbers of the loop action points.
+
+    Returns:
+        dict: Label number -> label number of the innermost enclosing labelled loop
+              of the same function body (None for outermost loops).
+    """
+    source = strip_comments(source)
+
+    parent = {}
+    stack = []
+    pending = None
+    parens = 0
+    for m in re.finditer(r"\bL(\d+)\s*:(?!:)|[{}();]", source):
+        token = m.group(0)
+        if m.group(1) is not None:
+            label = int(m.group(1))
+            if label in loop_labels:
+                enclosing = [l for l in stack if l is not None]
+                parent[label] = enclosing[-1] if len(enclosing) > 0 else None
+                pending = label
+        elif token == "(":
+            parens += 1
+        elif token == ")":
+            parens -= 1
+        elif token == "{":
+            # The first block after a loop label is the loop body
+            stack.append(pending)
+            pending = None
+        elif token == "}":
+            if len(stack) > 0:
+                stack.pop()
+        elif token == ";" and parens == 0:
+            # Loop body without braces
+            pending = None
+
+    return parent
+
+class Canonicalizer():
+    """
+    Maps directive vectors to a canonical representative of their equivalence class,
+    so that configurations that produce the same hardware share one DB entry and
+    one synthesis:
+
+    - "pipeline" and "pipeline II=1" (the default initiation interval) are the same directive
+    - the directives of loops nested in a pipelined loop are irrelevant (Vitis HLS fully
+      unrolls them), they are set to the first option of their action point
+
+    Loop nesting is parsed from the labelled kernel source; an optional parent=L<k>
+    field on a loop line of the kernel info overrides it.
+    """
+
+    def __init__(self, directives, input_source_path, input_source_info_path):
+        """
+        Args:
+            directives (list): List of directive options per action point.
+            input_source_path (str): The labelled kernel source.
+            input_source_info_path (str): The kernel info the directives were generated from.
+        """
+        self.directives = directives
+
+        with open(input_source_info_path) as f:
+            lines = [line.strip() for line in f.readlines()[1:] if line.strip() != ""]
+        infos = [line.split(',') for line in lines]
+
+        # Option aliases per action point
+        self.alias = []
+        for i, options in enumerate(directives):
+            alias = np.arange(len(options))
+            for j, d in enumerate(options):
+                k = self._equivalent(d, options)
+                if k is not None:
+                    alias[j] = k
+            self.alias.append(alias)
+
+        # Pipelined options and labelled descendants of every loop action point
+        loops = {int(info[0][1:]): i for i, info in enumerate(infos) if info[1] == "loop"}
+        with open(input_source_path) as f:
+            parent = loop_nesting(f.read(), set(loops.keys()))
+        for info in infos:
+            for field in info[3:]:
+                if info[1] == "loop" and field.startswith("parent="):
+                    parent[int(info[0][1:])] = int(field[len("parent=L"):])
+
+        self.rules = []
+        for label in sorted(loops.keys()):
+            i = loops[label]
+            descendants = [loops[l] for l in loops if l != label and self._is_ancestor(label, l, parent)]
+            pipelined = [j for j, d in enumerate(directives[i]) if "pipeline" in d]
+            if len(descendants) > 0 and len(pipelined) > 0:
+                self.rules.append((i, np.array(pipelined), descendants))
+
+        self.lock = Lock()
+        self.n_vectors = 0
+        self.n_changed = 0
+
+    def _equivalent(self, directive, options):
+        """
+        Index of the option the directive is equivalent to, None if it is canonical itself.
+        """
+        if directive == "#pragma HLS pipeline II=1" and "#pragma HLS pipeline" in options:
+            return options.index("#pragma HLS pipeline")
+
+        return None
+
+    def _is_ancestor(self, ancestor, label, parent):
+        depth = 0
+        while parent.get(label) is not None and depth <= len(parent):
+            label = parent[label]
+            if label == ancestor:
+                return True
+            depth += 1
+        return False
+
+    def canonicalize(self, X):
+        """
+        Map directive vectors to their canonical representatives.
+
+        Args:
+            X (array): Directive vectors (n x n_var).
+
+        Returns:
+            array: Canonical directive vectors (n x n_var).
+        """
+        X = np.atleast_2d(X).astype(int)
+        C = np.empty_like(X)
+        for i, alias in enumerate(self.alias):
+            C[:, i] = alias[X[:, i]]
+
+        for (i, pipelined, descendants) in self.rules:
+            mask = np.isin(C[:, i], pipelined)
+            C[np.ix_(mask, descendants)] = 0
+
+        with self.lock:
+            self.n_vectors += len(X)
+            self.n_changed += int(np.any(C != X, axis=1).sum())
+
+        return C
+
+    def summary(self):
+        """
+        Print how many evaluated vectors were mapped to an equivalent configuration.
+        """
+        with self.lock:
+            print("Canonicalization: %d of %d evaluated vectors mapped to an equivalent configuration" % (self.n_changed, self.n_vectors))
@@ -0,0 +1,164 @@
+import os
+import pickle
+import random
+import contextlib
+
+import numpy as np
+
+from threading import Lock
+
+class IsolatedRandom():
+    """
+    Private Python and NumPy random generator states of one of several searches
+    running in the same process.
+
+    pymoo draws from the global generators, so searches running in concurrent threads
+    would consume each other's random numbers. Inside the context the global
+    generators hold the state of this search, and only one search at a time is inside
+    such a context; the evaluations, which do not draw random numbers, run outside.
+    """
+
+    # Shared by all searches: the global generators hold the state of one of them at a time
+    lock = Lock()
+
+    def __init__(self):
+        self.states = None
+
+    def __enter__(self):
+        IsolatedRandom.lock.acquire()
+        self.saved = (random.getstate(), np.random.get_state())
+        if self.states is not None:
+            random.setstate(self.states[0])
+            np.random.set_state(self.states[1])
+        return self
+
+    def __exit__(self, *exc):
+        self.states = (random.getstate(), np.random.get_state())
+        random.setstate(self.saved[0])
+        np.random.set_state(self.saved[1])
+        IsolatedRandom.lock.release()
+        return False
+
+class Checkpointer():
+    """
+    Periodic checkpoints of the search state of a run.
+
+    A checkpoint holds the algorithm state (population, archive, generation counter,
+    termination history, ...) together with the Python and NumPy random generator
+    states. The problem object (thread pool, DB, Vitis HLS processes) is not part of
+    the checkpoint; it is re-attached on resume. Checkpoints are written atomically,
+    so a process killed while saving leaves the previous checkpoint intact.
+    """
+
+    def __init__(self, path, interval=1):
+        """
+        Args:
+            path (str): Path of the checkpoint file.
+            interval (int): Number of generations (completed evaluations for the steady-state driver) between two checkpoints.
+        """
+        self.path = path
+        self.interval = interval
+
+    def exists(self):
+        return os.path.isfile(self.path)
+
+    def save(self, state):
+        """
+        Write a checkpoint.
+
+        Args:
+            state (object): Picklable search state (must not reference the problem).
+        """
+        checkpoint = {
+            "state": state,
+            "random": random.getstate(),
+            "np_random": np.random.get_state()
+        }
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """
+        Read the last checkpoint and restore the random generator states.
+
+        Returns:
+            object: The saved search state.
+        """
+        with open(self.path, 'rb') as f:
+            checkpoint = pickle.load(f)
+
+        random.setstate(checkpoint["random"])
+        np.random.set_state(checkpoint["np_random"])
+
+        return checkpoint["state"]
+
+    def save_algorithm(self, algorithm):
+        """
+        Checkpoint a pymoo algorithm, temporarily detaching its problem.
+        """
+        problem = algorithm.problem
+        algorithm.problem = None
+        try:
+            self.save(algorithm)
+        finally:
+            algorithm.problem = problem
+
+    def load_algorithm(self, problem):
+        """
+        Restore a pymoo algorithm from the last checkpoint and attach the problem to it.
+        """
+        algorithm = self.load()
+        algorithm.problem = problem
+
+        return algorithm
+
+    def minimize(self, problem, algorithm, termination, resume=False, rng=None, **kwargs):
+        """
+        Drop-in replacement of pymoo.optimize.minimize that checkpoints the algorithm
+        every interval generations and can continue from the last checkpoint.
+
+        Args:
+            problem (Problem): The optimization problem.
+            algorithm (Algorithm): The (not yet set up) pymoo algorithm.
+            termination (Termination): Termination criterion.
+            resume (bool): Continue from the last checkpoint if one exists.
+            rng (IsolatedRandom): Random generator states of this search if several run concurrently;
+                                  the evaluations of a generation then run outside of it.
+            **kwargs: Arguments of Algorithm.setup (seed, verbose, ...).
+
+        Returns:
+            Result: The optimization result.
+        """
+        if rng is None:
+            rng = contextlib.nullcontext()
+
+        with rng:
+            if resume and self.exists():
+                algorithm = self.load_algorithm(problem)
+                print("Resuming from checkpoint " + self.path + " at generation " + str(algorithm.n_gen) + " (" + str(algorithm.evaluator.n_eval) + " evaluations)")
+            else:
+                algorithm.setup(problem, termination=termination, **kwargs)
+
+        # Algorithm.next(), with the evaluation of the infills outside of the random generator context
+        while algorithm.has_next():
+            with rng:
+                infills = algorithm.infill()
+
+            if infills is not None:
+                algorithm.evaluator.eval(problem, infills, algorithm=algorithm)
+
+            with rng:
+                algorithm.advance(infills=infills)
+
+                if algorithm.n_gen % self.interval == 0:
+                    self.save_algorithm(algorithm)
+
+        res = algorithm.result()
+        res.algorithm = algorithm
+
+        return res
@@ -0,0 +1,113 @@
+import numpy as np
+
+from modules.surrogate import directive_features
+
+class CostModel():
+    """
+    Predictor of the Vitis HLS synthesis time of directive vectors, used to dispatch
+    the syntheses of a batch longest-expected-job-first (LPT).
+
+    A vector is described by the totals of the directive features of its action
+    points (pipelines, log2 unroll factors, full unrolls, complete partitions, log2
+    partition factors, cyclic partitions). A ridge regression of the log synthesis
+    time on these totals is fitted to the synth_time column of the result database;
+    until enough samples exist, the sum of the unroll and partition features is used
+    as a heuristic cost (only the order of the predictions matters).
+    """
+
+    def __init__(self, directives, db=None, min_samples=10, ridge=1.0):
+        """
+        Args:
+            directives (list): List of directive options per action point.
+            db (DB): Result database whose synthesis times train the model.
+            min_samples (int): Minimum number of samples before the regression is used.
+            ridge (float): L2 regularization of the regression weights.
+        """
+        self.db = db
+        self.min_samples = min_samples
+        self.ridge = ridge
+
+        # Feature table [action point][directive index] -> features
+        self.table = [np.array([directive_features(d) for d in options]).reshape(len(options), -1) for options in directives]
+
+        self.weights = None
+        self.n_fitted = 0
+
+    def encode(self, X):
+        """
+        Build the feature matrix (bias followed by the feature totals) of a set of directive vectors.
+        """
+        X = np.atleast_2d(X).astype(int)
+        totals = np.zeros((len(X), 6))
+        for i, table in enumerate(self.table):
+            totals += table[X[:, i]]
+
+        return np.hstack([np.ones((len(X), 1)), totals])
+
+    def fit(self, X, T):
+        """
+        Train the model.
+
+        Args:
+            X (array): Directive vectors (n x n_var).
+            T (array): Synthesis times in seconds (n).
+
+        Returns:
+            bool: Whether enough samples were available to train the model.
+        """
+        if len(X) < self.min_samples:
+            return False
+
+        E = self.encode(X)
+        y = np.log1p(np.asarray(T, dtype=float))
+
+        # Ridge regression (the bias is not regularized)
+        penalty = self.ridge * np.eye(E.shape[1])
+        penalty[0, 0] = 0.0
+        self.weights = np.linalg.solve(E.T @ E + penalty, E.T @ y)
+        self.n_fitted = len(X)
+
+        return True
+
+    def update(self):
+        """
+        Retrain on the result database if it gained samples since the last fit.
+        """
+        if self.db is None or len(self.db.index) == self.n_fitted:
+            return
+
+        (X, Y) = self.db.get_all()
+        if not self.fit(X, Y[:, 6]):
+            self.n_fitted = len(X)
+
+    def predict(self, X):
+        """
+        Predict the synthesis times of a set of directive vectors.
+
+        Returns:
+            array: Predicted synthesis times in seconds, or heuristic costs before training (n).
+        """
+        E = self.encode(X)
+
+        if self.weights is None:
+            # Unroll and partition features, without the pipeline count and the bias
+            return E[:, 2:].sum(axis=1)
+
+        return np.expm1(E @ self.weights)
+
+    def order(self, X):
+        """
+        Dispatch order of a batch: longest predicted synthesis first.
+
+        Args:
+            X (array): Directive vectors of the batch.
+
+        Returns:
+            list: Indices into X, longest predicted first (stable for ties).
+        """
+        if len(X) == 0:
+            return []
+
+        self.update()
+
+        return [int(i) for i in np.argsort(-self.predict(X), kind="stable")]
@@ -1,26 +1,204 @@
+import os
 import json
-from sqlitedict import SqliteDict
+import time
+import hashlib
+import sqlite3
+import numpy as np
+from threading import Condition, Lock, Thread
+
+# Version of the results database schema (2: failure category of the failed syntheses,
+# 3: commit sequence number of every row)
+SCHEMA_VERSION = 3
+
+# Metric columns of the results table (in the order of the value lists)
+METRIC_COLUMNS = ["latency", "util_bram", "util_dsp", "util_ff", "util_lut", "util_uram", "synth_time"]
+
+def file_hash(path):
+    """
+    Compute the SHA-256 hash of a file (e.g. the kernel source a database was created from).
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        str: Hexadecimal digest.
+    """
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+class KeyCodec():
+    """
+    Mixed-radix encoding of directive index vectors into compact integer keys.
+
+    The first variable is the most significant digit, so the integer order of the
+    keys is the lexicographic order of the vectors and a fixed prefix of the vector
+    is a contiguous key range. Keys are stored as SQLite INTEGERs when the design
+    space fits into 63 bits and as fixed-width big-endian BLOBs otherwise (both
+    compare in the same order).
+    """
+
+    def __init__(self, radices):
+        """
+        Args:
+            radices (list): Number of options of each variable (xu + 1).
+        """
+        self.radices = [int(r) for r in radices]
+
+        size = 1
+        for r in self.radices:
+            size *= r
+        self.size = size
+
+        self.fits = size <= 2**63
+        self.width = max(1, ((size - 1).bit_length() + 7) // 8)
+        self.sql_type = "INTEGER" if self.fits else "BLOB"
+
+    def encode(self, x):
+        """
+        Encode a directive index vector.
+
+        Raises:
+            ValueError: If the vector does not belong to the design space.
+        """
+        if len(x) != len(self.radices):
+            raise ValueError("Vector of length %d does not match the %d design variables" % (len(x), len(self.radices)))
+
+        n = 0
+        for v, r in zip(x, self.radices):
+            v = int(v)
+            if v < 0 or v >= r:
+                raise ValueError("Directive index %d out of range [0, %d)" % (v, r))
+            n = n * r + v
+
+        return n if self.fits else n.to_bytes(self.width, 'big')
+
+    def decode(self, key):
+        """
+        Decode a key into its directive index vector.
+        """
+        n = key if self.fits else int.from_bytes(key, 'big')
+
+        x = [0] * len(self.radices)
+        for i in range(len(self.radices) - 1, -1, -1):
+            (n, x[i]) = divmod(n, self.radices[i])
+
+        return x
+
+    def decode_many(self, keys):
+        """
+        Decode several keys at once.
+
+        Returns:
+            array: Directive index vectors (n x n_var).
+        """
+        if not self.fits or len(keys) == 0:
+            return np.array([self.decode(key) for key in keys], dtype=int).reshape(-1, len(self.radices))
+
+        n = np.array(keys, dtype=np.int64)
+        X = np.zeros((len(keys), len(self.radices)), dtype=int)
+        for i in range(len(self.radices) - 1, -1, -1):
+            X[:, i] = n % self.radices[i]
+            n = n // self.radices[i]
+
+        return X
 
 class DB():
     """
-    A wrapper class around SqliteDict to manage and analyze High-Level Synthesis (HLS) results.
+    A results database to manage and analyze High-Level Synthesis (HLS) results.
     Stores synthesis metrics such as latency, resource utilization, and synthesis time.
+
+    Schema (SQLite, versioned):
+        meta(name, value)       schema version, key radices, device, clock, top-level
+                                function, source hash and directive table
+        results(key, latency, util_bram, util_dsp, util_ff, util_lut, util_uram, synth_time, fidelity, failure, seq)
+
+    Failed syntheses have the metrics [0, 101, 101, 101, 101, 101] and the failure category
+    of modules.failures (NULL for successful ones). seq increases with every written row (rows
+    of older versions have 0), so a reader can fetch only the rows written since it last
+    looked. Older databases are upgraded in place unless they are opened read-only.
+    Results are keyed by the mixed-radix encoding of the directive vector (KeyCodec)
+    and every metric is a typed column. All entries are loaded into an in-memory index
+    when the database is opened, so lookups never touch SQLite. Inserts update the
+    index immediately and are written by a background thread that batches them into
+    one commit (WAL journal). A write reaches the disk at the latest max_delay seconds
+    after the insert, or as soon as batch_size inserts are pending.
+
+    Consumers that only read a database (training, seeding, pruning evidence, replays)
+    open it read-only: the file is neither created, switched to WAL nor upgraded, and
+    no writer thread is started.
     """
 
-    def __init__(self, db_path):
+    def __init__(self, db_path, radices=None, metadata=None, batch_size=64, max_delay=5.0, read_only=False):
         """
         Initialize the database interface.
 
         Args:
             db_path (str): Path to the SQLite database file.
+            radices (list): Number of options of each design variable (xu + 1). Required to
+                            create a database, checked against the stored ones otherwise.
+            metadata (dict): Run metadata (device_id, clock_period, top_level_function, source_hash,
+                             directives) recorded when the database is created.
+            batch_size (int): Number of pending inserts that triggers a commit.
+            max_delay (float): Maximum time in seconds an insert stays uncommitted (durability bound).
+            read_only (bool): Open an existing database without modifying it (insert() is not allowed).
         """
         self.db_path = db_path
+        self.read_only = read_only
 
-        parts = db_path.split('/')
-        size = len(parts)
-        self.db_name = parts[size - 1].split('.')[0]
-        
-        self.db = SqliteDict(db_path)
+        # Only the extension is cut off (clock periods like 3.33 are part of the name)
+        self.db_name = os.path.splitext(os.path.basename(db_path))[0]
+
+        if read_only:
+            if not os.path.isfile(db_path):
+                raise ValueError("%s does not exist" % db_path)
+            self.conn = sqlite3.connect("file:" + os.path.abspath(db_path) + "?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn_lock = Lock()
+        if not read_only:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+
+        tables = set(row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type='table'"))
+        if "meta" not in tables:
+            if "unnamed" in tables:
+                self.conn.close()
+                raise ValueError("%s is a legacy SqliteDict database, convert it with tools/migrate_db.py" % db_path)
+            if read_only:
+                self.conn.close()
+                raise ValueError("%s is not a results database" % db_path)
+            if radices is None:
+                self.conn.close()
+                raise ValueError("%s does not exist, the key radices are needed to create it" % db_path)
+            self._create(radices, metadata if metadata is not None else {})
+
+        self.meta = dict(self.conn.execute("SELECT name, value FROM meta"))
+        if int(self.meta["schema_version"]) > SCHEMA_VERSION:
+            raise ValueError("%s has schema version %s, this version supports up to %d" % (db_path, self.meta["schema_version"], SCHEMA_VERSION))
+        if int(self.meta["schema_version"]) < SCHEMA_VERSION and not read_only:
+            self._upgrade()
+
+        self.codec = KeyCodec(json.loads(self.meta["radices"]))
+        if radices is not None and [int(r) for r in radices] != self.codec.radices:
+            raise ValueError("%s was created for a different design space (radices %s)" % (db_path, self.meta["radices"]))
+
+        if metadata is not None and "source_hash" in metadata and self.meta.get("source_hash") not in (None, "", metadata["source_hash"]):
+            print("WARNING: %s was created from a different kernel source, its results may be stale" % db_path)
+
+        # In-memory index of all entries (one bulk read): key -> (metrics..., fidelity)
+        # and failure categories of the failed entries: key -> category
+        self.index = {}
+        self.failures = {}
+        failure_column = "failure" if int(self.meta["schema_version"]) >= 2 else "NULL"
+        for row in self.conn.execute("SELECT key, " + ", ".join(METRIC_COLUMNS) + ", fidelity, " + failure_column + " FROM results"):
+            self.index[row[0]] = row[1:9]
+            if row[9] is not None:
+                self.failures[row[0]] = row[9]
+
+        # Sequence number of the last written row
+        self.seq = 0
+        if not read_only:
+            self.seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM results").fetchone()[0]
 
         # Synthesis statistics counters
         self.synth_total = 0
@@ -30,6 +208,83 @@ class DB():
         self.synth_success_no_feasible = 0
         self.synth_success_feasible = 0
         self.synth_latency_undef = 0
+        self.synth_fidelity_export = 0
+        self.synth_failure_categories = {}
+
+        # Write-behind queue
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.cond = Condition()
+        self.pending = {}
+        self.pending_since = None
+        self.closing = False
+        self.writer = None
+        if not read_only:
+            self.writer = Thread(target=self._write_behind, daemon=True)
+            self.writer.start()
+
+    def _create(self, radices, metadata):
+        """
+        Create the schema of a new database.
+        """
+        codec = KeyCodec(radices)
+
+        meta = {
+            "schema_version": str(SCHEMA_VERSION),
+            "radices": json.dumps(codec.radices),
+            "device_id": metadata.get("device_id", ""),
+            "clock_period": metadata.get("clock_period", ""),
+            "top_level_function": metadata.get("top_level_function", ""),
+            "source_hash": metadata.get("source_hash", ""),
+            "directives": json.dumps(metadata.get("directives", []))
+        }
+
+        with self.conn:
+            self.conn.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT)")
+            self.conn.executemany("INSERT INTO meta VALUES (?, ?)", list(meta.items()))
+            self.conn.execute(
+                "CREATE TABLE results (key " + codec.sql_type + " PRIMARY KEY, "
+                "latency REAL, util_bram INTEGER, util_dsp INTEGER, util_ff INTEGER, util_lut INTEGER, util_uram INTEGER, "
+                "synth_time INTEGER, fidelity INTEGER, failure TEXT, seq INTEGER NOT NULL DEFAULT 0)"
+            )
+            self.conn.execute("CREATE INDEX results_seq ON results (seq)")
+
+    def _upgrade(self):
+        """
+        Add the failure column to a version 1 database (its failures stay uncategorized) and
+        the sequence column to a version 1 or 2 database (its rows get 0).
+        """
+        version = int(self.meta["schema_version"])
+        with self.conn:
+            if version < 2:
+                self.conn.execute("ALTER TABLE results ADD COLUMN failure TEXT")
+            if version < 3:
+                self.conn.execute("ALTER TABLE results ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+                self.conn.execute("CREATE INDEX results_seq ON results (seq)")
+            self.conn.execute("UPDATE meta SET value = ? WHERE name = 'schema_version'", (str(SCHEMA_VERSION),))
+        self.meta["schema_version"] = str(SCHEMA_VERSION)
+
+    def metadata(self):
+        """
+        Returns:
+            dict: The run metadata (device_id, clock_period, top_level_function, source_hash, directives).
+        """
+        meta = dict(self.meta)
+        meta["radices"] = json.loads(meta["radices"])
+        meta["directives"] = json.loads(meta["directives"])
+        return meta
+
+    def contains(self, x):
+        """
+        Check whether synthesis results exist for a specific key.
+
+        Args:
+            x: Key used in the database.
+
+        Returns:
+            bool: True if the key is in the database.
+        """
+        return self.codec.encode(x) in self.index
 
     def get(self, x):
         """
@@ -40,12 +295,30 @@ class DB():
 
         Returns:
             list: [latency, bram, dsp, ff, lut, uram, synth_time]
+
+        Raises:
+            KeyError: If the key is not in the database.
         """
-        key = str(x)
-        temp = self.db[key]
-        val = [temp["latency"], temp["util_bram"], temp["util_dsp"], temp["util_ff"], temp["util_lut"], temp["util_uram"], temp["synth_time"]]
+        temp = self.index[self.codec.encode(x)]
+        val = list(temp[0:7])
         return val
 
+    def get_many(self, X):
+        """
+        Retrieve synthesis results for several keys.
+
+        Args:
+            X: Keys used in the database.
+
+        Returns:
+            list: [latency, bram, dsp, ff, lut, uram, synth_time] of each key, None for the missing ones.
+        """
+        out = []
+        for x in X:
+            temp = self.index.get(self.codec.encode(x))
+            out.append(list(temp[0:7]) if temp is not None else None)
+        return out
+
     def get_synth_time(self, x):
         """
         Get only the synthesis time for a specific key.
@@ -56,29 +329,131 @@ class DB():
         Returns:
             float: Synthesis time in seconds.
         """
-        key = str(x)
-        temp = self.db[key]
-        val = temp["synth_time"]
+        temp = self.index[self.codec.encode(x)]
+        val = temp[6]
+        return val
+
+    def get_all(self):
+        """
+        Load all entries of the database.
+
+        Returns:
+            tuple: (X, Y) - the directive index vectors (n x n_var) and the metrics
+                   [latency, bram, dsp, ff, lut, uram, synth_time] of each entry (n x 7).
+        """
+        items = list(self.index.items())
+
+        X = self.codec.decode_many([key for key, _ in items])
+        Y = np.array([item[0:7] for _, item in items], dtype=float).reshape(-1, 7)
+
+        return (X, Y)
+
+    def get_fidelity(self, x):
+        """
+        Get the fidelity level a specific key was evaluated at.
+
+        Args:
+            x: Key used in the database.
+
+        Returns:
+            int: 0 for C synthesis only, 1 for C synthesis and IP export.
+        """
+        temp = self.index[self.codec.encode(x)]
+        val = temp[7]
         return val
 
-    def insert(self, x, val):
+    def get_failure(self, x):
+        """
+        Get the failure category of a specific key.
+
+        Args:
+            x: Key used in the database.
+
+        Returns:
+            str: Category of a failed synthesis (modules.failures), None for a successful or uncategorized one.
+        """
+        return self.failures.get(self.codec.encode(x))
+
+    def insert(self, x, val, fidelity=1, failure=None):
         """
         Insert synthesis results into the database.
 
         Args:
             x: Key for the entry.
             val (list): Values [latency, bram, dsp, ff, lut, uram, synth_time].
+            fidelity (int): Fidelity level of the evaluation (0: C synthesis only, 1: C synthesis and IP export).
+            failure (str): Failure category of a failed synthesis (None if it succeeded).
         """
-        key = str(x)
-        self.db[key] = {"latency": val[0], "util_bram": val[1], "util_dsp": val[2], "util_ff": val[3], "util_lut": val[4], "util_uram": val[5], "synth_time": val[6]}
-        self.db.commit()
+        if self.read_only:
+            raise ValueError("%s is opened read-only" % self.db_path)
+
+        key = self.codec.encode(x)
+        item = (float(val[0]), int(val[1]), int(val[2]), int(val[3]), int(val[4]), int(val[5]), int(val[6]), int(fidelity))
+
+        with self.cond:
+            self.index[key] = item
+            if failure is not None:
+                self.failures[key] = failure
+            else:
+                self.failures.pop(key, None)
+            self.pending[key] = item + (failure,)
+            if self.pending_since is None:
+                self.pending_since = time.monotonic()
+            self.cond.notify()
+
+    def flush(self):
+        """
+        Commit all pending inserts now.
+        """
+        # The batch is taken under the connection lock, so batches commit in the order of their sequence numbers
+        with self.conn_lock:
+            with self.cond:
+                batch = self.pending
+                self.pending = {}
+                self.pending_since = None
+
+            if len(batch) > 0:
+                rows = []
+                for key, item in batch.items():
+                    self.seq += 1
+                    rows.append((key,) + item + (self.seq,))
+
+                with self.conn:
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO results (key, " + ", ".join(METRIC_COLUMNS) + ", fidelity, failure, seq) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+
+    def _write_behind(self):
+        """
+        Background writer: commit the pending inserts in batches.
+        """
+        while True:
+            with self.cond:
+                while not self.closing:
+                    if len(self.pending) >= self.batch_size:
+                        break
+                    if self.pending_since is not None:
+                        remaining = self.pending_since + self.max_delay - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self.cond.wait(remaining)
+                    else:
+                        self.cond.wait()
+
+                closing = self.closing
+
+            self.flush()
+
+            if closing:
+                return
 
     def print(self):
         """
         Print all entries in the database.
         """
-        for key, item in self.db.items():
-            print("%s = %s" % (key, item))
+        for key, item in self.index.items():
+            print("%s = %s" % (self.codec.decode(key), dict(zip(METRIC_COLUMNS + ["fidelity"], item))))
 
     def analyze(self, timeout):
         """
@@ -87,16 +462,13 @@ class DB():
         Args:
             timeout (int): Timeout threshold in seconds for synthesis.
         """
-        for key, item in self.db.items():
-            latency    = item["latency"]
-            util_bram  = item["util_bram"]
-            util_dsp   = item["util_dsp"]
-            util_ff    = item["util_ff"]
-            util_lut   = item["util_lut"]
-            util_uram  = item["util_uram"]
-            synth_time = item["synth_time"]
+        for key, item in self.index.items():
+            (latency, util_bram, util_dsp, util_ff, util_lut, util_uram, synth_time, fidelity) = item
 
             if (latency == 0 and util_bram == 101 and util_dsp == 101 and util_ff == 101 and util_lut == 101 and util_uram == 101):
+                category = self.failures.get(key, "uncategorized")
+                self.synth_failure_categories[category] = self.synth_failure_categories.get(category, 0) + 1
+
                 if (synth_time >= timeout):
                     self.synth_timeout += 1
                 else:
@@ -108,7 +480,10 @@ class DB():
 
             if (latency == 1000000):
                 self.synth_latency_undef += 1
-                        
+
+            if (fidelity >= 1):
+                self.synth_fidelity_export += 1
+
             self.synth_total += 1
 
         print("")
@@ -117,6 +492,7 @@ class DB():
         print("Database Path=%s" % self.db_path)
         print("")
         print("#synthesis total = %s" % self.synth_total)
+        print("#synthesis with IP export = %s" % self.synth_fidelity_export)
         print("")
 
         self.synth_success = self.synth_success_feasible + self.synth_success_no_feasible
@@ -127,6 +503,8 @@ class DB():
 
             print("Synthesis timeout percentage = %f (%s)" % (synth_timeout_perc, self.synth_timeout))
             print("Synthesis failed percentage  = %f (%s)" % (synth_failed_perc, self.synth_failed))
+            if len(self.synth_failure_categories) > 0:
+                print("- Failure categories: %s" % ", ".join("%s = %d" % item for item in sorted(self.synth_failure_categories.items())))
             print("Synthesis success total percentage = %f (%s)" % (synth_success_perc, self.synth_success))
         
         if self.synth_success != 0:
@@ -151,6 +529,8 @@ class DB():
         output_map["synth_success_no_feasible"] = self.synth_success_no_feasible
         output_map["synth_success_feasible"] = self.synth_success_feasible
         output_map["synth_latency_undef"] = self.synth_latency_undef
+        output_map["synth_fidelity_export"] = self.synth_fidelity_export
+        output_map["synth_failure_categories"] = self.synth_failure_categories
 
         ouput_file_name = self.db_name + '.json'
         with open(ouput_file_name, 'w') as f:
@@ -158,6 +538,12 @@ class DB():
 
     def close(self):
         """
-        Close the database.
+        Close the database after committing the pending inserts.
         """
-        self.db.close()
+        if self.writer is not None:
+            with self.cond:
+                self.closing = True
+                self.cond.notify()
+            self.writer.join()
+
+        self.conn.close()
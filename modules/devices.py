@@ -0,0 +1,49 @@
+# Available resources of the supported FPGA devices, keyed by the device family
+# prefix of the part name (e.g. "xczu7ev" for "xczu7ev-ffvc1156-2-e")
+DEVICE_RESOURCES = {
+    "xczu7ev": {"BRAM_18K": 624,  "DSP": 1728,  "FF": 460800,  "LUT": 230400,  "URAM": 96},
+    "xcu200":  {"BRAM_18K": 4320, "DSP": 6840,  "FF": 2364480, "LUT": 1182240, "URAM": 960},
+    "xcu250":  {"BRAM_18K": 5376, "DSP": 12288, "FF": 3456000, "LUT": 1728000, "URAM": 1280},
+    "xcu280":  {"BRAM_18K": 4032, "DSP": 9024,  "FF": 2607360, "LUT": 1303680, "URAM": 960}
+}
+
+# Order of the resources in the utilization columns of the results database
+RESOURCE_ORDER = ["BRAM_18K", "DSP", "FF", "LUT", "URAM"]
+
+def device_resources(device_id):
+    """
+    Look up the available resources of a device.
+
+    Args:
+        device_id (str): FPGA part/device identifier (e.g. "xczu7ev-ffvc1156-2-e").
+
+    Returns:
+        list: [BRAM_18K, DSP, FF, LUT, URAM] or None if the device is unknown.
+    """
+    family = device_id.split('-')[0].lower()
+    if family not in DEVICE_RESOURCES:
+        return None
+
+    return [DEVICE_RESOURCES[family][r] for r in RESOURCE_ORDER]
+
+def rescale_utilization(util, source_device_id, target_device_id):
+    """
+    Convert utilization percentages measured on one device to another device,
+    assuming the absolute resource usage of the design does not change.
+
+    Args:
+        util (array): Utilization percentages [bram, dsp, ff, lut, uram] (n x 5).
+        source_device_id (str): Device the utilization was measured on.
+        target_device_id (str): Device to convert to.
+
+    Returns:
+        array: Rescaled utilization percentages (unchanged if either device is unknown).
+    """
+    source = device_resources(source_device_id)
+    target = device_resources(target_device_id)
+    if source is None or target is None:
+        return util
+
+    scale = [(s / t) if t > 0 else 1.0 for s, t in zip(source, target)]
+
+    return util * scale
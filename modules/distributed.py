@@ -0,0 +1,509 @@
+import os
+import json
+import time
+import uuid
+import glob
+import socket
+
+from threading import Condition, Event, Thread, get_ident
+
+from modules.supervisor import ProcessSupervisor
+from modules.failures import FAILURE_LOST, FAILURE_UNKNOWN
+
+HEADER_EXTENSIONS = ('.h', '.hpp', '.hh')
+
+def _write_json(path, obj):
+    """
+    Atomically write a JSON file (write to a temporary file, then rename).
+    """
+    tmp_path = path + '.' + uuid.uuid4().hex + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(obj, f)
+    os.replace(tmp_path, path)
+
+def _read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+class FileBroker():
+    """
+    A job queue kept in a directory (local or on a shared file system such as NFS).
+
+    Layout:
+        campaign.json           kernel sources, directive table and synthesis options
+        pending/<job>.json      queued jobs
+        claimed/<job>@<worker>  jobs claimed by a worker (atomic rename from pending/)
+        done/<job>.json         results
+        cancel/<job>@<worker>   cancellations of re-queued jobs still running on a live worker
+        workers/<worker>.json   worker heartbeats
+    """
+
+    def __init__(self, root):
+        """
+        Args:
+            root (str): Broker directory.
+        """
+        self.root = root
+        self.campaign_path = os.path.join(root, 'campaign.json')
+        self.pending_dir = os.path.join(root, 'pending')
+        self.claimed_dir = os.path.join(root, 'claimed')
+        self.done_dir = os.path.join(root, 'done')
+        self.workers_dir = os.path.join(root, 'workers')
+        self.cancel_dir = os.path.join(root, 'cancel')
+
+        for d in (self.pending_dir, self.claimed_dir, self.done_dir, self.workers_dir, self.cancel_dir):
+            os.makedirs(d, exist_ok=True)
+
+    def push(self, job_id, job):
+        _write_json(os.path.join(self.pending_dir, job_id + '.json'), job)
+
+    def claim(self, worker_id):
+        """
+        Claim the oldest pending job.
+
+        Returns:
+            tuple: (job_id, job, claimed_path) or None if no job is pending.
+        """
+        paths = sorted(glob.glob(os.path.join(self.pending_dir, '*.json')), key=_mtime)
+        for path in paths:
+            job_id = os.path.basename(path)[:-len('.json')]
+            claimed_path = os.path.join(self.claimed_dir, job_id + '@' + worker_id)
+            try:
+                os.rename(path, claimed_path)
+            except OSError:
+                continue  # Claimed by another worker
+
+            try:
+                return (job_id, _read_json(claimed_path), claimed_path)
+            except (OSError, ValueError):
+                continue  # Requeued under our feet
+
+        return None
+
+    def complete(self, job_id, claimed_path, result):
+        _write_json(os.path.join(self.done_dir, job_id + '.json'), result)
+        try:
+            os.remove(claimed_path)
+        except OSError:
+            pass
+
+    def claimed(self):
+        """
+        Returns:
+            list: (job_id, worker_id, path) of every claimed job.
+        """
+        out = []
+        for path in glob.glob(os.path.join(self.claimed_dir, '*@*')):
+            (job_id, worker_id) = os.path.basename(path).split('@', 1)
+            out.append((job_id, worker_id, path))
+        return out
+
+    def requeue(self, job_id, claimed_path):
+        try:
+            os.rename(claimed_path, os.path.join(self.pending_dir, job_id + '.json'))
+            return True
+        except OSError:
+            return False
+
+    def cancel(self, job_id, worker_id):
+        """
+        Ask a worker to kill its run of a job (the job was re-queued while still running).
+        """
+        _write_json(os.path.join(self.cancel_dir, job_id + '@' + worker_id), {})
+
+    def cancellations(self, worker_id):
+        """
+        Returns:
+            list: (job_id, path) of every cancellation addressed to the worker.
+        """
+        out = []
+        for path in glob.glob(os.path.join(self.cancel_dir, '*@' + glob.escape(worker_id))):
+            out.append((os.path.basename(path).split('@', 1)[0], path))
+        return out
+
+    def heartbeat(self, worker_id, state):
+        _write_json(os.path.join(self.workers_dir, worker_id + '.json'), state)
+
+    def heartbeats(self):
+        """
+        Returns:
+            dict: worker_id -> last heartbeat state.
+        """
+        out = {}
+        for path in glob.glob(os.path.join(self.workers_dir, '*.json')):
+            try:
+                out[os.path.basename(path)[:-len('.json')]] = _read_json(path)
+            except (OSError, ValueError):
+                pass
+        return out
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
+
+class RemoteBackend():
+    """
+    Coordinator side of the distributed evaluation. Evaluator threads push directive
+    vectors to the broker and block until a worker returns the metrics. A monitor
+    thread collects results and re-queues the jobs of workers whose heartbeat stopped,
+    and the jobs claimed for longer than the timeout plus the heartbeat timeout (their
+    worker is alive but the job is stuck; the worker is told to kill it). Results
+    nobody waits for (late results of re-queued jobs, jobs of earlier campaigns) are
+    deleted. The coordinator keeps the single authoritative DB.
+    """
+
+    def __init__(self, root, input_source_path, src_extension, top_level_function, directives, device_id, clock_period, timeout, heartbeat_timeout=60, max_requeues=3, poll_interval=0.5, tcl_directives=False):
+        """
+        Args:
+            root (str): Broker directory shared with the workers.
+            input_source_path (str): Path to the kernel source (its directory's headers are shipped too).
+            src_extension (str): Source file extension.
+            top_level_function (str): Top-level function for synthesis.
+            directives (list): List of directive options per action point.
+            device_id (str): FPGA device identifier.
+            clock_period (str): Clock constraint for synthesis.
+            timeout (int): Maximum synthesis time per evaluation (in seconds), enforced by the workers.
+            heartbeat_timeout (float): Seconds without heartbeat after which a worker is considered lost.
+            max_requeues (int): Number of times a job is re-queued before it is reported as failed.
+            poll_interval (float): Interval in seconds at which the broker directory is scanned.
+            tcl_directives (bool): The workers pass the directives as set_directive_* Tcl commands.
+        """
+        self.broker = FileBroker(root)
+        self.timeout = timeout
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_requeues = max_requeues
+        self.poll_interval = poll_interval
+
+        self.campaign_id = uuid.uuid4().hex
+
+        source_dir = os.path.dirname(os.path.abspath(input_source_path))
+        files = {}
+        for name in os.listdir(source_dir):
+            if name.endswith(HEADER_EXTENSIONS):
+                with open(os.path.join(source_dir, name)) as f:
+                    files[name] = f.read()
+
+        with open(input_source_path) as f:
+            kernel = f.read()
+
+        _write_json(self.broker.campaign_path, {
+            "campaign_id": self.campaign_id,
+            "kernel": kernel,
+            "files": files,
+            "src_extension": src_extension,
+            "top_level_function": top_level_function,
+            "directives": directives,
+            "device_id": device_id,
+            "clock_period": clock_period,
+            "timeout": timeout,
+            "tcl_directives": tcl_directives
+        })
+
+        self.cond = Condition()
+        self.waiting = {}
+        self.results = {}
+        self.requeues = {}
+        self.beats = {}
+        # Claimed job -> coordinator time it was first seen claimed
+        self.claimed_since = {}
+
+        self.stopped = Event()
+        self.monitor = Thread(target=self._monitor, daemon=True)
+        self.monitor.start()
+
+    def synthesize(self, x, fidelity):
+        """
+        Run one synthesis on a remote worker.
+
+        Args:
+            x (list): A directive index vector.
+            fidelity (int): Requested evaluation fidelity.
+
+        Returns:
+            tuple: (metrics, fidelity, failure) as returned by HLSDirectiveOptimizationProblem._synthesize.
+        """
+        job_id = self.campaign_id[:8] + '-' + uuid.uuid4().hex
+
+        with self.cond:
+            self.waiting[job_id] = True
+
+        self.broker.push(job_id, {"campaign_id": self.campaign_id, "x": [int(v) for v in x], "fidelity": fidelity})
+
+        with self.cond:
+            while job_id not in self.results:
+                self.cond.wait()
+            result = self.results.pop(job_id)
+            del self.waiting[job_id]
+
+        # Workers of older versions do not classify their failures
+        failure = result.get("failure")
+        if failure is None and result["metrics"][0] == 0 and result["metrics"][1] == 101:
+            failure = FAILURE_UNKNOWN
+
+        return (result["metrics"], result["fidelity"], failure)
+
+    def close(self):
+        self.stopped.set()
+        self.monitor.join()
+
+    def _monitor(self):
+        while not self.stopped.wait(self.poll_interval):
+            self._collect()
+            self._requeue_lost()
+
+    def _collect(self):
+        for path in glob.glob(os.path.join(self.broker.done_dir, '*.json')):
+            job_id = os.path.basename(path)[:-len('.json')]
+            with self.cond:
+                orphan = job_id not in self.waiting
+            if orphan:
+                # Jobs are registered before they are pushed, so nobody will ever collect it
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                result = _read_json(path)
+                os.remove(path)
+            except (OSError, ValueError):
+                continue
+
+            self._deliver(job_id, result)
+
+    def _deliver(self, job_id, result):
+        with self.cond:
+            self.results[job_id] = result
+            self.cond.notify_all()
+
+    def _requeue_lost(self):
+        now = time.monotonic()
+
+        # A worker is alive as long as its heartbeat counter keeps changing
+        # (measured with the coordinator clock, so host clock skew does not matter)
+        for worker_id, state in self.broker.heartbeats().items():
+            beat = state.get("beat")
+            if worker_id not in self.beats or self.beats[worker_id][0] != beat:
+                self.beats[worker_id] = (beat, now)
+
+        claimed = self.broker.claimed()
+        claimed_ids = set(job_id for (job_id, worker_id, path) in claimed)
+        for job_id in list(self.claimed_since.keys()):
+            if job_id not in claimed_ids:
+                del self.claimed_since[job_id]
+
+        for (job_id, worker_id, path) in claimed:
+            with self.cond:
+                if job_id not in self.waiting:
+                    continue
+
+            if worker_id not in self.beats:
+                self.beats[worker_id] = (None, now)
+            since = self.claimed_since.setdefault(job_id, now)
+
+            # A job of a live worker is stuck once it ran longer than its timeout allows
+            stuck = now - since > self.timeout + self.heartbeat_timeout
+            if now - self.beats[worker_id][1] < self.heartbeat_timeout and not stuck:
+                continue
+            self.claimed_since.pop(job_id, None)
+
+            requeues = self.requeues.get(job_id, 0)
+            if requeues >= self.max_requeues:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                if stuck:
+                    self.broker.cancel(job_id, worker_id)
+                print("Job " + job_id + " lost too many times, reporting it as failed !")
+                self._deliver(job_id, {"metrics": [0, 101, 101, 101, 101, 101], "fidelity": 0, "failure": FAILURE_LOST})
+            elif self.broker.requeue(job_id, path):
+                self.requeues[job_id] = requeues + 1
+                if stuck:
+                    self.broker.cancel(job_id, worker_id)
+                    print("Job " + job_id + " stuck on worker " + worker_id + ", re-queued")
+                else:
+                    print("Worker " + worker_id + " lost, re-queued job " + job_id)
+
+class Worker():
+    """
+    Worker daemon side of the distributed evaluation. Runs n_slots synthesis jobs at a
+    time with the regular apply_directives / Tcl / Vitis HLS / report parsing flow of
+    HLSDirectiveOptimizationProblem and publishes a heartbeat. The processes of a job
+    the coordinator cancelled are killed and its result is dropped.
+    """
+
+    def __init__(self, root, work_dir, n_slots, worker_id=None, heartbeat_interval=5, poll_interval=1.0, scheduler=None, log_monitor=False, tmpfs=False):
+        """
+        Args:
+            root (str): Broker directory shared with the coordinator.
+            work_dir (str): Local directory where the synthesis projects are created.
+            n_slots (int): Number of concurrent synthesis jobs.
+            worker_id (str): Unique worker name (default: <hostname>-<pid>).
+            heartbeat_interval (float): Heartbeat period in seconds.
+            poll_interval (float): Interval in seconds at which idle slots look for jobs.
+            scheduler (AdmissionScheduler): Optional memory- and license-aware admission control of the syntheses.
+            log_monitor (bool): Abort syntheses early on fatal log errors, learned stalls or an infeasible C synthesis.
+            tmpfs (bool): Create the job directories on tmpfs (/dev/shm) instead of the work directory.
+        """
+        self.broker = FileBroker(root)
+        self.work_dir = os.path.abspath(work_dir)
+        self.n_slots = n_slots
+        self.worker_id = worker_id if worker_id is not None else socket.gethostname() + '-' + str(os.getpid())
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.log_monitor = log_monitor
+        self.tmpfs = tmpfs
+
+        self.supervisor = ProcessSupervisor(scheduler=scheduler)
+        self.cond = Condition()
+        self.problems = {}
+        # Jobs being run by the slots: dicts with job_id, thread, claim time and cancelled flag
+        self.running = []
+        self.beat = 0
+        self.busy = 0
+        self.done = 0
+
+        os.makedirs(self.work_dir, exist_ok=True)
+
+    def _problem(self, campaign_id):
+        """
+        Build (once per campaign) the problem object whose synthesis flow runs the jobs.
+        """
+        # Imported here so that the broker/coordinator side does not depend on pymoo
+        from modules.hlsDirectiveOptimizationProblem import HLSDirectiveOptimizationProblem
+        from modules.logMonitor import AdaptiveTimeout
+        from modules.workspace import WorkspaceManager
+
+        with self.cond:
+            if campaign_id in self.problems:
+                return self.problems[campaign_id]
+
+            campaign = _read_json(self.broker.campaign_path)
+            if campaign["campaign_id"] != campaign_id:
+                return None
+
+            # The headers are included from the directory of the kernel
+            campaign_dir = os.path.join(self.work_dir, 'campaign_' + campaign_id)
+            os.makedirs(campaign_dir, exist_ok=True)
+
+            for name, text in campaign["files"].items():
+                with open(os.path.join(campaign_dir, name), 'w') as f:
+                    f.write(text)
+
+            kernel_path = os.path.join(campaign_dir, 'kernel' + campaign["src_extension"])
+            with open(kernel_path, 'w') as f:
+                f.write(campaign["kernel"])
+
+            directives = campaign["directives"]
+            n_var = len(directives)
+            problem = HLSDirectiveOptimizationProblem(
+                kernel_path,
+                campaign["src_extension"],
+                n_var,
+                [0] * n_var,
+                [len(d) - 1 for d in directives],
+                campaign["top_level_function"],
+                directives,
+                None,
+                campaign["device_id"],
+                campaign["clock_period"],
+                campaign["timeout"],
+                supervisor=self.supervisor,
+                # The worker has no DB: only the stall limit is learned, the timeout is the coordinator's
+                timeout_policy=AdaptiveTimeout(None, campaign["timeout"]) if self.log_monitor else None,
+                log_monitor=self.log_monitor,
+                workspace=WorkspaceManager(campaign_dir, self.tmpfs),
+                tcl_directives=campaign.get("tcl_directives", False)
+            )
+
+            self.problems[campaign_id] = problem
+            return problem
+
+    def _slot(self):
+        while True:
+            claimed = self.broker.claim(self.worker_id)
+            if claimed is None:
+                time.sleep(self.poll_interval)
+                continue
+
+            (job_id, job, claimed_path) = claimed
+            try:
+                problem = self._problem(job["campaign_id"])
+            except Exception as e:
+                print("Job " + job_id + " failed: " + repr(e))
+                self.broker.complete(job_id, claimed_path, {"metrics": [0, 101, 101, 101, 101, 101], "fidelity": job["fidelity"], "failure": FAILURE_UNKNOWN, "worker": self.worker_id})
+                continue
+            if problem is None:
+                # Job of a finished campaign
+                self.broker.complete(job_id, claimed_path, {"metrics": [0, 101, 101, 101, 101, 101], "fidelity": 0})
+                continue
+
+            run = {"job_id": job_id, "thread": get_ident(), "claimed": time.monotonic(), "cancelled": False}
+            with self.cond:
+                self.busy += 1
+                self.running.append(run)
+
+            try:
+                (metrics, fidelity, failure) = problem._synthesize(job["x"], job["fidelity"])
+            except Exception as e:
+                # The job is reported as failed and the slot keeps serving
+                print("Job " + job_id + " failed: " + repr(e))
+                (metrics, fidelity, failure) = ([0, 101, 101, 101, 101, 101], job["fidelity"], FAILURE_UNKNOWN)
+            finally:
+                with self.cond:
+                    self.busy -= 1
+                    self.running.remove(run)
+
+            if run["cancelled"]:
+                # The job was re-queued, its result is not waited for
+                print("Job " + job_id + " cancelled")
+                continue
+
+            self.broker.complete(job_id, claimed_path, {"metrics": metrics, "fidelity": fidelity, "failure": failure, "worker": self.worker_id})
+
+            with self.cond:
+                self.done += 1
+
+    def _cancel(self):
+        """
+        Kill the processes of the jobs cancelled by the coordinator.
+        """
+        for (job_id, path) in self.broker.cancellations(self.worker_id):
+            with self.cond:
+                # A re-queued job can be claimed again by this worker: the oldest run is the stuck one
+                runs = [run for run in self.running if run["job_id"] == job_id and not run["cancelled"]]
+                if len(runs) > 0:
+                    min(runs, key=lambda run: run["claimed"])["cancelled"] = True
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        # A cancelled job may still be waiting for admission or preparing its directory
+        with self.cond:
+            threads = [run["thread"] for run in self.running if run["cancelled"]]
+        for thread in threads:
+            self.supervisor.kill_thread(thread)
+
+    def run(self):
+        """
+        Serve jobs forever.
+        """
+        # Relative paths of the synthesis flow are resolved in the work directory
+        os.chdir(self.work_dir)
+
+        for _ in range(self.n_slots):
+            Thread(target=self._slot, daemon=True).start()
+
+        print("Worker " + self.worker_id + " serving " + self.broker.root + " with " + str(self.n_slots) + " slots")
+
+        while True:
+            with self.cond:
+                self.beat += 1
+                state = {"beat": self.beat, "host": socket.gethostname(), "pid": os.getpid(), "slots": self.n_slots, "busy": self.busy, "done": self.done}
+            self.broker.heartbeat(self.worker_id, state)
+            self._cancel()
+            time.sleep(self.heartbeat_interval)
@@ -0,0 +1,154 @@
+import os
+import re
+import glob
+import random
+import signal
+
+# Failure categories of a synthesis (stored in the results DB, NULL for a successful synthesis)
+FAILURE_LICENSE = "license"
+FAILURE_JVM_CRASH = "jvm_crash"
+FAILURE_TOOL_CRASH = "tool_crash"
+FAILURE_DISK_FULL = "disk_full"
+FAILURE_OUT_OF_MEMORY = "out_of_memory"
+FAILURE_DESIGN = "design_error"
+FAILURE_TIMEOUT = "timeout"
+FAILURE_LOST = "lost"
+FAILURE_UNKNOWN = "unknown"
+
+# Infrastructure failures: the same synthesis can succeed when it is run again
+TRANSIENT_FAILURES = {FAILURE_LICENSE, FAILURE_JVM_CRASH, FAILURE_TOOL_CRASH, FAILURE_DISK_FULL, FAILURE_OUT_OF_MEMORY}
+
+# Log messages of the infrastructure failures, checked in this order before the design errors
+FAILURE_PATTERNS = [
+    (FAILURE_LICENSE, [
+        r"\[Common 17-345\]",
+        r"\[Common 17-301\]",
+        r"[Ff]ailed to (check ?out|get) a license",
+        r"[Ll]icense (checkout|check-out) failed",
+        r"[Nn]o (valid )?license",
+        r"FLEX(net|lm)"
+    ]),
+    (FAILURE_DISK_FULL, [
+        r"No space left on device",
+        r"Disk quota exceeded"
+    ]),
+    (FAILURE_OUT_OF_MEMORY, [
+        r"std::bad_alloc",
+        r"Out of memory",
+        r"java\.lang\.OutOfMemoryError",
+        r"Cannot allocate memory"
+    ]),
+    (FAILURE_JVM_CRASH, [
+        r"A fatal error has been detected by the Java Runtime Environment",
+        r"hs_err_pid\d+\.log"
+    ]),
+    (FAILURE_TOOL_CRASH, [
+        r"Abnormal program termination",
+        r"Segmentation fault",
+        r"Bus error",
+        r"core dumped"
+    ])
+]
+
+# Any other error of the tool is caused by the design (or its directives)
+DESIGN_ERROR_PATTERN = r"^ERROR: "
+
+# Bytes of the beginning and of the end of the log that are inspected
+LOG_HEAD = 64 * 1024
+LOG_TAIL = 1024 * 1024
+
+def _read_log(log_path):
+    """
+    Beginning (license checkout) and end (errors) of a possibly large log.
+    """
+    try:
+        with open(log_path, 'r', errors='replace') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(0)
+            if size <= LOG_HEAD + LOG_TAIL:
+                return f.read()
+            head = f.read(LOG_HEAD)
+            f.seek(size - LOG_TAIL)
+            return head + "\n" + f.read()
+    except OSError:
+        return ""
+
+def classify(log_path, job_dir=None, returncode=None, timed_out=False, abort_reason=None):
+    """
+    Category of a synthesis that produced no result.
+
+    Infrastructure failures are recognized from the log (license checkout, disk full,
+    out of memory, JVM and tool crashes), from the JVM crash files (hs_err_pid*.log)
+    left in the job directory and from a SIGKILL the supervisor did not send (the
+    kernel OOM killer). Otherwise a timeout or a stall is a timeout, and an ERROR
+    message or a non-zero exit is a design error.
+
+    Args:
+        log_path (str): Log file of the job.
+        job_dir (str): Directory the tool ran in (JVM crash files).
+        returncode (int): Exit code of the process (None if it was killed or unknown).
+        timed_out (bool): Whether the job was killed at its deadline.
+        abort_reason (str): Reason of the log monitor if it aborted the job.
+
+    Returns:
+        str: One of the FAILURE_* categories.
+    """
+    log = _read_log(log_path)
+
+    for category, patterns in FAILURE_PATTERNS:
+        for pattern in patterns:
+            if re.search(pattern, log):
+                return category
+
+    if job_dir is not None and len(glob.glob(os.path.join(job_dir, "hs_err_pid*.log"))) > 0:
+        return FAILURE_JVM_CRASH
+
+    if returncode == -signal.SIGKILL:
+        return FAILURE_OUT_OF_MEMORY
+
+    if timed_out or abort_reason == "stall":
+        return FAILURE_TIMEOUT
+
+    if re.search(DESIGN_ERROR_PATTERN, log, re.MULTILINE) or (returncode is not None and returncode != 0):
+        return FAILURE_DESIGN
+
+    return FAILURE_UNKNOWN
+
+class RetryPolicy():
+    """
+    Retries of the syntheses that failed for a transient (infrastructure) reason.
+
+    The n-th retry waits backoff * 2^n seconds (at most max_backoff, with random
+    jitter so that jobs failing together, e.g. on a license server outage, do not
+    retry together). Only when all retries failed too is the failure stored.
+    """
+
+    def __init__(self, retries=2, backoff=30.0, max_backoff=600.0):
+        """
+        Args:
+            retries (int): Maximum number of retries of a synthesis.
+            backoff (float): Delay in seconds before the first retry.
+            max_backoff (float): Maximum delay in seconds before a retry.
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def retry(self, failure, attempt):
+        """
+        Args:
+            failure (str): Failure category of the last attempt (None if it succeeded).
+            attempt (int): Number of retries done so far.
+
+        Returns:
+            bool: Whether the synthesis is run again.
+        """
+        return failure in TRANSIENT_FAILURES and attempt < self.retries
+
+    def delay(self, attempt):
+        """
+        Returns:
+            float: Seconds to wait before the retry following the given number of retries.
+        """
+        return min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
@@ -1,24 +1,51 @@
 import os
 import time
 import json
-import psutil
-import subprocess
+import itertools
 
 import numpy as np
 
-from pymoo.core.problem import ElementwiseProblem
+from pymoo.core.problem import Problem
 
-from threading import Lock
+from modules.supervisor import ProcessSupervisor
+from modules.logMonitor import LogMonitor
+from modules.workspace import WorkspaceManager
+from modules.kernelTemplate import KernelTemplate
+from modules.synthesisCache import content_key, headers_hash
+from modules.telemetry import Telemetry
+from modules.failures import classify, TRANSIENT_FAILURES
 
-class HLSDirectiveOptimizationProblem(ElementwiseProblem):
+# Evaluation fidelity levels: C synthesis only (cheap) and C synthesis followed
+# by IP catalog export (expensive, only needed for implementable candidates)
+FIDELITY_CSYNTH = 0
+FIDELITY_EXPORT = 1
+
+class _Retry():
+    """
+    Outcome of a job that failed for a transient reason: it gave its slot back and is
+    dispatched again once its backoff has elapsed.
+    """
+
+    def __init__(self, due):
+        """
+        Args:
+            due (float): Time (time.time()) from which the job is run again.
+        """
+        self.due = due
+
+class HLSDirectiveOptimizationProblem(Problem):
     """
     A PyMoo-compatible multi-objective optimization problem for exploring HLS directive configurations.
     
     This class evaluates combinations of HLS directives on a given source file using Vitis HLS, 
     extracting performance and resource utilization metrics for optimization.
+
+    Evaluation is batched: identical rows of an offspring matrix are evaluated once,
+    the unique rows are resolved against the DB in one pass and only the misses are
+    dispatched (through the runner) to the synthesis backend.
     """
     
-    def __init__(self, INPUT_SOURCE_PATH, src_extension, n_var, xl, xu, top_level_function, directives, db, device_id, clock_period, timeout, **kwargs):
+    def __init__(self, INPUT_SOURCE_PATH, src_extension, n_var, xl, xu, top_level_function, directives, db, device_id, clock_period, timeout, supervisor=None, session_pool=None, fidelity=FIDELITY_EXPORT, remote=None, runner=map, screen=None, work_dir="./", cost_model=None, timeout_policy=None, log_monitor=False, canonicalizer=None, pruner=None, workspace=None, tcl_directives=False, cache=None, telemetry=None, engine=None, retry_policy=None, **kwargs):
         """
         Initialize the optimization problem with design metadata and search bounds.
 
@@ -34,7 +61,34 @@ class HLSDirectiveOptimizationProblem(ElementwiseProblem):
             device_id (str): FPGA part/device identifier (e.g., "xcu250-figd2104-2L-e").
             clock_period (str): Desired clock period for HLS (e.g., "10").
             timeout (int): Maximum synthesis time per evaluation (in seconds).
-            **kwargs: Additional arguments for the ElementwiseProblem superclass.
+            supervisor (ProcessSupervisor): Supervisor shared by all evaluator threads (a private one is created if None).
+            session_pool (SessionPool): Optional pool of persistent Vitis HLS sessions. If None, every evaluation launches vitis_hls -f.
+            fidelity (int): Fidelity of the evaluations during the search (FIDELITY_CSYNTH or FIDELITY_EXPORT).
+            remote (RemoteBackend): Optional coordinator of remote worker daemons. If set, syntheses run on the workers.
+            runner (function): Map function used to run the syntheses of a batch in parallel (e.g. pool.map).
+            screen (SurrogateScreen): Optional surrogate pre-screening of the DB misses of a batch.
+            work_dir (str): Directory the job directories (kernel, script, log and synthesis project of
+                            every evaluation) are created in, if no workspace is given.
+            cost_model (CostModel): Optional synthesis time predictor; the syntheses of a batch are
+                                    then dispatched longest predicted first.
+            timeout_policy (AdaptiveTimeout): Optional timeout and stall limits learned from the DB
+                                              (timeout is then the upper bound).
+            log_monitor (bool): Watch the log of every running job and abort it early on fatal
+                                errors, stalls or an infeasible C synthesis estimate.
+            canonicalizer (Canonicalizer): Optional mapping of equivalent directive vectors to one
+                                           representative before the DB lookup.
+            pruner (SpacePruner): Optional pruned search space; n_var, xl and xu are then its bounds
+                                  and the design vectors are expanded to full directive vectors.
+            workspace (WorkspaceManager): Manager of the job directories (tmpfs, artifact retention).
+            tcl_directives (bool): Pass the directives as set_directive_* Tcl commands on the unmodified
+                                   source instead of inserting pragmas into the source.
+            cache (SynthesisCache): Optional content-addressed cache of syntheses shared across runs.
+            telemetry (Telemetry): Phase spans and live metrics of the evaluations (totals only if None).
+            engine (AsyncEngine): Optional asyncio launch pipeline the syntheses of a batch are run on
+                                  instead of the runner (can also be attached after construction).
+            retry_policy (RetryPolicy): Optional retries of the syntheses that failed for a transient
+                                        (infrastructure) reason; without it every failure is stored at once.
+            **kwargs: Additional arguments for the Problem superclass.
         """
         self.INPUT_SOURCE_PATH = INPUT_SOURCE_PATH
         self.SRC_EXTENSION = src_extension
@@ -47,8 +101,35 @@ class HLSDirectiveOptimizationProblem(ElementwiseProblem):
         self.CLOCK_PERIOD = clock_period
         self.TIMEOUT = timeout
 
-        self.i = 0
-        self.lock = Lock()
+        self.SUPERVISOR = supervisor if supervisor is not None else ProcessSupervisor()
+        self.SESSION_POOL = session_pool
+        self.FIDELITY = fidelity
+        self.REMOTE = remote
+        self.RUNNER = runner
+        self.SCREEN = screen
+        self.WORKSPACE = workspace if workspace is not None else WorkspaceManager(work_dir)
+        self.COST_MODEL = cost_model
+        self.TIMEOUT_POLICY = timeout_policy
+        self.LOG_MONITOR = log_monitor
+        self.CANONICALIZER = canonicalizer
+        self.PRUNER = pruner
+        self.TCL_DIRECTIVES = tcl_directives
+
+        # The labelled source is parsed once, variants are rendered from its segments
+        self.TEMPLATE = KernelTemplate(INPUT_SOURCE_PATH, len(directives))
+
+        self.CACHE = cache
+        self.HEADERS_HASH = headers_hash(INPUT_SOURCE_PATH) if cache is not None else ""
+
+        self.TELEMETRY = telemetry if telemetry is not None else Telemetry()
+        self.ENGINE = engine
+        self.RETRY_POLICY = retry_policy
+
+        # Stored transient failures that were synthesized again in this run
+        self.retried = set()
+
+        # Job numbers (next() on a count is atomic, no lock is needed)
+        self.job_ids = itertools.count(1)
        
         super().__init__(n_var=n_var, n_obj=6, n_constr=5, xl=xl, xu=xu, type_var=int, **kwargs)
 
@@ -81,27 +162,58 @@ class HLSDirectiveOptimizationProblem(ElementwiseProblem):
             OUTPUT_FILE_PATH (str): Path where the modified file will be saved.
             X (list): List of directive strings to apply.
         """
-        fr = open(INPUT_FILE_PATH, 'r')
-        fw = open(OUTPUT_FILE_PATH, 'w')
+        if INPUT_FILE_PATH == self.INPUT_SOURCE_PATH:
+            template = self.TEMPLATE
+        else:
+            template = KernelTemplate(INPUT_FILE_PATH, len(X))
+
+        with open(OUTPUT_FILE_PATH, 'w') as fw:
+            fw.write(template.render(X))
+
+    def _tcl_commands(self, project_name, top_level_function, source_code_path, device_id, clock_period, vitis_opts, fidelity=FIDELITY_EXPORT, include_dir=None, directive_commands=None):
+        """
+        Build the Tcl commands that synthesize one directive configuration in Vitis HLS.
+
+        Args:
+            project_name (str): Name of the synthesis project.
+            top_level_function (str): Top-level function to synthesize.
+            source_code_path (str): Path to the HLS source file.
+            device_id (str): FPGA device identifier.
+            clock_period (str): Clock constraint for synthesis.
+            vitis_opts (bool): Whether to include Vitis-specific config options.
+            fidelity (int): FIDELITY_CSYNTH stops after C synthesis, FIDELITY_EXPORT also exports the IP.
+            include_dir (str): Directory of the headers included by the source file.
+            directive_commands (list): set_directive_* commands applied before C synthesis.
+
+        Returns:
+            list: Tcl commands (without the final exit).
+        """
+        commands = []
+        commands.append("""open_project """ + project_name)
+        commands.append("""set_top """ + top_level_function)
+        if include_dir is not None:
+            commands.append("""add_files """ + source_code_path + """ -cflags {-I""" + include_dir + """}""")
+        else:
+            commands.append("""add_files """ + source_code_path)
+        commands.append("""open_solution "solution1" -flow_target vivado""")
+        commands.append("""set_part {""" + device_id + """}""")
+        commands.append("""create_clock -period """ + clock_period + """ -name default""")
+
+        if not(vitis_opts):
+            commands.append("""config_array_partition -complete_threshold 0 -throughput_driven off""")
+            commands.append("""config_compile -pipeline_loops 0""")
 
-        count = 1
-        for line in fr:
-            stripped_line = line.replace(' ', '').replace('\n', '').replace('\t', '')
+        if directive_commands is not None:
+            commands += directive_commands
 
-            pattern = 'L' + str(count)
-            if pattern in stripped_line:
-                fw.write(line)
-                added_directive = X[count - 1] + '\n'
-                fw.write(added_directive)
-                count += 1
-                continue
-        
-            fw.write(line)
-        
-        fw.close()
-        fr.close()
+        commands.append("""csynth_design""")
 
-    def _create_tcl(self, TCL_SCRIPT_PATH, project_name, top_level_function, source_code_path, device_id, clock_period, vitis_opts):
+        if fidelity >= FIDELITY_EXPORT:
+            commands.append("""export_design -format ip_catalog""")
+
+        return commands
+
+    def _create_tcl(self, TCL_SCRIPT_PATH, project_name, top_level_function, source_code_path, device_id, clock_period, vitis_opts, fidelity=FIDELITY_EXPORT, include_dir=None, directive_commands=None):
         """
         Generate a TCL script to run synthesis in Vitis HLS.
 
@@ -113,77 +225,241 @@ class HLSDirectiveOptimizationProblem(ElementwiseProblem):
             device_id (str): FPGA device identifier.
             clock_period (str): Clock constraint for synthesis.
             vitis_opts (bool): Whether to include Vitis-specific config options.
+            fidelity (int): FIDELITY_CSYNTH stops after C synthesis, FIDELITY_EXPORT also exports the IP.
+            include_dir (str): Directory of the headers included by the source file.
+            directive_commands (list): set_directive_* commands applied before C synthesis.
         """
+        commands = self._tcl_commands(project_name, top_level_function, source_code_path, device_id, clock_period, vitis_opts, fidelity, include_dir, directive_commands)
+
         with open(TCL_SCRIPT_PATH, "w") as outFile:
-            outFile.write("""open_project """ + project_name + '\n')
-            outFile.write("""set_top """ + top_level_function + '\n')
-            outFile.write("""add_files """ + source_code_path + '\n')
-            outFile.write("""open_solution "solution1" -flow_target vivado""" + '\n')
-            outFile.write("""set_part {""" + device_id + """}""" + '\n')
-            outFile.write("""create_clock -period """ + clock_period + """ -name default""" + '\n')
-
-            if not(vitis_opts):
-                outFile.write("""config_array_partition -complete_threshold 0 -throughput_driven off""" + '\n')
-                outFile.write("""config_compile -pipeline_loops 0""" + '\n')
-
-            outFile.write("""csynth_design""" + '\n')
-            outFile.write("""export_design -format ip_catalog""" + '\n')
+            for command in commands:
+                outFile.write(command + '\n')
             outFile.write("""exit""")
 
-    def _synthesize(self, x):
+    def _synthesize(self, x, fidelity, reports=None):
         """
         Run the HLS synthesis flow using the provided directive vector.
 
         Args:
             x (list): A directive index vector.
+            fidelity (int): Requested evaluation fidelity.
+            reports (dict): If given, filled with the report file name -> text of a successful synthesis.
 
         Returns:
-            list: A list of performance and resource metrics.
+            tuple: (metrics, fidelity, failure) - the list of performance and resource metrics, the
+                   fidelity actually reached (export is downgraded to csynth if no IP was produced)
+                   and the failure category of a synthesis without result (None if it succeeded).
         """
-        self.lock.acquire()
+        if self.REMOTE is not None:
+            with self.TELEMETRY.span("synthesis", remote=True):
+                return self.REMOTE.synthesize(x, fidelity)
 
-        self.i += 1
-        my_i = self.i
-        
-        OUTPUT_SOURCE_PATH = os.path.join("./", "kernel_" + str(my_i) + self.SRC_EXTENSION)
-        TCL_SCRIPT_PATH = os.path.join("./", "script_" + str(my_i) + ".tcl")
-        VITIS_LOG_PATH = os.path.join("./", "vitis_hls_" + str(my_i) + ".log")
+        my_i = next(self.job_ids)
+
+        with self.TELEMETRY.span("workspace", job=my_i):
+            JOB_DIR = self.WORKSPACE.create(my_i)
+
+        result = None
+        try:
+            result = self._run_job(x, fidelity, my_i, JOB_DIR, reports)
+        finally:
+            # Remove (or retain) the job directory on every exit path
+            (metrics, reached, failure) = result if result is not None else (None, fidelity, None)
+            failed = metrics is None or failure is not None
+            with self.TELEMETRY.span("cleanup", job=my_i):
+                self.WORKSPACE.release(JOB_DIR, x, None if failed else metrics, reached)
+
+        return result
+
+    def _run_job(self, x, fidelity, my_i, JOB_DIR, reports=None):
+        """
+        Synthesize a directive vector in its job directory.
+
+        Args:
+            x (list): A directive index vector.
+            fidelity (int): Requested evaluation fidelity.
+            my_i (int): Job number.
+            JOB_DIR (str): Job directory the files and the project are created in.
+            reports (dict): If given, filled with the report file name -> text.
+
+        Returns:
+            tuple: (metrics, fidelity, failure) as returned by _synthesize().
+        """
+        job = self._prepare_job(x, fidelity, my_i, JOB_DIR)
+        (timeout, monitor) = self._job_limits(job, fidelity)
+
+        if self.SESSION_POOL is not None:
+            # Sessions are shared by all jobs, so move to the job directory first
+            commands = ["""cd {""" + os.path.abspath(JOB_DIR) + """}"""]
+            commands += self._tcl_commands(job["project"], self.TOP_LEVEL_FUNCTION, job["source"], self.DEVICE_ID, self.CLOCK_PERIOD, False, fidelity, job["include_dir"], job["directive_commands"])
+            commands.append("""close_project""")
+
+            # A session reports no exit code of the job
+            returncode = None
+            with self.TELEMETRY.span("synthesis", job=my_i, session=True) as span:
+                start = time.monotonic()
+                finished = self.SESSION_POOL.run((self.DEVICE_ID, self.CLOCK_PERIOD), my_i, commands, job["log_path"], timeout, monitor, admission_key=self.TOP_LEVEL_FUNCTION + "@" + self.DEVICE_ID)
+                wall_time = time.monotonic() - start
+                span["finished"] = finished
+
+            abort_reason = monitor.reason if monitor is not None else None
+            if not finished and abort_reason is not None:
+                print("Aborted ! (job %d session aborted=%s wall=%.1fs: %s)" % (my_i, abort_reason, wall_time, monitor.message))
+            elif not finished:
+                print("Timeout or session crash ! (job %d wall=%.1fs)" % (my_i, wall_time))
+            else:
+                print("Finished ! (job %d session wall=%.1fs)" % (my_i, wall_time))
+
+            if monitor is not None:
+                monitor.finish()
+        else:
+            # Blocks until the admission scheduler (if any) lets the job start
+            with self.TELEMETRY.span("launch", job=my_i):
+                process = self.SUPERVISOR.launch(my_i, ['vitis_hls', '-f', job["script"], '-l', job["log"]], key=self.TOP_LEVEL_FUNCTION + "@" + self.DEVICE_ID, cwd=JOB_DIR)
+
+            with self.TELEMETRY.span("synthesis", job=my_i) as span:
+                stats = self.SUPERVISOR.wait(process, timeout, monitor=monitor)
+                span.update(cpu_time=stats.cpu_time, peak_rss=stats.peak_rss, paused_time=process.paused_time, returncode=stats.returncode, timed_out=stats.timed_out, abort_reason=stats.abort_reason)
+
+            finished = stats.finished()
+            abort_reason = stats.abort_reason
+            returncode = stats.returncode
+            if abort_reason is not None:
+                print("Aborted ! (" + str(stats) + ": " + monitor.message + ")")
+            elif not finished:
+                print("Timeout ! (" + str(stats) + ")")
+            else:
+                print("Finished ! (" + str(stats) + ")")
+
+            if monitor is not None:
+                monitor.finish(process.paused_time)
+
+        return self._job_result(job, fidelity, finished, abort_reason, monitor, reports, returncode)
+
+    def _prepare_job(self, x, fidelity, my_i, JOB_DIR):
+        """
+        Write the kernel variant and the Tcl script of a job into its directory.
+
+        Args:
+            x (list): A directive index vector.
+            fidelity (int): Requested evaluation fidelity.
+            my_i (int): Job number.
+            JOB_DIR (str): Job directory.
+
+        Returns:
+            dict: The job number and directory, the source, script, log and project names
+                  (relative to the job directory, as in the Tcl commands), the log and project
+                  paths, the include directory and the set_directive_* commands of the job.
+        """
+        job = {
+            "id": my_i,
+            "dir": JOB_DIR,
+            "source": "kernel_" + str(my_i) + self.SRC_EXTENSION,
+            "script": "script_" + str(my_i) + ".tcl",
+            "log": "vitis_hls_" + str(my_i) + ".log",
+            "project": "GENETIC_DSE_" + str(my_i),
+            # The kernel is synthesized away from its headers
+            "include_dir": os.path.dirname(os.path.abspath(self.INPUT_SOURCE_PATH)),
+            "directive_commands": None
+        }
+        job["log_path"] = os.path.join(JOB_DIR, job["log"])
+        job["project_path"] = os.path.join(JOB_DIR, job["project"])
 
         y = self.convert_indices_to_directives(self.DIRECTIVES, x)
-        self.apply_directives(self.INPUT_SOURCE_PATH, OUTPUT_SOURCE_PATH, y)
-        self._create_tcl(TCL_SCRIPT_PATH, "GENETIC_DSE_" + str(my_i), self.TOP_LEVEL_FUNCTION, OUTPUT_SOURCE_PATH, self.DEVICE_ID, self.CLOCK_PERIOD, False)
-        
-        p = subprocess.Popen(['vitis_hls', '-f', TCL_SCRIPT_PATH, '-l', VITIS_LOG_PATH])    
-
-        self.lock.release()
-
-        start_time = int(time.time())
-        finished = False
-        while (True):
-            total_time = int(time.time()) - start_time
-            if(total_time >= self.TIMEOUT or p.poll() != None):
-                if(p.poll() != None):
-                    finished = True
-                    print("Finished !")		
-                try:
-                    process = psutil.Process(p.pid)
-                    for proc in process.children(recursive=True):
-                        proc.kill()
-                    process.kill()
-                except:
-                    print("Either failed to terminate or already terminated !")
-                break
-
-        if(finished == False):
-            return [0, 101, 101, 101, 101, 101]
+        with self.TELEMETRY.span("render", job=my_i):
+            OUTPUT_SOURCE_PATH = os.path.join(JOB_DIR, job["source"])
+            if self.TCL_DIRECTIVES:
+                job["directive_commands"] = self.TEMPLATE.tcl_commands(y)
+                with open(OUTPUT_SOURCE_PATH, 'w') as f:
+                    f.write(self.TEMPLATE.source)
+            else:
+                self.apply_directives(self.INPUT_SOURCE_PATH, OUTPUT_SOURCE_PATH, y)
+
+        with self.TELEMETRY.span("tcl", job=my_i):
+            self._create_tcl(os.path.join(JOB_DIR, job["script"]), job["project"], self.TOP_LEVEL_FUNCTION, job["source"], self.DEVICE_ID, self.CLOCK_PERIOD, False, fidelity, job["include_dir"], job["directive_commands"])
+
+        return job
+
+    def _job_limits(self, job, fidelity):
+        """
+        Timeout and log monitor of a job.
+
+        Returns:
+            tuple: (timeout, monitor) - the timeout in seconds and the LogMonitor (None if disabled).
+        """
+        timeout = self.TIMEOUT
+        stall_timeout = None
+        if self.TIMEOUT_POLICY is not None:
+            timeout = self.TIMEOUT_POLICY.timeout(fidelity)
+            stall_timeout = self.TIMEOUT_POLICY.stall_timeout()
+
+        monitor = None
+        if self.LOG_MONITOR:
+            monitor = LogMonitor(job["log_path"], job["project_path"], self.TOP_LEVEL_FUNCTION, stall_timeout=stall_timeout, check_infeasible=fidelity >= FIDELITY_EXPORT)
+
+        return (timeout, monitor)
+
+    def _job_result(self, job, fidelity, finished, abort_reason, monitor, reports=None, returncode=None):
+        """
+        Metrics of a job that exited, timed out or was aborted.
+
+        Args:
+            job (dict): The job returned by _prepare_job().
+            fidelity (int): Requested evaluation fidelity.
+            finished (bool): Whether the tool exited on its own.
+            abort_reason (str): Reason of the log monitor if it aborted the job.
+            monitor (LogMonitor): The log monitor of the job (None if disabled).
+            reports (dict): If given, filled with the report file name -> text.
+            returncode (int): Exit code of the tool (None if it was killed or is unknown).
+
+        Returns:
+            tuple: (metrics, fidelity, failure) as returned by _synthesize().
+        """
+        if abort_reason is not None:
+            self.TELEMETRY.count("aborts")
+        elif not finished:
+            self.TELEMETRY.count("timeouts")
+
+        # An infeasible C synthesis estimate is a valid result, only the IP export was skipped
+        if abort_reason == "infeasible":
+            fidelity = FIDELITY_CSYNTH
+        elif not finished:
+            metrics = [0, 101, 101, 101, 101, 101]
+        if finished or abort_reason == "infeasible":
+            with self.TELEMETRY.span("parse", job=job["id"]):
+                (metrics, fidelity) = self._parse_results(job["project_path"], fidelity, reports)
+
+        failure = None
+        if metrics[0] == 0 and metrics[1] == 101:
+            # Before the job directory (and the JVM crash files in it) is released
+            timed_out = not finished and abort_reason is None
+            failure = classify(job["log_path"], job["dir"], returncode, timed_out, abort_reason)
+            self.TELEMETRY.count("failures_" + failure)
+
+        # Only successful jobs teach the stall limit (failed ones end early and would shrink it)
+        if finished and failure is None and monitor is not None and self.TIMEOUT_POLICY is not None:
+            self.TIMEOUT_POLICY.observe(monitor)
+
+        return (metrics, fidelity, failure)
+
+    def _parse_results(self, PROJECT_PATH, fidelity, reports=None):
+        """
+        Read the metrics of a finished synthesis from its project.
 
+        Args:
+            PROJECT_PATH (str): Path to the Vitis HLS project.
+            fidelity (int): Fidelity the synthesis ran at.
+            reports (dict): If given, filled with the report file name -> text.
+
+        Returns:
+            tuple: (metrics, fidelity) - the metrics and the fidelity reached ([0, 101, ...] without results).
+        """
         try:
-            temp = open(f'GENETIC_DSE_{my_i}/solution1/solution1_data.json','r')
-        except:
-            return [0, 101, 101, 101, 101, 101]
+            with open(os.path.join(PROJECT_PATH, 'solution1', 'solution1_data.json'), 'r') as f:
+                json_import = json.load(f)
+        except (OSError, ValueError):
+            return ([0, 101, 101, 101, 101, 101], fidelity)
 
-        json_import = json.load(temp)
-        
         # Handle the latency undef case
         latency = None
         period = None
@@ -196,56 +472,357 @@ class HLSDirectiveOptimizationProblem(ElementwiseProblem):
 
         latency = (latency * period) / 1000000
 
-        available = json_import['ModuleInfo']['Metrics'][self.TOP_LEVEL_FUNCTION]['Area']
+        # A truncated or partial report is unparsable, the failure is classified from the log
+        try:
+            available = json_import['ModuleInfo']['Metrics'][self.TOP_LEVEL_FUNCTION]['Area']
+
+            temp = available["UTIL_BRAM"]
+            util_bram = int(temp) if temp[0] != '~' else 0
 
-        temp = available["UTIL_BRAM"]
-        util_bram = int(temp) if temp[0] != '~' else 0
+            temp = available["UTIL_DSP"]
+            util_dsp = int(temp) if temp[0] != '~' else 0
 
-        temp = available["UTIL_DSP"]
-        util_dsp = int(temp) if temp[0] != '~' else 0
+            temp = available["UTIL_FF"]
+            util_ff = int(temp) if temp[0] != '~' else 0
 
-        temp = available["UTIL_FF"]
-        util_ff = int(temp) if temp[0] != '~' else 0
+            temp = available["UTIL_LUT"]
+            util_lut = int(temp) if temp[0] != '~' else 0
 
-        temp = available["UTIL_LUT"]
-        util_lut = int(temp) if temp[0] != '~' else 0
+            temp = available["UTIL_URAM"]
+            util_uram = int(temp) if temp[0] != '~' else 0
+        except (ValueError, KeyError, TypeError, IndexError):
+            return ([0, 101, 101, 101, 101, 101], fidelity)
 
-        temp = available["UTIL_URAM"]
-        util_uram = int(temp) if temp[0] != '~' else 0
+        # The IP export only counts if it produced the packaged IP
+        if fidelity >= FIDELITY_EXPORT and not os.path.isdir(os.path.join(PROJECT_PATH, 'solution1', 'impl', 'ip')):
+            fidelity = FIDELITY_CSYNTH
 
-        # Clean up generated files
-        os.system(f'rm -r GENETIC_DSE_{my_i}')
-        os.system(f'rm ./kernel_{my_i}{self.SRC_EXTENSION}')
-        os.system(f'rm ./script_{my_i}.tcl')
-        os.system(f'rm ./vitis_hls_{my_i}.log')
+        if reports is not None:
+            for path in (os.path.join(PROJECT_PATH, 'solution1', 'solution1_data.json'),
+                         os.path.join(PROJECT_PATH, 'solution1', 'syn', 'report', self.TOP_LEVEL_FUNCTION + '_csynth.rpt')):
+                if os.path.isfile(path):
+                    with open(path, errors='replace') as f:
+                        reports[os.path.basename(path)] = f.read()
 
-        return [latency, util_bram, util_dsp, util_ff, util_lut, util_uram]
+        return ([latency, util_bram, util_dsp, util_ff, util_lut, util_uram], fidelity)
 
-    def _evaluate(self, x, out, *args, **kwargs):
+    def _synthesize_and_store(self, x, fidelity, attempt=0):
         """
-        Evaluate a solution vector by synthesizing it (or retrieving from DB) and 
-        returning its fitness and constraint violations.
+        Synthesize a directive vector and store the metrics together with their fidelity in the DB.
 
         Args:
-            x (list): Design vector of directive indices.
+            x (list): A directive index vector.
+            fidelity (int): Requested evaluation fidelity.
+            attempt (int): Number of retries of the vector done so far.
+
+        Returns:
+            list: [latency, bram, dsp, ff, lut, uram, synth_time], or a _Retry if the synthesis
+                  failed for a transient reason and is run again.
+        """
+        self.TELEMETRY.job_started()
+        try:
+            with self.TELEMETRY.span("job"):
+                return self._evaluate_one(x, fidelity, attempt)
+        finally:
+            self.TELEMETRY.job_finished()
+
+    def _evaluate_one(self, x, fidelity, attempt=0):
+        """
+        Answer a directive vector from the synthesis cache or synthesize it, and store it in the DB.
+        """
+        if attempt == 0:
+            (key, cached) = self._cache_lookup(x, fidelity)
+            if cached is not None:
+                return cached
+        else:
+            # A retry was a cache miss already
+            key = self.cache_key(x) if self.CACHE is not None else None
+
+        reports = {} if key is not None else None
+
+        start = int(time.time())
+        (metrics, reached, failure) = self._synthesize(x, fidelity, reports)
+        synth_time = int(time.time()) - start
+
+        if self.RETRY_POLICY is not None and self.RETRY_POLICY.retry(failure, attempt):
+            # Transient failure: give the slot back, the job is dispatched again after the backoff
+            delay = self.RETRY_POLICY.delay(attempt)
+            self.TELEMETRY.count("retries")
+            print("Retry %d of %d in %.0f s after a %s failure !" % (attempt + 1, self.RETRY_POLICY.retries, delay, failure))
+            return _Retry(time.time() + delay)
+
+        return self._store(x, metrics, reached, synth_time, key, reports, failure)
+
+    def _cache_lookup(self, x, fidelity):
+        """
+        Answer a directive vector from the synthesis cache (and store the hit in the DB).
+
+        Returns:
+            tuple: (key, metrics) - the cache key (None without cache) and the metrics
+                   [latency, bram, dsp, ff, lut, uram, synth_time] of a hit, None on a miss.
+        """
+        if self.CACHE is None:
+            return (None, None)
+
+        with self.TELEMETRY.span("cache_get") as span:
+            key = self.cache_key(x)
+            cached = self.CACHE.get(key, fidelity)
+            span["hit"] = cached is not None
+        if cached is None:
+            self.TELEMETRY.count("cache_misses")
+            return (key, None)
+
+        self.TELEMETRY.count("cache_hits")
+        # Synthesized before (by any run), keep its original synthesis time
+        (metrics, fidelity) = cached
+        with self.TELEMETRY.span("db_insert"):
+            self.DB.insert(x, metrics, fidelity)
+
+        return (key, metrics)
+
+    def _store(self, x, metrics, fidelity, synth_time, key=None, reports=None, failure=None):
+        """
+        Store a synthesis in the DB and, unless it failed, in the synthesis cache.
+
+        Args:
+            x (list): A directive index vector.
+            metrics (list): [latency, bram, dsp, ff, lut, uram] of the synthesis.
+            fidelity (int): Fidelity reached.
+            synth_time (int): Synthesis time in seconds.
+            key (str): Cache key of the synthesis (None without cache).
+            reports (dict): Report file name -> text of the synthesis.
+            failure (str): Failure category of a synthesis without result.
+
+        Returns:
+            list: [latency, bram, dsp, ff, lut, uram, synth_time]
+        """
+        metrics_len = len(metrics)
+        metrics.insert(metrics_len, synth_time)
+        with self.TELEMETRY.span("db_insert"):
+            self.DB.insert(x, metrics, fidelity, failure)
+
+        self.TELEMETRY.count("syntheses")
+        failed = metrics[0] == 0 and metrics[1] == 101
+        if failed:
+            self.TELEMETRY.count("failures")
+
+        # Failures depend on the timeouts and the host, only results are shared
+        if key is not None and not failed:
+            with self.TELEMETRY.span("cache_put"):
+                self.CACHE.put(key, metrics, fidelity, reports)
+
+        return metrics
+
+    def cache_key(self, x):
+        """
+        Content key of the synthesis of a directive vector: the rendered source (or the unmodified
+        source and the set_directive_* commands), the C synthesis Tcl commands with the device
+        and the clock, the headers and the release of Vitis HLS. Job-specific names are left out.
+
+        Args:
+            x (list): A directive index vector.
+
+        Returns:
+            str: SHA-256 hex digest.
+        """
+        y = self.convert_indices_to_directives(self.DIRECTIVES, x)
+        if self.TCL_DIRECTIVES:
+            (source, directive_commands) = (self.TEMPLATE.source, self.TEMPLATE.tcl_commands(y))
+        else:
+            (source, directive_commands) = (self.TEMPLATE.render(y), None)
+
+        commands = self._tcl_commands("project", self.TOP_LEVEL_FUNCTION, "kernel" + self.SRC_EXTENSION, self.DEVICE_ID, self.CLOCK_PERIOD, False, FIDELITY_CSYNTH, None, directive_commands)
+
+        return content_key(source, commands, self.HEADERS_HASH, self.CACHE.version)
+
+    def canonicalize(self, X):
+        """
+        Map design vectors of the search space to full directive vectors (if the space is
+        pruned) and these to the representatives of their equivalence classes (if a
+        canonicalizer is set).
+
+        Args:
+            X (array): Design vectors (n x n_var).
+
+        Returns:
+            array: Canonical full directive vectors.
+        """
+        X = np.atleast_2d(X).astype(int)
+        if self.PRUNER is not None:
+            X = self.PRUNER.expand(X)
+        if self.CANONICALIZER is None:
+            return X
+
+        return self.CANONICALIZER.canonicalize(X)
+
+    def promote(self, X, runner):
+        """
+        Re-evaluate the given design vectors (typically the Pareto front of a run) at the
+        export fidelity, skipping those already evaluated at that fidelity.
+
+        Args:
+            X (array): Design vectors to promote.
+            runner (function): Map function used to run the synthesis jobs (e.g. pool.map).
+
+        Returns:
+            int: Number of promoted design vectors.
+        """
+        X = [x for x in np.unique(self.canonicalize(X), axis=0) if self.DB.get_fidelity(x) < FIDELITY_EXPORT]
+
+        self._dispatch(X, FIDELITY_EXPORT, runner)
+
+        return len(X)
+
+    def _dispatch(self, X, fidelity, runner):
+        """
+        Synthesize a list of design vectors, longest predicted synthesis first if a cost
+        model is set, so that the slowest jobs do not start last and stretch the batch.
+
+        Args:
+            X (list): Design vectors to synthesize.
+            fidelity (int): Synthesis fidelity.
+            runner (function): Map function used to run the synthesis jobs (unused with an engine).
+
+        Returns:
+            list: The metrics of every vector, in the order of X.
+        """
+        order = list(range(len(X)))
+        if self.COST_MODEL is not None and len(X) > 1:
+            order = self.COST_MODEL.order(np.array(X))
+
+        self.TELEMETRY.enqueue(len(X))
+        if self.ENGINE is not None:
+            results = self.ENGINE.map([X[i] for i in order], fidelity)
+        else:
+            results = self._map_with_retries([X[i] for i in order], fidelity, runner)
+
+        metrics = [None] * len(X)
+        for i, result in zip(order, results):
+            metrics[i] = result
+
+        return metrics
+
+    def _map_with_retries(self, X, fidelity, runner):
+        """
+        Run the syntheses of a batch on the runner. A job that failed for a transient reason
+        does not wait for its backoff in its slot: it is queued again and dispatched in a
+        later round once the backoff has elapsed, while the slots serve the other jobs (and,
+        in a campaign, the other targets).
+
+        Returns:
+            list: [latency, bram, dsp, ff, lut, uram, synth_time] of every vector, in the order of X.
+        """
+        results = [None] * len(X)
+        queue = [(i, 0) for i in range(len(X))]
+        # (due, index, attempt) of the jobs waiting for their backoff
+        waiting = []
+        while len(queue) > 0:
+            outcomes = list(runner(lambda job: self._dequeue_and_store(X[job[0]], fidelity, job[1]), queue))
+            for (i, attempt), outcome in zip(queue, outcomes):
+                if isinstance(outcome, _Retry):
+                    waiting.append((outcome.due, i, attempt + 1))
+                else:
+                    results[i] = outcome
+
+            queue = []
+            if len(waiting) > 0:
+                # Dispatch the retries whose backoff has elapsed, or wait for the first one
+                waiting.sort()
+                time.sleep(max(0.0, waiting[0][0] - time.time()))
+                now = time.time()
+                queue = [(i, attempt) for (due, i, attempt) in waiting if due <= now]
+                waiting = [item for item in waiting if item[0] > now]
+                self.TELEMETRY.enqueue(len(queue))
+
+        return results
+
+    def _dequeue_and_store(self, x, fidelity, attempt=0):
+        """
+        Runner task of _dispatch(): a queued job was picked up by a worker.
+        """
+        self.TELEMETRY.dequeue()
+        return self._synthesize_and_store(x, fidelity, attempt)
+
+    def _evaluate_batch(self, X, runner):
+        """
+        Evaluate a matrix of design vectors.
+
+        Args:
+            X (array): Design vectors (n x n_var).
+            runner (function): Map function used to run the syntheses of the DB misses.
+
+        Returns:
+            tuple: (F, G) - objectives (n x 6) and constraints (n x 5).
+        """
+        with self.TELEMETRY.span("canonicalize", n=len(X)):
+            X = self.canonicalize(X)
+
+            # Evaluate identical (or equivalent) rows once
+            (U, inverse) = np.unique(X, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+
+        M = np.zeros((len(U), 6))
+
+        with self.TELEMETRY.span("db_get", n=len(U)):
+            cached = self.DB.get_many(U)
+        misses = []
+        for i in range(len(U)):
+            if cached[i] is None or self._retry_stored(U[i], cached[i]):
+                misses.append(i)
+            else:
+                M[i] = cached[i][0:6]
+
+        self.TELEMETRY.count("evaluations", len(X))
+        self.TELEMETRY.count("db_hits", len(U) - len(misses))
+        self.TELEMETRY.count("db_misses", len(misses))
+
+        chosen = list(range(len(misses)))
+        predictions = {}
+        if self.SCREEN is not None and len(misses) > 0:
+            with self.TELEMETRY.span("screen", n=len(misses)):
+                (chosen, predictions) = self.SCREEN.screen(U[misses])
+            self.TELEMETRY.count("predicted", len(predictions))
+
+        results = self._dispatch([U[misses[j]] for j in chosen], self.FIDELITY, runner)
+
+        for j, metrics in zip(chosen, results):
+            M[misses[j]] = metrics[0:6]
+        for j, f in predictions.items():
+            M[misses[j]] = f
+
+        F = M[inverse]
+        G = F[:, 1:6] - 100
+
+        return (F, G)
+
+    def _retry_stored(self, x, metrics):
+        """
+        Whether a stored failure is synthesized again: transient failures of earlier runs
+        (or of exhausted retries) get one more chance per run if retries are enabled.
+        """
+        if self.RETRY_POLICY is None or not (metrics[0] == 0 and metrics[1] == 101):
+            return False
+
+        if self.DB.get_failure(x) not in TRANSIENT_FAILURES:
+            return False
+
+        key = tuple(int(v) for v in x)
+        if key in self.retried:
+            return False
+        self.retried.add(key)
+
+        return True
+
+    def _evaluate(self, X, out, *args, **kwargs):
+        """
+        Evaluate a population by synthesizing its design vectors (or retrieving them from DB)
+        and returning their fitness and constraint violations.
+
+        Args:
+            X (array): Design vectors of directive indices (n x n_var).
             out (dict): Dictionary to store evaluation results (objectives and constraints).
         """
-        metrics = None
+        (F, G) = self._evaluate_batch(X, self.RUNNER)
 
-        try:
-            metrics = self.DB.get(x)
-        except:
-            start = int(time.time())
-            metrics = self._synthesize(x)
-            synth_time = int(time.time()) - start
-            metrics_len = len(metrics)
-            metrics.insert(metrics_len, synth_time)
-            self.DB.insert(x, metrics)
-
-        d = np.array(metrics)
-        
-        f = d[0:6]
-        g = f[1:6] - 100
-
-        out["F"] = f
-        out["G"] = g
+        out["F"] = F
+        out["G"] = G
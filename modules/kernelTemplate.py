@@ -0,0 +1,173 @@
+import re
+import hashlib
+
+from modules.canonicalizer import strip_comments
+
+class KernelTemplate():
+    """
+    The labelled kernel source, parsed once into the text segments between the
+    insertion points of its action points.
+
+    The directive of action point k is inserted on a new line after the line of
+    the exact label L<k>: (L1 does not match L10, labels in comments and strings
+    are ignored), so a variant kernel is rendered by joining the segments with the
+    chosen pragmas. Alternatively, the directives are translated into Vitis HLS
+    set_directive_* Tcl commands on the unmodified source, using the function
+    and the loop label of every action point.
+    """
+
+    def __init__(self, source_path, n_labels):
+        """
+        Args:
+            source_path (str): The labelled kernel source.
+            n_labels (int): Number of action points (labels L1 to L<n_labels>).
+        """
+        with open(source_path) as f:
+            self.source = f.read()
+
+        masked = strip_comments(self.source)
+
+        points = {}
+        for m in re.finditer(r"(?<![\w:])L(\d+)\s*:(?!:)", masked):
+            label = int(m.group(1))
+            if label < 1 or label > n_labels:
+                continue
+            if label in points:
+                raise ValueError("%s: label L%d appears more than once" % (source_path, label))
+
+            end = masked.find("\n", m.end())
+            points[label] = (m.start(), end + 1 if end >= 0 else len(masked))
+
+        missing = [label for label in range(1, n_labels + 1) if label not in points]
+        if len(missing) > 0:
+            raise ValueError("%s: no label %s" % (source_path, ", ".join("L" + str(label) for label in missing)))
+
+        # Segments between the insertion points, and the action point inserted after each one
+        self.order = sorted(range(n_labels), key=lambda i: points[i + 1][1])
+        self.segments = []
+        start = 0
+        for i in self.order:
+            end = points[i + 1][1]
+            segment = self.source[start:end]
+            self.segments.append(segment if segment.endswith("\n") else segment + "\n")
+            start = end
+        self.tail = self.source[start:]
+
+        # Function and loop name of every action point (for the Tcl directives)
+        functions = self._functions(masked)
+        self.locations = []
+        for i in range(n_labels):
+            (position, end) = points[i + 1]
+            function = None
+            for (name, body_start, body_end) in functions:
+                if body_start <= position < body_end:
+                    function = name
+            # A loop is named by the label directly in front of it (e.g. L1: LOAD_TILE: for)
+            names = re.match(r"(?:\s*(\w+)\s*:(?!:))+\s*(?:for|while|do)\b", masked[position:])
+            self.locations.append((function, names.group(1) if names is not None else None))
+
+    def _functions(self, masked):
+        """
+        Find the function bodies of the source.
+
+        Returns:
+            list: (name, body start, body end) of every function definition.
+        """
+        functions = []
+        # Open blocks: index of their function, or None for namespace/extern "C"/struct scopes
+        stack = []
+        statement = 0
+        for m in re.finditer(r"[{};]", masked):
+            token = m.group(0)
+            at_scope = all(block is None for block in stack)
+            if token == "{":
+                header = re.search(r"(\w+)\s*\([^;]*\)[^;()=]*$", masked[statement:m.start()]) if at_scope else None
+                if header is not None:
+                    functions.append([header.group(1), m.start(), len(masked)])
+                    stack.append(len(functions) - 1)
+                elif at_scope:
+                    stack.append(None)
+                else:
+                    stack.append(stack[-1])
+            elif token == "}" and len(stack) > 0:
+                block = stack.pop()
+                if block is not None and (len(stack) == 0 or stack[-1] is None):
+                    functions[block][2] = m.end()
+            if all(block is None for block in stack):
+                statement = m.end()
+
+        return [tuple(f) for f in functions]
+
+    def render(self, directives):
+        """
+        Render the kernel with a directive inserted after every action point label.
+
+        Args:
+            directives (list): Directive string of every action point.
+
+        Returns:
+            str: The kernel source.
+        """
+        parts = []
+        for segment, i in zip(self.segments, self.order):
+            parts.append(segment)
+            parts.append(directives[i] + "\n")
+        parts.append(self.tail)
+
+        return "".join(parts)
+
+    def tcl_commands(self, directives):
+        """
+        Translate the directives into set_directive_* Tcl commands for the unmodified source.
+
+        Args:
+            directives (list): Directive string of every action point.
+
+        Returns:
+            list: Tcl commands.
+        """
+        commands = []
+        for i, directive in enumerate(directives):
+            commands.append(self._tcl_command(directive, self.locations[i]))
+
+        return commands
+
+    def _tcl_command(self, directive, location):
+        (function, loop) = location
+        words = directive.split()[2:]
+        kind = words[0]
+        options = dict(word.split("=", 1) for word in words[1:] if "=" in word)
+
+        if kind == "array_partition":
+            partition = [word for word in words[1:] if "=" not in word]
+            command = "set_directive_array_partition -type " + partition[0]
+            if "factor" in options:
+                command += " -factor " + options["factor"]
+            command += " -dim " + options["dim"]
+            return command + " \"" + str(function) + "\" " + options["variable"]
+
+        if loop is None:
+            raise ValueError("No loop label for the Tcl directive '%s' in %s" % (directive, function))
+
+        command = "set_directive_" + kind
+        for key, value in options.items():
+            command += " -" + key + " " + value
+        return command + " \"" + str(function) + "/" + loop + "\""
+
+    def digest(self, directives, tcl=False):
+        """
+        Content hash of a rendered variant (byte-identical variants share it).
+
+        Args:
+            directives (list): Directive string of every action point.
+            tcl (bool): Hash the Tcl directives on the unmodified source instead of the rendered source.
+
+        Returns:
+            str: SHA-256 hex digest.
+        """
+        if tcl:
+            text = self.source + "\n".join(self.tcl_commands(directives))
+        else:
+            text = self.render(directives)
+
+        return hashlib.sha256(text.encode()).hexdigest()
@@ -0,0 +1,213 @@
+import os
+import re
+import json
+import time
+
+import numpy as np
+
+# Log messages after which a synthesis cannot produce a result any more
+FATAL_PATTERNS = [
+    r"^ERROR: ",
+    r"A fatal error has been detected by the Java Runtime Environment",
+    r"Abnormal program termination",
+    r"Segmentation fault",
+    r"std::bad_alloc",
+    r"Out of memory",
+    r"No space left on device"
+]
+
+# Utilization columns of the solution data JSON
+UTIL_COLUMNS = ["UTIL_BRAM", "UTIL_DSP", "UTIL_FF", "UTIL_LUT", "UTIL_URAM"]
+
+class LogMonitor():
+    """
+    Watches the log and the project of one running synthesis job and decides
+    whether it should be aborted before its timeout:
+
+    - "fatal": the log contains an unrecoverable error message
+    - "stall": the log has not grown for stall_timeout seconds
+    - "infeasible": C synthesis finished with an estimate above 100% utilization of
+      some resource, so the remaining IP export is wasted on an infeasible design
+
+    The monitor is polled by the ProcessSupervisor (or a session) while the job runs
+    and only reads the log data appended since the previous poll.
+    """
+
+    def __init__(self, log_path, project_path=None, top_level_function=None, stall_timeout=None, check_infeasible=False, interval=2.0):
+        """
+        Args:
+            log_path (str): Log file of the job.
+            project_path (str): Synthesis project of the job (for the infeasibility check).
+            top_level_function (str): Top-level function whose utilization is checked.
+            stall_timeout (float): Seconds without log output after which the job is aborted (None disables).
+            check_infeasible (bool): Abort once C synthesis reports an infeasible design.
+            interval (float): Poll period in seconds.
+        """
+        self.log_path = log_path
+        self.project_path = project_path
+        self.top_level_function = top_level_function
+        self.stall_timeout = stall_timeout
+        self.check_infeasible = check_infeasible and project_path is not None
+        self.interval = interval
+
+        self.patterns = [re.compile(p) for p in FATAL_PATTERNS]
+
+        self.offset = 0
+        self.partial = ""
+        self.start_time = time.monotonic()
+        self.last_output = self.start_time
+        self.paused_at_output = 0.0
+        self.max_gap = 0.0
+
+        self.reason = None
+        self.message = None
+
+    def check(self, paused_time=0.0):
+        """
+        Poll the log and the project.
+
+        Args:
+            paused_time (float): Total time the job has been paused so far (not a stall).
+
+        Returns:
+            bool: True if the job should be aborted (reason and message are set).
+        """
+        now = time.monotonic()
+
+        try:
+            with open(self.log_path, 'r', errors='replace') as f:
+                f.seek(self.offset)
+                data = f.read()
+                self.offset = f.tell()
+        except OSError:
+            data = ""
+
+        silence = now - self.last_output - (paused_time - self.paused_at_output)
+
+        if len(data) > 0:
+            self.max_gap = max(self.max_gap, silence)
+            self.last_output = now
+            self.paused_at_output = paused_time
+
+            lines = (self.partial + data).split("\n")
+            self.partial = lines.pop()
+            for line in lines:
+                for pattern in self.patterns:
+                    if pattern.search(line):
+                        return self._abort("fatal", line.strip())
+
+        elif self.stall_timeout is not None and silence > self.stall_timeout:
+            return self._abort("stall", "no log output for %.0f s" % silence)
+
+        if self.check_infeasible:
+            util = self._csynth_utilization()
+            if util is not None and max(util) > 100:
+                return self._abort("infeasible", "C synthesis estimate " + str(util))
+
+        return False
+
+    def finish(self, paused_time=0.0):
+        """
+        Account the silence at the end of a completed job.
+        """
+        self.max_gap = max(self.max_gap, time.monotonic() - self.last_output - (paused_time - self.paused_at_output))
+
+    def _abort(self, reason, message):
+        self.reason = reason
+        self.message = message
+        return True
+
+    def _csynth_utilization(self):
+        """
+        Read the utilization estimate of a completed C synthesis, if already written.
+        """
+        path = os.path.join(self.project_path, 'solution1', 'solution1_data.json')
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path) as f:
+                area = json.load(f)['ModuleInfo']['Metrics'][self.top_level_function]['Area']
+            return [int(area[c]) if area[c][0] != '~' else 0 for c in UTIL_COLUMNS]
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            # Still being written
+            return None
+
+class AdaptiveTimeout():
+    """
+    Timeout and stall limits learned from the synthesis times of the kernel.
+
+    The timeout of a job is factor times the given quantile of the synthesis times of
+    the successful evaluations in the DB at the same fidelity, clamped to
+    [min_timeout, max_timeout]. The stall limit is stall_factor times the longest log
+    silence observed in successful jobs. Both limits stay at their conservative
+    defaults (max_timeout, no stall abort) until min_samples observations exist.
+    """
+
+    def __init__(self, db, max_timeout, quantile=0.95, factor=3.0, min_timeout=300, min_samples=10, stall_factor=5.0, min_stall=300):
+        """
+        Args:
+            db (DB): Result database of the run.
+            max_timeout (float): Upper bound of the timeout (the user timeout).
+            quantile (float): Quantile of the successful synthesis times.
+            factor (float): Margin applied to the quantile.
+            min_timeout (float): Lower bound of the timeout in seconds.
+            min_samples (int): Minimum number of observations before the limits adapt.
+            stall_factor (float): Margin applied to the longest observed log silence.
+            min_stall (float): Lower bound of the stall limit in seconds.
+        """
+        self.db = db
+        self.max_timeout = max_timeout
+        self.quantile = quantile
+        self.factor = factor
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.stall_factor = stall_factor
+        self.min_stall = min_stall
+
+        self.gaps = []
+        self.n_seen = None
+        self.timeouts = {}
+
+    def timeout(self, fidelity):
+        """
+        Returns:
+            float: Timeout in seconds of a job at the given fidelity.
+        """
+        if self.db is None:
+            return self.max_timeout
+
+        n_seen = len(self.db.index)
+        if self.n_seen != n_seen:
+            times = {}
+            for item in list(self.db.index.values()):
+                (latency, util_bram, util_dsp, util_ff, util_lut, util_uram, synth_time, item_fidelity) = item
+                if not (latency == 0 and util_bram == 101):
+                    times.setdefault(item_fidelity, []).append(synth_time)
+
+            timeouts = {}
+            for item_fidelity, values in times.items():
+                if len(values) >= self.min_samples:
+                    limit = self.factor * np.quantile(values, self.quantile)
+                    timeouts[item_fidelity] = min(self.max_timeout, max(self.min_timeout, limit))
+
+            self.timeouts = timeouts
+            self.n_seen = n_seen
+
+        return self.timeouts.get(fidelity, self.max_timeout)
+
+    def stall_timeout(self):
+        """
+        Returns:
+            float: Seconds without log output after which a job is aborted, None while not learned.
+        """
+        if len(self.gaps) < self.min_samples:
+            return None
+
+        return max(self.min_stall, self.stall_factor * max(self.gaps))
+
+    def observe(self, monitor):
+        """
+        Learn from the log of a successful job.
+        """
+        self.gaps.append(monitor.max_gap)
@@ -0,0 +1,136 @@
+import os
+
+from modules.db import DB, file_hash
+from modules.utils import str2bool
+from modules.preprocessor import Preprocessor
+from modules.costModel import CostModel
+from modules.logMonitor import AdaptiveTimeout
+from modules.canonicalizer import Canonicalizer
+from modules.pruning import SpacePruner
+from modules.workspace import WorkspaceManager
+from modules.failures import RetryPolicy
+from modules.hlsDirectiveOptimizationProblem import HLSDirectiveOptimizationProblem, FIDELITY_CSYNTH, FIDELITY_EXPORT
+
+DATABASES_DIR = './Databases'
+CHECKPOINTS_DIR = './Checkpoints'
+ARTIFACTS_DIR = './Artifacts'
+
+def add_problem_arguments(parser):
+    """
+    Add the flags shared by GenHLSOptimizer.py and GenHLSCampaign.py: evaluation policy
+    (timeouts, admission, retries), search space reduction, synthesis cache, job
+    directories, telemetry and checkpointing.
+
+    Args:
+        parser (ArgumentParser): The parser of the script.
+    """
+    parser.add_argument('--TIMEOUT', type=int, default=3600, help='Vitis HLS timeout in seconds.')
+    parser.add_argument('--MEMORY_LIMIT', type=float, default=0, help='Fraction of the system memory that admitted Vitis HLS jobs may use; the youngest job is paused above 95%%. (default: 0, no memory control; opt-in, e.g. 0.9)')
+    parser.add_argument('--LICENSES', type=int, default=0, help='Maximum number of concurrent Vitis HLS jobs (licenses). (default: 0, no cap)')
+    parser.add_argument('--ADAPTIVE_TIMEOUT', type=str2bool, default=False, help='Learn the timeout and stall limit of a synthesis from the successful evaluations (TIMEOUT is the upper bound). Jobs killed at the learned limits are stored as timeouts and not revisited.')
+    parser.add_argument('--LOG_MONITOR', type=str2bool, default=False, help='Abort syntheses early on fatal log errors, learned stalls or an infeasible C synthesis estimate. (opt-in)')
+    parser.add_argument('--RETRIES', type=int, default=2, help='Number of times a synthesis that failed for a transient reason (license checkout, JVM or tool crash, disk full, out of memory) is run again before the failure is stored. (0 disables)')
+    parser.add_argument('--RETRY_BACKOFF', type=float, default=30, help='Seconds before the first retry of a transient failure, doubled for every further retry.')
+    parser.add_argument('--CANONICALIZE', type=str2bool, default=False, help='Map equivalent directive configurations (e.g. directives of loops nested in a pipelined loop) to one representative, so they share one synthesis. (opt-in)')
+    parser.add_argument('--PRUNE', type=str2bool, default=False, help='Remove directive options that exceed the device, were always infeasible in the result databases or partition arrays beyond their parallel accesses. (opt-in)')
+    parser.add_argument('--PRUNE_MIN_SAMPLES', type=int, default=5, help='Minimum number of syntheses of an option, all infeasible, before it is pruned.')
+    parser.add_argument('--SYNTH_CACHE', type=str2bool, default=False, help='Reuse syntheses of identical sources, Tcl options, device and clock from any run through a content-addressed cache. (opt-in)')
+    parser.add_argument('--CACHE_PATH', type=str, default="./Databases/synthesis_cache.sqlite", help='The synthesis cache shared by all runs on this host.')
+    parser.add_argument('--CACHE_MAX_ENTRIES', type=int, default=0, help='Maximum number of cache entries, least recently used are evicted. (default: 0, no limit)')
+    parser.add_argument('--CACHE_MAX_SIZE', type=float, default=1024, help='Maximum size of the cache entries in MB, least recently used are evicted. (0: no limit)')
+    parser.add_argument('--TOOL_VERSION', type=str, default=None, help='Release of Vitis HLS, part of the synthesis cache key. (default: the output of vitis_hls -version)')
+    parser.add_argument('--CACHE_REPORTS', type=str2bool, default=False, help='Store the compressed synthesis reports in the cache.')
+    parser.add_argument('--TCL_DIRECTIVES', type=str2bool, default=False, help='Pass the directives to Vitis HLS as set_directive_* Tcl commands on the unmodified source instead of inserting pragmas.')
+    parser.add_argument('--TMPFS', type=str2bool, default=False, help='Create the per-job directories (kernel, script, log, project) on tmpfs (/dev/shm) instead of the work directory.')
+    parser.add_argument('--KEEP_PARETO', type=str2bool, default=False, help='Keep the job directories of feasible non-dominated evaluations in ./Artifacts/<name> instead of deleting them.')
+    parser.add_argument('--DISK_LIMIT', type=float, default=0, help='Maximum size in MB of the kept artifacts of a database; the oldest are removed beyond it. The job directories of running syntheses are not counted. (default: 0, no limit)')
+    parser.add_argument('--TRACE', type=str2bool, default=False, help='Write the phase spans of every evaluation (job directory, rendering, Tcl generation, launch, synthesis, parsing, DB, cache, cleanup) to ./Traces/<name>.trace.json in the Chrome trace format.')
+    parser.add_argument('--METRICS', type=str2bool, default=False, help='Periodically write the in-flight jobs, queue depth, cache hits/misses, timeouts/failures and evaluations per hour to ./Traces/<name>.metrics.json.')
+    parser.add_argument('--METRICS_INTERVAL', type=int, default=30, help='Seconds between two updates of the metrics file.')
+    parser.add_argument('--LPT', type=str2bool, default=False, help='Dispatch the syntheses of a generation longest predicted synthesis time first. (opt-in)')
+    parser.add_argument('--MULTI_FIDELITY', type=str2bool, default=False, help='Evaluate candidates with C synthesis only and export the IP only for the final Pareto front.')
+    parser.add_argument('--CHECKPOINT_INTERVAL', type=int, default=1, help='Number of generations between two checkpoints of the search state.')
+
+def build_problem(args, name, input_source_path, input_source_info_path, src_extension, device_id, clock_period, work_dir="./", prune_dbs=[], **kwargs):
+    """
+    Preprocess a kernel and create its (pruned) search space, result database and
+    optimization problem as configured by the flags of add_problem_arguments().
+
+    Args:
+        args (Namespace): Parsed arguments (add_problem_arguments() and RESUME).
+        name (str): Name of the database, pruned space checkpoint and artifact directory.
+        input_source_path (str): Kernel source that contains the top-level function.
+        input_source_info_path (str): Kernel source information.
+        src_extension (str): Source file extension.
+        device_id (str): Target FPGA device id.
+        clock_period (str): Target clock period.
+        work_dir (str): Directory the job directories are created in (unless on tmpfs).
+        prune_dbs (list): Additional result databases used as pruning evidence.
+        **kwargs: Additional arguments of HLSDirectiveOptimizationProblem (supervisor, runner, cache, telemetry, ...).
+
+    Returns:
+        HLSDirectiveOptimizationProblem: The problem; its DB, PRUNER, CANONICALIZER and WORKSPACE are owned by the caller.
+    """
+    preprocessor = Preprocessor(input_source_info_path)
+    (n_var, xl, xu, top_level_function, directives) = preprocessor.preprocess()
+
+    db_path = os.path.join(DATABASES_DIR, name + ".sqlite")
+
+    pruner = None
+    if args.PRUNE:
+        pruner = SpacePruner(directives)
+
+        # A resumed search must run on the same pruned space
+        prune_path = os.path.join(CHECKPOINTS_DIR, name + ".prune.json")
+        if args.RESUME and os.path.isfile(prune_path):
+            pruner.load(prune_path)
+        else:
+            evidence = [path for path in [db_path] + prune_dbs if os.path.isfile(path)]
+            pruner.prune(device_id, input_source_path, input_source_info_path, evidence, args.PRUNE_MIN_SAMPLES)
+            pruner.save(prune_path)
+
+        (n_search, xl_search, xu_search) = pruner.bounds()
+    else:
+        (n_search, xl_search, xu_search) = (n_var, xl, xu)
+
+    db = DB(db_path, radices=xu + 1, metadata={
+        "device_id": device_id,
+        "clock_period": clock_period,
+        "top_level_function": top_level_function,
+        "source_hash": file_hash(input_source_path),
+        "directives": directives
+    })
+
+    canonicalizer = Canonicalizer(directives, input_source_path, input_source_info_path) if args.CANONICALIZE else None
+
+    workspace = WorkspaceManager(
+        work_dir,
+        tmpfs=args.TMPFS,
+        archive_dir=os.path.join(ARTIFACTS_DIR, name) if args.KEEP_PARETO else None,
+        disk_limit=args.DISK_LIMIT
+    )
+
+    return HLSDirectiveOptimizationProblem(
+        input_source_path,
+        src_extension,
+        n_search,
+        xl_search,
+        xu_search,
+        top_level_function,
+        directives,
+        db,
+        device_id,
+        clock_period,
+        args.TIMEOUT,
+        fidelity=FIDELITY_CSYNTH if args.MULTI_FIDELITY else FIDELITY_EXPORT,
+        work_dir=work_dir,
+        cost_model=CostModel(directives, db) if args.LPT else None,
+        timeout_policy=AdaptiveTimeout(db, args.TIMEOUT) if args.ADAPTIVE_TIMEOUT else None,
+        log_monitor=args.LOG_MONITOR,
+        retry_policy=RetryPolicy(args.RETRIES, args.RETRY_BACKOFF) if args.RETRIES > 0 else None,
+        canonicalizer=canonicalizer,
+        pruner=pruner,
+        workspace=workspace,
+        tcl_directives=args.TCL_DIRECTIVES,
+        **kwargs
+    )
@@ -0,0 +1,257 @@
+import os
+import json
+import sqlite3
+import numpy as np
+
+from modules.db import KeyCodec, METRIC_COLUMNS
+
+# Objectives of the search (all minimized)
+OBJECTIVES = METRIC_COLUMNS[0:6]
+
+# Number of keys per query when fetching new rows
+FETCH_CHUNK = 500
+
+# Number of sorted rows checked against the front at once
+SWEEP_BLOCK = 256
+
+def non_dominated(F):
+    """
+    Indices of the non-dominated rows of an objective matrix (all minimized).
+
+    The rows are sorted lexicographically, so a row can only be dominated by rows
+    before it, and swept once against the front found so far (in blocks, which
+    first drop the rows dominated by the front of the previous blocks). Rows with
+    equal objectives are all kept.
+
+    Args:
+        F (array): Objectives (n x m).
+
+    Returns:
+        array: Sorted row indices of the front.
+    """
+    F = np.asarray(F, dtype=float)
+    if len(F) == 0:
+        return np.zeros(0, dtype=int)
+
+    order = np.lexsort(F.T[::-1])
+    P = np.empty_like(F)
+    idx = np.empty(len(F), dtype=int)
+    k = 0
+    for start in range(0, len(order), SWEEP_BLOCK):
+        block = order[start:start + SWEEP_BLOCK]
+
+        # Most rows are dominated by the front of the previous blocks, drop them at once
+        if k > 0:
+            B = F[block][:, None, :]
+            front = P[None, :k, :]
+            block = block[~np.any(np.all(front <= B, axis=2) & np.any(front < B, axis=2), axis=1)]
+
+        for i in block:
+            f = F[i]
+            if k > 0:
+                front = P[:k]
+                if np.any(np.all(front <= f, axis=1) & np.any(front < f, axis=1)):
+                    continue
+            P[k] = f
+            idx[k] = i
+            k += 1
+
+    return np.sort(idx[:k])
+
+class ParetoFront():
+    """
+    Pareto front of a result database, bulk-loaded and then kept up to date.
+
+    The results table is read once into NumPy arrays (read-only connection, so a
+    running search can keep writing) and the front is extracted with
+    non_dominated(). update() polls the database version and, after a commit of
+    another connection, fetches only the rows written since the last poll through
+    the indexed sequence column (databases before schema version 3, opened read-only,
+    are scanned for the rows whose key, fidelity or latency is new instead). Rows are
+    only rewritten when promoted to a higher fidelity or when a transient failure was
+    synthesized again. Only the front, the new points and, if a front member was
+    replaced, the points it dominated are sorted again.
+
+    Failed and timed-out syntheses never enter the front; optionally, infeasible
+    points, points below a fidelity and points that took at least a timeout are
+    left out too.
+    """
+
+    def __init__(self, db_path, objectives=OBJECTIVES, feasible_only=True, min_fidelity=0, timeout=None, directives=None):
+        """
+        Args:
+            db_path (str): Path to the result database.
+            objectives (list): Metric columns the front is computed on (subset of OBJECTIVES).
+            feasible_only (bool): Leave out points exceeding the device resources.
+            min_fidelity (int): Leave out points evaluated below this fidelity.
+            timeout (int): Leave out points whose synthesis took at least this many seconds.
+            directives (list): Directive options of every action point (default: the table of the database).
+        """
+        self.db_path = db_path
+        self.columns = [METRIC_COLUMNS.index(name) for name in objectives]
+        self.feasible_only = feasible_only
+        self.min_fidelity = min_fidelity
+        self.timeout = timeout
+
+        self.conn = sqlite3.connect("file:" + os.path.abspath(db_path) + "?mode=ro", uri=True, check_same_thread=False)
+
+        self.meta = dict(self.conn.execute("SELECT name, value FROM meta"))
+        self.codec = KeyCodec(json.loads(self.meta["radices"]))
+        self.directives = directives if directives is not None else json.loads(self.meta.get("directives", "[]"))
+
+        # (fidelity, latency) of every key of the database, admissible points (key -> metrics, fidelity) and the front keys
+        self.seen = {}
+        self.points = {}
+        self.front = set()
+        self.version = None
+
+        # Highest sequence number loaded (None if the database has no sequence column)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(results)")]
+        self.seq = 0 if "seq" in columns else None
+
+        # Replaced front members of the last update (key -> metrics, fidelity)
+        self.retired = {}
+
+        self._load()
+
+    def _admissible(self, metrics, fidelity):
+        (latency, bram) = (metrics[0], metrics[1])
+        if latency == 0 and bram == 101:
+            return False
+        if self.feasible_only and max(metrics[1:6]) > 100:
+            return False
+        if fidelity < self.min_fidelity:
+            return False
+        if self.timeout is not None and metrics[6] >= self.timeout:
+            return False
+        return True
+
+    def _load(self):
+        """
+        Bulk-load the database and extract the front.
+        """
+        self.version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        rows = self.conn.execute("SELECT key, " + ", ".join(METRIC_COLUMNS) + ", fidelity" + (", seq" if self.seq is not None else "") + " FROM results").fetchall()
+        if self.seq is not None and len(rows) > 0:
+            self.seq = max(row[9] for row in rows)
+
+        keys = [row[0] for row in rows]
+        Y = np.array([row[1:8] for row in rows], dtype=float).reshape(-1, 7)
+        fidelity = np.array([row[8] for row in rows], dtype=int)
+        self.seen = dict(zip(keys, zip(fidelity.tolist(), Y[:, 0].tolist())))
+
+        mask = ~((Y[:, 0] == 0) & (Y[:, 1] == 101)) & (fidelity >= self.min_fidelity)
+        if self.feasible_only:
+            mask &= np.all(Y[:, 1:6] <= 100, axis=1)
+        if self.timeout is not None:
+            mask &= Y[:, 6] < self.timeout
+
+        selected = np.nonzero(mask)[0]
+        self.points = {keys[i]: (tuple(Y[i]), int(fidelity[i])) for i in selected}
+        self.front = set(keys[selected[i]] for i in non_dominated(Y[selected][:, self.columns]))
+
+    def _candidates(self, retired):
+        """
+        Points dominated by replaced front members: only they can enter the front in their place.
+
+        Args:
+            retired (list): Former metrics of the replaced front members.
+
+        Returns:
+            set: Keys of the uncovered points.
+        """
+        keys = list(self.points.keys())
+        F = np.array([self.points[key][0] for key in keys], dtype=float).reshape(-1, 7)[:, self.columns]
+
+        uncovered = np.zeros(len(keys), dtype=bool)
+        for r in np.array(retired, dtype=float)[:, self.columns]:
+            uncovered |= np.all(r <= F, axis=1) & np.any(r < F, axis=1)
+
+        return set(keys[i] for i in np.nonzero(uncovered)[0])
+
+    def update(self):
+        """
+        Merge the rows committed since the last call into the front.
+
+        Returns:
+            tuple: (added, removed) - keys that entered and left the front (rows() resolves both).
+        """
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self.version:
+            return ([], [])
+        self.version = version
+
+        if self.seq is not None:
+            rows = self.conn.execute("SELECT key, " + ", ".join(METRIC_COLUMNS) + ", fidelity, seq FROM results WHERE seq > ?", (self.seq,)).fetchall()
+            if len(rows) > 0:
+                self.seq = max(row[9] for row in rows)
+        else:
+            changed = [key for (key, fidelity, latency) in self.conn.execute("SELECT key, fidelity, latency FROM results") if self.seen.get(key) != (fidelity, latency)]
+
+            rows = []
+            for i in range(0, len(changed), FETCH_CHUNK):
+                chunk = changed[i:i + FETCH_CHUNK]
+                rows += self.conn.execute(
+                    "SELECT key, " + ", ".join(METRIC_COLUMNS) + ", fidelity FROM results WHERE key IN (" + ", ".join("?" * len(chunk)) + ")", chunk
+                ).fetchall()
+
+        old_front = set(self.front)
+        self.retired = {}
+        candidates = set(self.front)
+        for row in rows:
+            (key, metrics, fidelity) = (row[0], tuple(float(v) for v in row[1:8]), row[8])
+            self.seen[key] = (fidelity, metrics[0])
+
+            if key in self.front:
+                self.retired[key] = self.points[key]
+                candidates.discard(key)
+            self.points.pop(key, None)
+
+            if self._admissible(metrics, fidelity):
+                self.points[key] = (metrics, fidelity)
+                candidates.add(key)
+
+        if len(self.retired) > 0:
+            candidates |= self._candidates([metrics for (metrics, fidelity) in self.retired.values()])
+
+        # Points outside the front stay dominated by it (or by the new points dominating its members)
+        candidates = list(candidates)
+        C = np.array([self.points[key][0] for key in candidates], dtype=float).reshape(-1, 7)[:, self.columns]
+        self.front = set(candidates[i] for i in non_dominated(C))
+
+        # Replaced front members that stay on the front are reported as removed and added again
+        replaced = set(self.retired.keys())
+        return (sorted((self.front - old_front) | (replaced & self.front)), sorted((old_front - self.front) | replaced))
+
+    def rows(self, keys=None):
+        """
+        The points of the front (or of the given keys, including front members replaced by the
+        last update) joined with their directives, ordered by the objectives.
+
+        Returns:
+            list: Dicts with the directive vector x, the metrics, the fidelity and the directive strings.
+        """
+        keys = self.front if keys is None else keys
+        out = []
+        for key in keys:
+            (metrics, fidelity) = self.points[key] if key in self.points else self.retired[key]
+            x = self.codec.decode(key)
+            row = {"x": x, "latency": float(metrics[0])}
+            row.update(zip(METRIC_COLUMNS[1:7], [int(v) for v in metrics[1:7]]))
+            row["fidelity"] = fidelity
+            if len(self.directives) == len(x):
+                row["directives"] = [self.directives[i][v] for i, v in enumerate(x)]
+            out.append(row)
+
+        return sorted(out, key=lambda row: [row[METRIC_COLUMNS[c]] for c in self.columns])
+
+    def summary(self):
+        """
+        Returns:
+            str: Database name, device, clock and the numbers of entries, admissible points and front points.
+        """
+        return "%s (%s, %s ns): %d entries, %d admissible, %d on the Pareto front" % (
+            self.db_path, self.meta.get("device_id", ""), self.meta.get("clock_period", ""), len(self.seen), len(self.points), len(self.front))
+
+    def close(self):
+        self.conn.close()
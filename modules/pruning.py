@@ -0,0 +1,315 @@
+import re
+import json
+import math
+
+import numpy as np
+
+from modules.db import DB
+from modules.devices import device_resources, rescale_utilization
+from modules.surrogate import FAILED_METRICS
+from modules.warmStart import translate
+from modules.canonicalizer import strip_comments, loop_nesting
+
+def option_family(directive):
+    """
+    Group the options of an action point whose resource usage grows with their factor.
+
+    Returns:
+        tuple: (family, factor) - e.g. ("unroll", 4), ("partition dim=1", 16); complete
+               partitions and full unrolls have an infinite factor. None for other directives.
+    """
+    m = re.search(r"array_partition variable=\S+ (\w+)(?: factor=(\d+))? dim=(\d+)", directive)
+    if m is not None:
+        return ("partition dim=" + m.group(3), math.inf if m.group(1) == "complete" else int(m.group(2)))
+
+    m = re.search(r"HLS unroll(?: factor=(\d+))?", directive)
+    if m is not None:
+        return ("unroll", math.inf if m.group(1) is None else int(m.group(1)))
+
+    return None
+
+def array_accesses(source, array_name, declaration_label, loop_labels):
+    """
+    Find the labelled loops enclosing every subscripted access of a local array.
+
+    Args:
+        source (str): Kernel source with the L<k>: action point labels.
+        array_name (str): Name of the array.
+        declaration_label (int): Label number of the array declaration.
+        loop_labels (set): Label numbers of the loop action points.
+
+    Returns:
+        list: Enclosing loop labels (outermost first) of every access, or None if the array
+              escapes the analysis (it is passed to a function or accessed in an unlabelled loop,
+              whose parallelism is unknown).
+    """
+    source = strip_comments(source)
+
+    accesses = []
+    stack = []
+    pending = None
+    parens = 0
+    in_declaration = False
+    for m in re.finditer(r"\bL(\d+)\s*:(?!:)|\b(for|while|do)\b|\b" + re.escape(array_name) + r"\b|[{}();]", source):
+        token = m.group(0)
+        if m.group(1) is not None:
+            label = int(m.group(1))
+            pending = label if label in loop_labels else pending
+            in_declaration = label == declaration_label
+        elif m.group(2) is not None:
+            # Loop without action point label (-1)
+            if pending is None:
+                pending = -1
+        elif token == array_name:
+            if in_declaration:
+                in_declaration = False
+            elif re.match(r"\s*\[", source[m.end():]) is None or -1 in stack or pending == -1:
+                return None
+            else:
+                accesses.append([l for l in stack if l is not None])
+        elif token == "(":
+            parens += 1
+        elif token == ")":
+            parens -= 1
+        elif token == "{":
+            stack.append(pending)
+            pending = None
+        elif token == "}":
+            if len(stack) > 0:
+                stack.pop()
+        elif token == ";" and parens == 0:
+            pending = None
+            in_declaration = False
+
+    return accesses
+
+class SpacePruner():
+    """
+    Shrinks the directive options of every action point before the search:
+
+    - device caps: partitions into more banks than the device has BRAM_18K, or complete
+      partitions that need more flip-flops than the device has (32-bit elements assumed)
+    - DB evidence: options whose syntheses in existing result databases (rescaled to the
+      target device) were all infeasible while other options of the same action point were
+      feasible, together with the larger factors of their family
+    - loop/array coupling: partition factors larger than the number of parallel accesses the
+      enclosing loops can issue (their largest unroll factors or trip counts) add banks
+      without adding bandwidth
+
+    The search runs on the pruned indices; expand() maps them back to the full directive
+    vectors that the DB, the canonicalizer and the synthesis flow use.
+    """
+
+    def __init__(self, directives, kept=None):
+        """
+        Args:
+            directives (list): List of directive options per action point (full space).
+            kept (list): Kept option indices per action point (default: all).
+        """
+        self.directives = directives
+        self.kept = kept if kept is not None else [list(range(len(options))) for options in directives]
+
+    def prune(self, device_id, input_source_path, input_source_info_path, db_paths=(), min_samples=5):
+        """
+        Compute the kept options of every action point.
+
+        Args:
+            device_id (str): Target FPGA device.
+            input_source_path (str): The labelled kernel source.
+            input_source_info_path (str): The kernel info the directives were generated from.
+            db_paths (list): Existing result databases of the kernel (any device or clock).
+            min_samples (int): Minimum number of successful syntheses of an option before it
+                               can be pruned as infeasible.
+
+        Returns:
+            list: Kept option indices per action point.
+        """
+        with open(input_source_info_path) as f:
+            infos = [line.strip().split(',') for line in f.readlines()[1:] if line.strip() != ""]
+        with open(input_source_path) as f:
+            source = f.read()
+
+        pruned = [dict() for _ in self.directives]
+
+        self._prune_device(pruned, device_id, infos)
+        self._prune_evidence(pruned, device_id, db_paths, min_samples)
+        self._prune_coupling(pruned, source, infos)
+
+        kept = []
+        for i, options in enumerate(self.directives):
+            k = [j for j in range(len(options)) if j not in pruned[i]]
+            # Never empty a domain: keep the cheapest option
+            kept.append(k if len(k) > 0 else [0])
+        self.kept = kept
+
+        reasons = {}
+        for i in range(len(self.directives)):
+            for j, reason in pruned[i].items():
+                if j in kept[i]:
+                    continue
+                reasons[reason] = reasons.get(reason, 0) + 1
+
+        full = np.prod([float(len(options)) for options in self.directives])
+        reduced = np.prod([float(len(k)) for k in kept])
+        print("Pruning: %d options removed (%s), design space %.3g -> %.3g configurations" % (
+            sum(reasons.values()), ", ".join("%s = %d" % item for item in sorted(reasons.items())) or "none", full, reduced))
+
+        return kept
+
+    def _prune_device(self, pruned, device_id, infos):
+        resources = device_resources(device_id)
+        if resources is None:
+            return
+        (bram, dsp, ff, lut, uram) = resources
+
+        for i, options in enumerate(self.directives):
+            if infos[i][1] != "array":
+                continue
+            sizes = {infos[i][k]: int(infos[i][k + 1]) for k in range(3, len(infos[i]) - 1, 2)}
+            for j, d in enumerate(options):
+                family = option_family(d)
+                if family is None:
+                    continue
+                size = sizes.get(family[0][len("partition dim="):])
+                if family[1] == math.inf:
+                    if size is not None and 32 * size > ff:
+                        pruned[i][j] = "device"
+                elif family[1] > bram:
+                    pruned[i][j] = "device"
+
+    def _prune_evidence(self, pruned, device_id, db_paths, min_samples):
+        Xs = []
+        infeasible = []
+        for db_path in db_paths:
+            db = DB(db_path, read_only=True)
+            meta = db.metadata()
+            (X, Y) = db.get_all()
+            db.close()
+
+            if len(meta["directives"]) > 0:
+                (X, kept) = translate(X, meta["directives"], self.directives)
+                Y = Y[kept]
+            elif len(meta["radices"]) != len(self.directives) or np.any(np.array(meta["radices"]) != [len(d) for d in self.directives]):
+                continue
+
+            ok = ~np.all(Y[:, 0:6] == FAILED_METRICS, axis=1)
+            util = rescale_utilization(Y[ok, 1:6], meta["device_id"], device_id)
+            Xs.append(X[ok])
+            infeasible.append(np.any(util > 100, axis=1))
+
+        if len(Xs) == 0:
+            return
+        X = np.vstack(Xs)
+        infeasible = np.concatenate(infeasible)
+
+        for i, options in enumerate(self.directives):
+            # Options of the action point that produced a feasible design
+            feasible = set(np.unique(X[~infeasible, i]).tolist())
+            for j in range(len(options)):
+                rows = X[:, i] == j
+                # The infeasibility must be attributable to the option: other options of the
+                # action point were feasible
+                if rows.sum() < min_samples or j in feasible or len(feasible) == 0:
+                    continue
+                # Larger factors of the same family need at least as many resources
+                family = option_family(options[j])
+                for k, d in enumerate(options):
+                    other = option_family(d)
+                    if k not in feasible and (k == j or (family is not None and other is not None and other[0] == family[0] and other[1] >= family[1])):
+                        pruned[i].setdefault(k, "infeasible")
+
+    def _prune_coupling(self, pruned, source, infos):
+        loops = {int(info[0][1:]): i for i, info in enumerate(infos) if info[1] == "loop"}
+        parent = loop_nesting(source, set(loops.keys()))
+
+        # Largest number of parallel iterations of every loop with its remaining options
+        parallelism = {}
+        for label, i in loops.items():
+            trip = int(infos[i][2])
+            best = 1
+            for j, d in enumerate(self.directives[i]):
+                family = option_family(d)
+                if j in pruned[i] or family is None:
+                    continue
+                best = max(best, trip if family[1] == math.inf else family[1])
+            parallelism[label] = (best, trip)
+
+        for i, info in enumerate(infos):
+            if info[1] != "array":
+                continue
+            accesses = array_accesses(source, info[2], int(info[0][1:]), set(loops.keys()))
+            if accesses is None or len(accesses) == 0:
+                continue
+
+            # A pipelined loop fully unrolls the loops nested in it
+            bound = 0
+            for chain in accesses:
+                if any(parallelism[l][1] < 0 for l in chain):
+                    bound = None
+                    break
+                best = max(int(np.prod([parallelism[l][0] for l in chain[:k]] + [parallelism[l][1] for l in chain[k + 1:]])) for k in range(len(chain))) if len(chain) > 0 else 1
+                best = max(best, int(np.prod([parallelism[l][0] for l in chain])))
+                bound += best
+            if bound is None:
+                continue
+
+            for j, d in enumerate(self.directives[i]):
+                family = option_family(d)
+                if family is not None and family[1] != math.inf and family[1] > bound:
+                    pruned[i].setdefault(j, "coupling")
+
+    def bounds(self):
+        """
+        Returns:
+            tuple: (n_var, xl, xu) - bounds of the pruned search space.
+        """
+        xl = np.zeros(len(self.kept), dtype=int)
+        xu = np.array([len(k) - 1 for k in self.kept], dtype=int)
+
+        return (len(self.kept), xl, xu)
+
+    def expand(self, X):
+        """
+        Map vectors of the pruned search space to full directive vectors.
+        """
+        X = np.atleast_2d(X).astype(int)
+        F = np.empty_like(X)
+        for i, k in enumerate(self.kept):
+            F[:, i] = np.asarray(k)[X[:, i]]
+
+        return F
+
+    def reduce(self, X):
+        """
+        Map full directive vectors to the pruned search space.
+
+        Returns:
+            tuple: (X_reduced, rows) - the reduced vectors and the indices of the input vectors
+                   that only use kept options.
+        """
+        X = np.atleast_2d(X).astype(int)
+        lookup = [{j: r for r, j in enumerate(k)} for k in self.kept]
+
+        reduced = []
+        rows = []
+        for n, x in enumerate(X):
+            y = [lookup[i].get(int(v)) for i, v in enumerate(x)]
+            if None not in y:
+                reduced.append(y)
+                rows.append(n)
+
+        return (np.array(reduced, dtype=int).reshape(-1, len(self.kept)), rows)
+
+    def save(self, path):
+        """
+        Store the kept options (a resumed search must use the same pruned space).
+        """
+        with open(path, 'w') as f:
+            json.dump({"kept": self.kept}, f)
+
+    def load(self, path):
+        """
+        Restore the kept options saved by save().
+        """
+        with open(path) as f:
+            self.kept = json.load(f)["kept"]
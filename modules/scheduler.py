@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import tempfile
+import signal
+import psutil
+
+from threading import Condition, Event, Thread
+
+class AdmissionScheduler():
+    """
+    Memory- and license-aware admission control of the Vitis HLS jobs.
+
+    A new job is only launched when the projected memory use (current system use,
+    plus the expected growth of the running jobs, plus the estimate of the new job)
+    stays below the memory limit and a license is free. The per-application memory
+    estimate is an exponential moving average of the observed peak RSS of the job
+    process trees. Under memory pressure the youngest running job is paused
+    (SIGSTOP of its process group) instead of killing every synthesis, and resumed
+    once memory is available again. Paused time does not count towards the timeout.
+    With a memory limit of 0 only the license cap is enforced (no pausing).
+    """
+
+    def __init__(self, memory_limit=0.9, pressure_limit=0.95, licenses=0, default_estimate=4096, alpha=0.3, sample_interval=1.0, estimates_path=None):
+        """
+        Args:
+            memory_limit (float): Fraction of the system memory that admitted jobs may use (0: no memory control).
+            pressure_limit (float): Fraction of the system memory above which the youngest job is paused.
+            licenses (int): Maximum number of concurrent jobs (Vitis HLS licenses), 0 for no cap.
+            default_estimate (float): Memory estimate in MB of an application without observations.
+            alpha (float): Weight of a new observation in the moving average of the estimates.
+            sample_interval (float): Interval in seconds at which the job process trees are sampled.
+            estimates_path (str): Optional JSON file where the learned estimates are kept across runs.
+        """
+        self.memory_limit = memory_limit
+        self.pressure_limit = pressure_limit
+        self.licenses = licenses
+        self.default_estimate = default_estimate
+        self.alpha = alpha
+        self.sample_interval = sample_interval
+        self.estimates_path = estimates_path
+
+        self.estimates = {}
+        if estimates_path is not None and os.path.isfile(estimates_path):
+            with open(estimates_path) as f:
+                self.estimates = json.load(f)
+
+        self.cond = Condition()
+        self.running = {}
+        self.reserved = []
+        self.n_paused_total = 0
+
+        self.stopped = Event()
+        self.monitor = Thread(target=self._monitor, daemon=True)
+        self.monitor.start()
+
+    def estimate(self, key):
+        """
+        Returns:
+            float: Expected peak memory in MB of a job of the given application.
+        """
+        return self.estimates.get(key, self.default_estimate)
+
+    def admit(self, key):
+        """
+        Block until a job of the given application can be launched. A job is always
+        admitted when no other job is running, so the search cannot stall.
+
+        Args:
+            key (str): Application identifier (kernel, device).
+        """
+        with self.cond:
+            while not self._can_admit(key):
+                self.cond.wait(self.sample_interval)
+
+            # Reserve the slot until started() registers the job
+            self.reserved.append(key)
+
+    def started(self, job, key):
+        """
+        Register a launched job (replaces the reservation made by admit()).
+        """
+        with self.cond:
+            self.reserved.remove(key)
+            self.running[job.pid] = _Entry(job, key, self.estimate(key))
+
+    def cancel(self, key):
+        """
+        Drop the reservation of a job that could not be launched.
+        """
+        with self.cond:
+            self.reserved.remove(key)
+            self.cond.notify_all()
+
+    def finished(self, job):
+        """
+        Unregister a finished job and update the estimate of its application.
+        """
+        with self.cond:
+            entry = self.running.pop(job.pid, None)
+            if entry is not None and entry.peak_rss > 0:
+                old = self.estimates.get(entry.key)
+                self.estimates[entry.key] = entry.peak_rss if old is None else (1 - self.alpha) * old + self.alpha * entry.peak_rss
+            self.cond.notify_all()
+
+    def close(self):
+        """
+        Stop the monitor, resume paused jobs and save the learned estimates.
+        """
+        self.stopped.set()
+        self.monitor.join()
+
+        with self.cond:
+            for entry in self.running.values():
+                if entry.job.paused_since is not None:
+                    self._resume(entry)
+
+        if self.estimates_path is not None:
+            # Shared by all processes of the host: readers never see a partially written file
+            (fd, tmp_path) = tempfile.mkstemp(prefix=".memory_estimates.", dir=os.path.dirname(os.path.abspath(self.estimates_path)))
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self.estimates, f, indent=4)
+                os.replace(tmp_path, self.estimates_path)
+            except:
+                os.unlink(tmp_path)
+                raise
+
+    def summary(self):
+        """
+        Print the learned memory estimates.
+        """
+        print("")
+        print("Admission Scheduler Statistics")
+        print("")
+        for key, estimate in sorted(self.estimates.items()):
+            print("Memory estimate of %s = %.1f MB" % (key, estimate))
+        print("#paused jobs = %d" % self.n_paused_total)
+        print("")
+
+    def _can_admit(self, key):
+        """
+        Admission test (called with the condition held).
+        """
+        n_jobs = len(self.running) + len(self.reserved)
+        if n_jobs == 0:
+            return True
+
+        if self.licenses > 0 and n_jobs >= self.licenses:
+            return False
+
+        if self.memory_limit <= 0:
+            return True
+
+        if any(entry.job.paused_since is not None for entry in self.running.values()):
+            return False
+
+        memory = psutil.virtual_memory()
+        used = (memory.total - memory.available) / 2**20
+        growth = sum(max(0.0, entry.estimate - entry.rss) for entry in self.running.values())
+        growth += sum(self.estimate(key) for key in self.reserved)
+
+        return used + growth + self.estimate(key) <= self.memory_limit * memory.total / 2**20
+
+    def _monitor(self):
+        while not self.stopped.wait(self.sample_interval):
+            with self.cond:
+                entries = list(self.running.values())
+
+            for entry in entries:
+                entry.sample()
+
+            if self.memory_limit <= 0:
+                continue
+
+            memory = psutil.virtual_memory()
+            used = (memory.total - memory.available) / 2**20
+            total = memory.total / 2**20
+
+            with self.cond:
+                active = [entry for entry in entries if entry.job.pid in self.running and entry.job.paused_since is None]
+                paused = [entry for entry in entries if entry.job.pid in self.running and entry.job.paused_since is not None]
+
+                if used > self.pressure_limit * total and len(active) > 1:
+                    youngest = max(active, key=lambda entry: entry.job.start_time)
+                    self._pause(youngest)
+                elif len(paused) > 0:
+                    oldest = min(paused, key=lambda entry: entry.job.start_time)
+                    growth = sum(max(0.0, entry.estimate - entry.rss) for entry in active + [oldest])
+                    if len(active) == 0 or used + growth <= self.memory_limit * total:
+                        self._resume(oldest)
+
+                self.cond.notify_all()
+
+    def _pause(self, entry):
+        try:
+            os.killpg(entry.job.pid, signal.SIGSTOP)
+        except OSError:
+            return
+
+        entry.job.paused_since = time.monotonic()
+        self.n_paused_total += 1
+        print("Memory pressure, paused job " + str(entry.job.job_id))
+
+    def _resume(self, entry):
+        try:
+            os.killpg(entry.job.pid, signal.SIGCONT)
+        except OSError:
+            pass
+
+        entry.job.paused_time += time.monotonic() - entry.job.paused_since
+        entry.job.paused_since = None
+        print("Resumed job " + str(entry.job.job_id))
+
+class _Entry():
+    """
+    Bookkeeping of a running job.
+    """
+
+    def __init__(self, job, key, estimate):
+        self.job = job
+        self.key = key
+        self.estimate = estimate
+        self.rss = 0.0
+        self.peak_rss = 0.0
+
+    def sample(self):
+        """
+        Measure the RSS in MB of the job process tree.
+        """
+        try:
+            leader = psutil.Process(self.job.pid)
+            procs = [leader] + leader.children(recursive=True)
+        except psutil.Error:
+            return
+
+        rss = 0
+        for proc in procs:
+            try:
+                rss += proc.memory_info().rss
+            except psutil.Error:
+                pass
+
+        self.rss = rss / 2**20
+        self.peak_rss = max(self.peak_rss, self.rss)
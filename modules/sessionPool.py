@@ -0,0 +1,238 @@
+import os
+import time
+import select
+import subprocess
+
+from threading import Condition
+
+DONE_MARKER = "__GENHLS_JOB_DONE__"
+
+class VitisSession():
+    """
+    A long-lived interactive Vitis HLS process (vitis_hls -i) that executes the
+    Tcl commands of consecutive synthesis jobs. Tool startup, license checkout
+    and device loading are paid once per session instead of once per job.
+    """
+
+    def __init__(self, session_id, key, supervisor, log_path, admission_key=None):
+        """
+        Args:
+            session_id (int): Identifier of the session.
+            key (tuple): The (device_id, clock_period) pair the session serves.
+            supervisor (ProcessSupervisor): Supervisor used to launch and kill the session process.
+            log_path (str): Path of the session-wide Vitis HLS log.
+            admission_key (str): Application identifier the session is admitted under by the
+                                 scheduler of the supervisor (None: not subject to admission control).
+        """
+        self.session_id = session_id
+        self.key = key
+        self.supervisor = supervisor
+        self.jobs = 0
+        self.alive = True
+
+        # A session holds its license and memory for its whole lifetime
+        self.job = supervisor.launch(session_id, ['vitis_hls', '-i', '-l', log_path], key=admission_key, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        self.stdout_fd = self.job.process.stdout.fileno()
+        self.buffer = b""
+
+    def run(self, job_id, commands, log_path, timeout, monitor=None):
+        """
+        Stream the commands of a job into the session and wait for them to complete.
+
+        Args:
+            job_id (int): Identifier of the evaluation.
+            commands (list): Tcl commands of the job (without exit).
+            log_path (str): Path where the tool output of the job is written.
+            timeout (float): Maximum job wall clock time in seconds.
+            monitor (LogMonitor): Optional monitor of the job log, polled while the job runs.
+
+        Returns:
+            bool: True if the session executed all commands before the deadline. False if
+                  it timed out, crashed or was aborted by the monitor, in which case the
+                  session is no longer alive.
+        """
+        marker = (DONE_MARKER + " " + str(job_id) + "\n").encode()
+        script = "\n".join(commands) + "\n" + "puts \"" + DONE_MARKER + " " + str(job_id) + "\"\n"
+
+        self.jobs += 1
+        # Time the session is paused by the admission scheduler does not count towards the timeout
+        budget = timeout + time.monotonic() - self.job.deadline(0)
+        next_check = time.monotonic()
+
+        with open(log_path, 'wb') as log:
+            try:
+                self.job.process.stdin.write(script.encode())
+                self.job.process.stdin.flush()
+            except OSError:
+                self.alive = False
+                return False
+
+            poller = select.poll()
+            poller.register(self.stdout_fd, select.POLLIN)
+
+            while True:
+                index = self.buffer.find(marker)
+                if index != -1:
+                    log.write(self.buffer[:index])
+                    self.buffer = self.buffer[index + len(marker):]
+                    return True
+
+                # Keep a tail that may hold a partially received marker
+                keep = len(marker)
+                if len(self.buffer) > keep:
+                    log.write(self.buffer[:-keep])
+                    self.buffer = self.buffer[-keep:]
+                    if monitor is not None:
+                        log.flush()
+
+                remaining = self.job.deadline(budget) - time.monotonic()
+                if remaining <= 0:
+                    self.alive = False
+                    return False
+
+                if monitor is not None:
+                    ready = poller.poll(min(remaining, monitor.interval) * 1000)
+                    if time.monotonic() >= next_check:
+                        next_check = time.monotonic() + monitor.interval
+                        if monitor.check():
+                            self.alive = False
+                            return False
+                    if not ready:
+                        continue
+                elif not poller.poll(remaining * 1000):
+                    self.alive = False
+                    return False
+
+                data = os.read(self.stdout_fd, 65536)
+                if len(data) == 0:
+                    log.write(self.buffer)
+                    self.alive = False
+                    return False
+
+                self.buffer += data
+
+    def close(self, grace=10):
+        """
+        Ask the session to exit and kill its process group if it does not within the grace period.
+        """
+        try:
+            self.job.process.stdin.write(b"exit\n")
+            self.job.process.stdin.close()
+        except OSError:
+            pass
+
+        # The supervisor deadline is relative to the launch of the session
+        self.supervisor.wait(self.job, time.monotonic() - self.job.start_time + grace, record=False)
+        self.job.process.stdout.close()
+        self.alive = False
+
+class SessionPool():
+    """
+    A pool of persistent Vitis HLS sessions shared by all evaluator threads.
+
+    Sessions are bound to a (device, clock) pair. A session is recycled after
+    max_jobs synthesis jobs (to bound tool memory growth) or as soon as it crashes
+    or a job running in it times out.
+    """
+
+    def __init__(self, size, max_jobs, supervisor, log_dir="./"):
+        """
+        Args:
+            size (int): Maximum number of concurrently alive sessions.
+            max_jobs (int): Number of jobs after which a session is recycled.
+            supervisor (ProcessSupervisor): Supervisor used to launch and kill the sessions.
+            log_dir (str): Directory of the session-wide logs (e.g. the root of the job directories, removed with it).
+        """
+        self.size = size
+        self.max_jobs = max_jobs
+        self.supervisor = supervisor
+        self.log_dir = log_dir
+
+        self.cond = Condition()
+        self.idle = []
+        self.n_alive = 0
+        self.n_created = 0
+
+    def acquire(self, key, admission_key=None):
+        """
+        Get an idle session for the given (device, clock) key, starting a new one if needed.
+        A new session is launched under the admission key (see VitisSession).
+        """
+        while True:
+            evicted = None
+
+            with self.cond:
+                for session in self.idle:
+                    if session.key == key:
+                        self.idle.remove(session)
+                        return session
+
+                if self.n_alive < self.size:
+                    self.n_alive += 1
+                    self.n_created += 1
+                    session_id = self.n_created
+                    break
+
+                # Make room by closing an idle session of another target
+                if len(self.idle) > 0:
+                    evicted = self.idle.pop(0)
+                else:
+                    self.cond.wait()
+
+            if evicted is not None:
+                self._retire(evicted)
+
+        log_path = os.path.join(self.log_dir, "vitis_hls_session_" + str(session_id) + ".log")
+        try:
+            return VitisSession(session_id, key, self.supervisor, log_path, admission_key)
+        except OSError:
+            with self.cond:
+                self.n_alive -= 1
+                self.cond.notify()
+            raise
+
+    def release(self, session):
+        """
+        Return a session to the pool, recycling it if it crashed or reached its job limit.
+        """
+        with self.cond:
+            if session.alive and session.jobs < self.max_jobs:
+                self.idle.append(session)
+                self.cond.notify()
+                return
+
+        self._retire(session)
+
+    def run(self, key, job_id, commands, log_path, timeout, monitor=None, admission_key=None):
+        """
+        Run the Tcl commands of a synthesis job in a session of the pool.
+
+        Returns:
+            bool: True if the job completed before the deadline.
+        """
+        session = self.acquire(key, admission_key)
+        try:
+            return session.run(job_id, commands, log_path, timeout, monitor)
+        finally:
+            self.release(session)
+
+    def close(self):
+        """
+        Close all idle sessions.
+        """
+        with self.cond:
+            idle = self.idle
+            self.idle = []
+
+        for session in idle:
+            self._retire(session)
+
+    def _retire(self, session):
+        """
+        Close a session and free its slot.
+        """
+        session.close(grace=10 if session.alive else 0)
+
+        with self.cond:
+            self.n_alive -= 1
+            self.cond.notify()
@@ -0,0 +1,215 @@
+import time
+import queue
+
+import numpy as np
+
+from pymoo.algorithms.moo.nsga2 import RankAndCrowdingSurvival
+from pymoo.core.duplicate import DefaultDuplicateElimination
+from pymoo.core.individual import Individual
+from pymoo.core.mating import Mating
+from pymoo.core.population import Population
+from pymoo.core.problem import Problem
+from pymoo.core.result import Result
+from pymoo.util.nds.non_dominated_sorting import NonDominatedSorting
+
+class SteadyStateNSGA2():
+    """
+    Asynchronous (steady-state) NSGA-II driver.
+
+    Instead of evaluating generation by generation, every worker slot of the thread
+    pool is kept busy: as soon as one evaluation completes, its result is merged into
+    the archive (rank and crowding survival) and a new offspring is mated from the
+    current archive and dispatched to the freed slot. A single slow synthesis
+    therefore never leaves the remaining slots idle.
+    """
+
+    def __init__(self, problem, pool, n_workers, pop_size, sampling, selection, crossover, mutation, n_max_evals, max_time=None, seed=42, report_interval=10, checkpointer=None, resume=False):
+        """
+        Args:
+            problem (HLSDirectiveOptimizationProblem): The optimization problem.
+            pool (ThreadPool): Thread pool used to run the evaluations.
+            n_workers (int): Number of evaluations kept in flight.
+            pop_size (int): Archive (population) size.
+            sampling, selection, crossover, mutation: pymoo operators.
+            n_max_evals (int): Maximum number of evaluations.
+            max_time (int): Optional wall clock budget in seconds.
+            seed (int): Random seed.
+            report_interval (int): Print a progress line every report_interval completed evaluations.
+            checkpointer (Checkpointer): Optional checkpointer, called every checkpointer.interval completed evaluations.
+            resume (bool): Continue from the last checkpoint if one exists.
+        """
+        self.problem = problem
+        self.pool = pool
+        self.n_workers = n_workers
+        self.pop_size = pop_size
+        self.sampling = sampling
+        self.mating = Mating(selection, crossover, mutation, eliminate_duplicates=DefaultDuplicateElimination())
+        self.survival = RankAndCrowdingSurvival()
+        self.n_max_evals = n_max_evals
+        self.max_time = max_time
+        self.seed = seed
+        self.report_interval = report_interval
+        self.checkpointer = checkpointer
+        self.resume = resume
+
+        # Needed by the binary tournament selection of NSGA-II
+        self.tournament_type = 'comp_by_dom_and_crowding'
+
+        self.archive = Population()
+        self.in_flight = {}
+        self.completed = queue.Queue()
+
+        self.n_submitted = 0
+        self.n_eval = 0
+        self.start_time = None
+
+    def _evaluate(self, job_id, x):
+        """
+        Evaluate a single design vector (runs inside a pool thread).
+        """
+        # Synthesized serially: this already runs in one of the pool threads
+        (F, G) = self.problem._evaluate_batch(np.atleast_2d(x), map)
+        return (job_id, x, {"F": F[0], "G": G[0]})
+
+    def _submit(self, x):
+        """
+        Dispatch the evaluation of a design vector to a free worker slot.
+        """
+        job_id = self.n_submitted
+        self.in_flight[job_id] = x
+        self.n_submitted += 1
+        self.pool.apply_async(self._evaluate, (job_id, x), callback=self.completed.put, error_callback=self.completed.put)
+
+    def _budget_left(self):
+        """
+        Whether new evaluations may still be dispatched.
+        """
+        if self.n_submitted >= self.n_max_evals:
+            return False
+        if self.max_time is not None and time.time() - self.start_time >= self.max_time:
+            return False
+        return True
+
+    def _new_offspring(self):
+        """
+        Mate one new offspring from the archive that is neither archived nor in flight.
+        """
+        in_flight = Population.new("X", np.array(list(self.in_flight.values()))) if len(self.in_flight) > 0 else Population()
+        eliminate_duplicates = DefaultDuplicateElimination()
+
+        for _ in range(self.mating.n_max_iterations):
+            off = self.mating.do(self.problem, self.archive, 1, algorithm=self)
+            if len(in_flight) > 0:
+                off = eliminate_duplicates.do(off, in_flight)
+            if len(off) > 0:
+                return off[0].X
+
+        # The neighborhood of the archive is exhausted; accept a duplicate (served by the DB)
+        return self.mating.do(self.problem, self.archive, 1, algorithm=self)[0].X
+
+    def _merge(self, x, out):
+        """
+        Insert an evaluated design vector into the archive and apply survival.
+        """
+        F = out["F"]
+        G = out["G"]
+        CV = Problem.calc_constraint_violation(np.atleast_2d(G))[0]
+
+        ind = Individual(X=x, F=F, G=G, CV=CV, feasible=CV <= 0)
+        ind.evaluated = set(["F", "G", "CV", "feasible"])
+
+        pop = Population.merge(self.archive, Population.create(ind))
+        self.archive = self.survival.do(self.problem, pop, n_survive=self.pop_size, algorithm=self)
+
+    def _report(self):
+        """
+        Print a progress line with the evaluation throughput.
+        """
+        elapsed = time.time() - self.start_time
+        evals_per_hour = self.n_eval / elapsed * 3600 if elapsed > 0 else 0.0
+
+        F = self.archive.get("F")
+        feasible = self.archive.get("feasible")[:, 0]
+        n_nds = len(NonDominatedSorting().do(F[feasible], only_non_dominated_front=True)) if feasible.any() else 0
+
+        print("n_eval = %6d | elapsed = %8d s | evals/hour = %10.2f | in flight = %3d | n_nds = %3d" % (self.n_eval, elapsed, evals_per_hour, len(self.in_flight), n_nds))
+
+    def _checkpoint(self, pending):
+        """
+        Save the archive and counters. Evaluations in flight are saved as pending, on resume
+        they are dispatched again (and served by the DB if they completed in the meantime).
+        """
+        self.checkpointer.save({
+            "archive": self.archive,
+            "pending": list(pending) + list(self.in_flight.values()),
+            "n_eval": self.n_eval,
+            "elapsed": time.time() - self.start_time
+        })
+
+    def run(self):
+        """
+        Run the asynchronous optimization until the evaluation or time budget is exhausted.
+
+        Returns:
+            Result: pymoo result holding the final archive and its non-dominated feasible solutions.
+        """
+        if self.resume and self.checkpointer is not None and self.checkpointer.exists():
+            state = self.checkpointer.load()
+            self.archive = state["archive"]
+            self.n_eval = state["n_eval"]
+            self.n_submitted = state["n_eval"]
+            self.start_time = time.time() - state["elapsed"]
+            pending = state["pending"]
+            print("Resuming from checkpoint " + self.checkpointer.path + " (" + str(self.n_eval) + " evaluations)")
+        else:
+            np.random.seed(self.seed)
+            self.start_time = time.time()
+
+            # Initial population; fill every worker slot, the remaining samples are queued
+            X = self.sampling.do(self.problem, self.pop_size).get("X")
+            pending = [x for x in X]
+
+        while len(pending) > 0 and len(self.in_flight) < self.n_workers and self._budget_left():
+            self._submit(pending.pop(0))
+
+        while len(self.in_flight) > 0:
+            ret = self.completed.get()
+            if isinstance(ret, BaseException):
+                raise ret
+
+            (job_id, x, out) = ret
+            del self.in_flight[job_id]
+            self.n_eval += 1
+            self._merge(x, out)
+
+            if self.n_eval % self.report_interval == 0:
+                self._report()
+
+            if self.checkpointer is not None and self.n_eval % self.checkpointer.interval == 0:
+                self._checkpoint(pending)
+
+            while len(self.in_flight) < self.n_workers and self._budget_left():
+                if len(pending) > 0:
+                    self._submit(pending.pop(0))
+                else:
+                    self._submit(self._new_offspring())
+
+        if self.n_eval % self.report_interval != 0:
+            self._report()
+
+        res = Result()
+        res.problem = self.problem
+        res.algorithm = self
+        res.pop = self.archive
+        res.start_time = self.start_time
+        res.end_time = time.time()
+        res.exec_time = res.end_time - res.start_time
+
+        feasible = self.archive.get("feasible")[:, 0]
+        if feasible.any():
+            opt = self.archive[feasible]
+            I = NonDominatedSorting().do(opt.get("F"), only_non_dominated_front=True)
+            res.opt = opt[I]
+            res.X, res.F, res.G, res.CV = res.opt.get("X", "F", "G", "CV")
+
+        return res
@@ -0,0 +1,336 @@
+import os
+import time
+import select
+import signal
+import psutil
+import subprocess
+
+from threading import Lock, get_ident
+
+class Job():
+    """
+    Handle of a Vitis HLS process launched by the ProcessSupervisor.
+    """
+
+    def __init__(self, job_id, process, start_time):
+        """
+        Args:
+            job_id (int): Identifier of the evaluation that launched the process.
+            process (subprocess.Popen): The launched process (leader of its own process group).
+            start_time (float): Monotonic launch timestamp.
+        """
+        self.job_id = job_id
+        self.process = process
+        self.pid = process.pid
+        self.start_time = start_time
+        # Thread that launched the process (see ProcessSupervisor.kill_thread)
+        self.thread = get_ident()
+
+        # Set by the AdmissionScheduler while the job is paused (SIGSTOP)
+        self.paused_since = None
+        self.paused_time = 0.0
+
+    def deadline(self, timeout):
+        """
+        Returns:
+            float: Monotonic deadline of the job. Paused time does not count towards the timeout.
+        """
+        paused_time = self.paused_time
+        if self.paused_since is not None:
+            paused_time += time.monotonic() - self.paused_since
+        return self.start_time + paused_time + timeout
+
+class JobStats():
+    """
+    Outcome and resource usage of a supervised job.
+    """
+
+    def __init__(self, job_id, returncode, timed_out, wall_time, cpu_time, peak_rss, abort_reason=None):
+        """
+        Args:
+            job_id (int): Identifier of the evaluation.
+            returncode (int): Exit code of the process (None if it was killed on timeout or abort).
+            timed_out (bool): Whether the job was killed because it exceeded its deadline.
+            wall_time (float): Wall clock time in seconds.
+            cpu_time (float): User + system CPU time in seconds of the process and its reaped descendants.
+            peak_rss (float): Peak resident set size in MB of the largest process of the job.
+            abort_reason (str): Reason given by the log monitor if it aborted the job.
+        """
+        self.job_id = job_id
+        self.returncode = returncode
+        self.timed_out = timed_out
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.peak_rss = peak_rss
+        self.abort_reason = abort_reason
+
+    def finished(self):
+        """
+        Returns:
+            bool: True if the process exited on its own before the deadline.
+        """
+        return not self.timed_out and self.abort_reason is None
+
+    def __str__(self):
+        if self.timed_out:
+            status = "timeout"
+        elif self.abort_reason is not None:
+            status = "aborted=" + self.abort_reason
+        else:
+            status = "exit=" + str(self.returncode)
+        return "job %d %s wall=%.1fs cpu=%.1fs peak_rss=%.1fMB" % (self.job_id, status, self.wall_time, self.cpu_time, self.peak_rss)
+
+class ProcessSupervisor():
+    """
+    Launches and waits for the Vitis HLS processes of all evaluator threads.
+
+    Every job runs in its own process group so that a timeout kills the whole
+    tool process tree (vitis_hls wrapper, JVM, compilers). Waiting is event driven:
+    on Linux >= 5.3 the supervisor blocks on a pidfd with the job deadline as
+    timeout, elsewhere it falls back to a sleeping waitpid loop. No evaluator
+    thread spins on the CPU while its synthesis job runs.
+    """
+
+    def __init__(self, poll_interval=1.0, scheduler=None):
+        """
+        Args:
+            poll_interval (float): Sleep interval in seconds of the fallback wait loop.
+            scheduler (AdmissionScheduler): Optional admission control of the jobs launched with a key.
+        """
+        self.poll_interval = poll_interval
+        self.scheduler = scheduler
+
+        self.lock = Lock()
+        self.active = {}
+        self.history = []
+
+    def launch(self, job_id, args, key=None, **kwargs):
+        """
+        Start a process in a new process group.
+
+        Args:
+            job_id (int): Identifier of the evaluation.
+            args (list): Command line of the process.
+            key (str): Application identifier. If set and a scheduler is attached, the launch
+                       blocks until the scheduler admits the job.
+            **kwargs: Additional arguments for subprocess.Popen.
+
+        Returns:
+            Job: Handle to pass to wait().
+        """
+        scheduled = self.scheduler is not None and key is not None
+        if scheduled:
+            self.scheduler.admit(key)
+
+        try:
+            process = subprocess.Popen(args, start_new_session=True, **kwargs)
+        except OSError:
+            if scheduled:
+                self.scheduler.cancel(key)
+            raise
+
+        job = Job(job_id, process, time.monotonic())
+
+        with self.lock:
+            self.active[job.pid] = job
+
+        if scheduled:
+            self.scheduler.started(job, key)
+
+        return job
+
+    def wait(self, job, timeout, record=True, monitor=None):
+        """
+        Block until the job exits or its deadline expires. On timeout (or when the
+        monitor asks for an abort) the whole process group is killed. Leftover
+        processes of the group are killed in all cases.
+
+        Args:
+            job (Job): The job returned by launch().
+            timeout (float): Maximum job wall clock time in seconds.
+            record (bool): Whether the job is included in the summary statistics.
+            monitor (LogMonitor): Optional monitor polled while the job runs.
+
+        Returns:
+            JobStats: Outcome and resource usage of the job.
+        """
+        exited = self._wait_until(job, timeout, monitor)
+        aborted = not exited and monitor is not None and monitor.reason is not None
+        timed_out = not exited and not aborted
+
+        # Kill the process group (and any descendant that changed group) either
+        # because the deadline expired or to collect leftovers of a finished job.
+        # The leader is still unreaped here, so its pid cannot have been reused.
+        self._kill_tree(job.pid)
+
+        _, status, rusage = os.wait4(job.pid, 0)
+        wall_time = time.monotonic() - job.start_time
+
+        if self.scheduler is not None:
+            self.scheduler.finished(job)
+
+        returncode = _exit_code(status) if exited else None
+        job.process.returncode = returncode if returncode is not None else -signal.SIGKILL
+
+        stats = JobStats(
+            job.job_id,
+            returncode,
+            timed_out,
+            wall_time,
+            rusage.ru_utime + rusage.ru_stime,
+            rusage.ru_maxrss / 1024.0,
+            monitor.reason if aborted else None
+        )
+
+        with self.lock:
+            del self.active[job.pid]
+            if record:
+                self.history.append(stats)
+
+        return stats
+
+    def run(self, job_id, args, timeout, **kwargs):
+        """
+        Launch a process and wait for it.
+
+        Args:
+            job_id (int): Identifier of the evaluation.
+            args (list): Command line of the process.
+            timeout (float): Maximum job wall clock time in seconds.
+            **kwargs: Additional arguments for subprocess.Popen.
+
+        Returns:
+            JobStats: Outcome and resource usage of the job.
+        """
+        job = self.launch(job_id, args, **kwargs)
+        return self.wait(job, timeout)
+
+    def kill_all(self):
+        """
+        Kill the process groups of all running jobs (e.g. on interpreter shutdown).
+        """
+        with self.lock:
+            pids = list(self.active.keys())
+
+        for pid in pids:
+            self._kill_tree(pid)
+
+    def kill_thread(self, thread):
+        """
+        Kill the process groups of the running jobs launched by a thread (e.g. the
+        slot of a worker whose remote job was cancelled).
+
+        Args:
+            thread (int): Identifier of the launching thread (threading.get_ident()).
+        """
+        with self.lock:
+            pids = [pid for (pid, job) in self.active.items() if job.thread == thread]
+
+        for pid in pids:
+            self._kill_tree(pid)
+
+    def summary(self):
+        """
+        Print aggregate statistics of all supervised jobs.
+        """
+        with self.lock:
+            history = list(self.history)
+
+        jobs = len(history)
+        if jobs == 0:
+            return
+
+        timeouts = sum(1 for s in history if s.timed_out)
+        aborts = {}
+        for s in history:
+            if s.abort_reason is not None:
+                aborts[s.abort_reason] = aborts.get(s.abort_reason, 0) + 1
+        total_wall = sum(s.wall_time for s in history)
+        total_cpu = sum(s.cpu_time for s in history)
+        max_rss = max(s.peak_rss for s in history)
+
+        print("")
+        print("Synthesis Job Statistics")
+        print("")
+        print("#jobs = %d (timeouts = %d)" % (jobs, timeouts))
+        if len(aborts) > 0:
+            print("#early aborts = %d (%s)" % (sum(aborts.values()), ", ".join("%s = %d" % item for item in sorted(aborts.items()))))
+        print("Average wall time = %.1f s" % (total_wall / jobs))
+        print("Total CPU time = %.1f s" % total_cpu)
+        print("Max peak RSS = %.1f MB" % max_rss)
+        print("")
+
+    def _wait_until(self, job, timeout, monitor=None):
+        """
+        Wait for a child process to exit before its deadline without reaping it.
+        The deadline is re-evaluated on expiry since pausing the job extends it.
+        With a monitor, the wait wakes up every monitor interval to poll it (not while
+        the job is paused, and paused time does not count as a stall).
+
+        Returns:
+            bool: True if the process exited, False on timeout or abort.
+        """
+        pid = job.pid
+        fd = None
+        if hasattr(os, 'pidfd_open'):
+            try:
+                fd = os.pidfd_open(pid)
+            except OSError:
+                fd = None
+
+        if fd is not None:
+            try:
+                poller = select.poll()
+                poller.register(fd, select.POLLIN)
+                while True:
+                    remaining = job.deadline(timeout) - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    if monitor is not None:
+                        remaining = min(remaining, monitor.interval)
+                    if poller.poll(remaining * 1000):
+                        return True
+                    if monitor is not None and job.paused_since is None and monitor.check(job.paused_time):
+                        return False
+            finally:
+                os.close(fd)
+
+        while True:
+            if os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is not None:
+                return True
+
+            if monitor is not None and job.paused_since is None and monitor.check(job.paused_time):
+                return False
+
+            remaining = job.deadline(timeout) - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.poll_interval, remaining))
+
+    def _kill_tree(self, pid):
+        """
+        Kill the process group led by pid together with any descendants.
+        """
+        try:
+            descendants = psutil.Process(pid).children(recursive=True)
+        except psutil.Error:
+            descendants = []
+
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+        for proc in descendants:
+            try:
+                proc.kill()
+            except psutil.Error:
+                pass
+
+def _exit_code(status):
+    """
+    Convert a wait status into a subprocess style return code.
+    """
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
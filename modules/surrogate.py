@@ -0,0 +1,281 @@
+import re
+import math
+
+import numpy as np
+
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from modules.paretoFront import non_dominated
+
+# Metrics stored for timed out or failed syntheses
+FAILED_METRICS = [0, 101, 101, 101, 101, 101]
+
+def _ranks(F):
+    """
+    Non-dominated rank of every row of an objective matrix (0 for the front,
+    1 for the front of the remaining rows, ...).
+    """
+    rank = np.zeros(len(F), dtype=int)
+    remaining = np.arange(len(F))
+    r = 0
+    while len(remaining) > 0:
+        front = remaining[non_dominated(F[remaining])]
+        rank[front] = r
+        remaining = np.setdiff1d(remaining, front)
+        r += 1
+    return rank
+
+def directive_features(directive):
+    """
+    Derive numeric features from a directive string.
+
+    Args:
+        directive (str): An HLS pragma generated by the Preprocessor.
+
+    Returns:
+        list: [pipeline, log2 unroll factor, full unroll, complete partition, log2 partition factor, cyclic partition]
+    """
+    factor = re.search(r"factor=(\d+)", directive)
+    log_factor = math.log2(int(factor.group(1))) if factor else 0.0
+
+    pipeline = "pipeline" in directive
+    unroll = "unroll" in directive
+    partition = "array_partition" in directive
+
+    return [
+        1.0 if pipeline else 0.0,
+        log_factor if unroll else 0.0,
+        1.0 if unroll and factor is None else 0.0,
+        1.0 if partition and " complete" in directive else 0.0,
+        log_factor if partition else 0.0,
+        1.0 if partition and " cyclic" in directive else 0.0
+    ]
+
+class Surrogate():
+    """
+    Random forest surrogate of the Vitis HLS metrics of a kernel.
+
+    The model is trained on the (directive vector -> metrics) samples of the result
+    databases. The input features are the index vector followed by the numeric
+    features of the chosen directive of every action point. A regressor predicts the
+    six objectives (log-latency and utilizations), the spread of its trees gives the
+    prediction uncertainty, and a classifier predicts whether the synthesis fails.
+    """
+
+    def __init__(self, directives, min_samples=20, n_estimators=100, seed=42):
+        """
+        Args:
+            directives (list): List of directive options per action point.
+            min_samples (int): Minimum number of successful samples before the model is used.
+            n_estimators (int): Number of trees of the forests.
+            seed (int): Random seed of the forests.
+        """
+        self.min_samples = min_samples
+        self.n_estimators = n_estimators
+        self.seed = seed
+
+        # Feature table [action point][directive index] -> features
+        self.table = [[directive_features(d) for d in options] for options in directives]
+
+        self.regressor = None
+        self.classifier = None
+        self.scale = None
+        self.front = None
+
+    def encode(self, X):
+        """
+        Build the feature matrix of a set of directive vectors.
+        """
+        rows = []
+        for x in X:
+            row = [float(v) for v in x]
+            for i in range(len(x)):
+                row.extend(self.table[i][int(x[i])])
+            rows.append(row)
+
+        return np.array(rows, dtype=float)
+
+    def fit(self, X, Y):
+        """
+        Train the surrogate.
+
+        Args:
+            X (array): Directive vectors (n x n_var).
+            Y (array): Metrics [latency, bram, dsp, ff, lut, uram, ...] of each vector (n x >= 6).
+
+        Returns:
+            bool: Whether enough samples were available to train the model.
+        """
+        if len(X) == 0:
+            return False
+
+        failed = np.all(Y[:, 0:6] == FAILED_METRICS, axis=1)
+        if (~failed).sum() < self.min_samples:
+            return False
+
+        E = self.encode(X)
+
+        F = Y[~failed, 0:6].copy()
+        F[:, 0] = np.log1p(F[:, 0])
+
+        self.regressor = RandomForestRegressor(n_estimators=self.n_estimators, random_state=self.seed)
+        self.regressor.fit(E[~failed], F)
+        self.scale = F.std(axis=0) + 1e-9
+
+        self.classifier = None
+        if failed.any():
+            self.classifier = RandomForestClassifier(n_estimators=self.n_estimators, random_state=self.seed)
+            self.classifier.fit(E, failed)
+
+        # Observed feasible front, the reference for how promising a prediction is
+        O = Y[~failed, 0:6]
+        O = O[np.all(O[:, 1:6] <= 100, axis=1)]
+        self.front = O[non_dominated(O)] if len(O) > 0 else np.zeros((0, 6))
+
+        return True
+
+    def predict(self, X):
+        """
+        Predict the metrics of a set of directive vectors.
+
+        Returns:
+            tuple: (mean, std, p_fail) - predicted objectives (n x 6), their uncertainty relative
+                   to the spread of the training targets (n x 6) and the failure probability (n).
+        """
+        E = self.encode(X)
+
+        P = np.stack([tree.predict(E) for tree in self.regressor.estimators_])
+        mean = P.mean(axis=0)
+        std = P.std(axis=0) / self.scale
+        mean[:, 0] = np.expm1(mean[:, 0])
+
+        p_fail = np.zeros(len(X))
+        if self.classifier is not None:
+            p_fail = self.classifier.predict_proba(E)[:, list(self.classifier.classes_).index(True)]
+
+        return (mean, std, p_fail)
+
+    def screen(self, X, n_synth):
+        """
+        Choose which directive vectors are worth synthesizing.
+
+        Half of the budget goes to the most promising vectors (lowest non-dominated rank
+        of the prediction against the observed front, predicted feasible first), the rest
+        to the most uncertain ones. The vectors that are predicted to fail get the
+        metrics of a failed synthesis instead of their predicted objectives.
+
+        Args:
+            X (array): Candidate directive vectors.
+            n_synth (int): Number of vectors to synthesize.
+
+        Returns:
+            tuple: (selected, mean) - indices of the vectors to synthesize and the predicted objectives of all vectors.
+        """
+        (mean, std, p_fail) = self.predict(X)
+        n = len(X)
+
+        feasible = np.all(mean[:, 1:6] <= 100, axis=1) & (p_fail < 0.5)
+
+        rank = _ranks(np.vstack([self.front, mean]))
+        rank = rank[len(self.front):]
+        rank = rank + np.where(feasible, 0, n)
+
+        uncertainty = std.mean(axis=1) + p_fail * (1 - p_fail)
+
+        selected = []
+        for i in np.lexsort((-uncertainty, rank)):
+            if len(selected) >= math.ceil(n_synth / 2):
+                break
+            selected.append(int(i))
+
+        for i in np.argsort(-uncertainty):
+            if len(selected) >= n_synth:
+                break
+            if int(i) not in selected:
+                selected.append(int(i))
+
+        mean[p_fail >= 0.5] = FAILED_METRICS
+
+        return (selected, mean)
+
+class SurrogateScreen():
+    """
+    Surrogate pre-screening of the uncached offspring of a batch evaluation.
+
+    Of the vectors that are not in the DB only a fraction, chosen by Surrogate.screen,
+    is dispatched to Vitis HLS; the others get their predicted objectives. Predictions
+    are never written to the DB: the predicted vectors are flagged and can be verified
+    by synthesis at the end of the run.
+    """
+
+    def __init__(self, surrogate, db, synth_fraction=0.5, training_dbs=None):
+        """
+        Args:
+            surrogate (Surrogate): The surrogate model.
+            db (DB): Result database of the run (retrained on before every batch).
+            synth_fraction (float): Fraction of the DB misses of a batch that is synthesized.
+            training_dbs (list): Additional result databases of the same kernel, device and clock (read once and closed).
+        """
+        self.surrogate = surrogate
+        self.db = db
+        self.synth_fraction = synth_fraction
+
+        self.extra_X = []
+        self.extra_Y = []
+        for training_db in (training_dbs if training_dbs is not None else []):
+            (X, Y) = training_db.get_all()
+            training_db.close()
+            if len(X) > 0:
+                self.extra_X.append(X)
+                self.extra_Y.append(Y)
+
+    def _training_set(self):
+        (X, Y) = self.db.get_all()
+
+        Xs = ([X] if len(X) > 0 else []) + self.extra_X
+        Ys = ([Y] if len(Y) > 0 else []) + self.extra_Y
+        if len(Xs) == 0:
+            return (X, Y)
+
+        return (np.vstack(Xs), np.vstack(Ys))
+
+    def screen(self, X):
+        """
+        Decide which of the uncached vectors of a batch are synthesized.
+
+        Args:
+            X (array): Directive vectors that are not in the DB.
+
+        Returns:
+            tuple: (chosen, predictions) - indices of the vectors to synthesize and the
+                   predicted objectives of the others (dict index -> objectives).
+        """
+        n_synth = max(1, math.ceil(self.synth_fraction * len(X)))
+
+        chosen = list(range(len(X)))
+        predictions = {}
+        if len(X) > n_synth:
+            (X_train, Y_train) = self._training_set()
+            if self.surrogate.fit(X_train, Y_train):
+                (chosen, mean) = self.surrogate.screen(X, n_synth)
+                for i in range(len(X)):
+                    if i not in chosen:
+                        predictions[i] = mean[i]
+
+        if len(predictions) > 0:
+            print("Surrogate screening: %d synthesized, %d predicted" % (len(chosen), len(predictions)))
+
+        return (chosen, predictions)
+
+    def verify(self, problem, X, runner):
+        """
+        Synthesize the given vectors (e.g. the final Pareto front) that only have predicted metrics.
+
+        Returns:
+            int: Number of verified vectors.
+        """
+        X = [x for x in np.unique(problem.canonicalize(X), axis=0) if not self.db.contains(x)]
+
+        problem._dispatch(X, problem.FIDELITY, runner)
+
+        return len(X)
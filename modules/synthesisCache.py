@@ -0,0 +1,263 @@
+import os
+import re
+import time
+import zlib
+import json
+import hashlib
+import sqlite3
+import subprocess
+
+from threading import Lock
+
+from modules.distributed import HEADER_EXTENSIONS
+
+# Version of the cache schema
+CACHE_SCHEMA_VERSION = 1
+
+def headers_hash(source_path):
+    """
+    Hash of the headers next to a kernel source (they are part of what is synthesized).
+
+    Args:
+        source_path (str): Path to the kernel source.
+
+    Returns:
+        str: SHA-256 hex digest of the header names and contents.
+    """
+    source_dir = os.path.dirname(os.path.abspath(source_path))
+    h = hashlib.sha256()
+    for name in sorted(os.listdir(source_dir)):
+        if name.endswith(HEADER_EXTENSIONS):
+            with open(os.path.join(source_dir, name), 'rb') as f:
+                h.update(name.encode() + b"\0" + f.read() + b"\0")
+    return h.hexdigest()
+
+def tool_version(command="vitis_hls", timeout=120):
+    """
+    Release of the synthesis tool (another release can produce other results for the same input).
+
+    Args:
+        command (str): The tool executable.
+        timeout (float): Seconds to wait for the tool.
+
+    Returns:
+        str: The release and build lines of "<command> -version", "" if the tool cannot be run.
+    """
+    try:
+        output = subprocess.run([command, "-version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, timeout=timeout).stdout
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+    # Leave out the copyright lines, keep e.g. "Vitis HLS - ... v2023.2 (64-bit)" and "SW Build 4023990 on ..."
+    lines = [line.strip(" *") for line in output.splitlines() if re.search(r"\bv\d{4}\.\d|\bBuild\b", line)]
+    return "\n".join(lines) if len(lines) > 0 else output.strip()
+
+def content_key(source, commands, headers="", version=""):
+    """
+    Content address of a synthesis.
+
+    Args:
+        source (str): The rendered kernel source.
+        commands (list): The Tcl commands of the synthesis (device, clock, options and directives).
+        headers (str): Hash of the included headers.
+        version (str): Release of the synthesis tool.
+
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    h = hashlib.sha256()
+    h.update(source.encode())
+    h.update(b"\0" + "\n".join(commands).encode())
+    h.update(b"\0" + headers.encode())
+    h.update(b"\0" + version.encode())
+    return h.hexdigest()
+
+class SynthesisCache():
+    """
+    Content-addressed cache of synthesis results, shared by all runs, databases and
+    processes on a host.
+
+    Schema (SQLite, WAL journal):
+        meta(name, value)       schema version
+        entries(key, latency, util_bram, util_dsp, util_ff, util_lut, util_uram, synth_time,
+                fidelity, last_used, size, reports)
+
+    The key is the content_key() of the rendered source, the Tcl commands, the headers and
+    the release of Vitis HLS, so a configuration is reused whatever DB, directive ordering or operator configuration
+    produced it. An entry answers a request if it reached at least the requested fidelity.
+    Reports (the solution data JSON and the C synthesis report) are optionally stored
+    zlib-compressed. Entries are evicted least recently used first beyond max_entries or
+    max_size. Concurrent processes wait on each other's writes up to busy_timeout.
+    """
+
+    def __init__(self, cache_path, max_entries=0, max_size=0, store_reports=False, busy_timeout=30.0, version=None):
+        """
+        Args:
+            cache_path (str): Path to the SQLite cache file.
+            max_entries (int): Maximum number of entries (0: no limit).
+            max_size (float): Maximum size of the entries in MB (0: no limit).
+            store_reports (bool): Store the compressed synthesis reports with the metrics.
+            busy_timeout (float): Seconds to wait for a concurrent writer.
+            version (str): Release of Vitis HLS the syntheses run with (None: ask vitis_hls -version).
+        """
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.max_size = max_size * 1024 * 1024
+        self.store_reports = store_reports
+
+        self.version = version if version is not None else tool_version()
+        if self.version == "":
+            print("Synthesis cache: cannot determine the Vitis HLS version (see --TOOL_VERSION), entries are keyed without it")
+
+        self.conn = sqlite3.connect(cache_path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self.lock = Lock()
+        self.conn.execute("PRAGMA busy_timeout=%d" % int(busy_timeout * 1000))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+                self.conn.execute("INSERT OR IGNORE INTO meta VALUES ('schema_version', ?)", (str(CACHE_SCHEMA_VERSION),))
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, "
+                    "latency REAL, util_bram INTEGER, util_dsp INTEGER, util_ff INTEGER, util_lut INTEGER, util_uram INTEGER, "
+                    "synth_time INTEGER, fidelity INTEGER, last_used REAL, size INTEGER, reports BLOB)"
+                )
+                self.conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+                self.conn.execute("COMMIT")
+            except:
+                self.conn.execute("ROLLBACK")
+                raise
+
+            version = self.conn.execute("SELECT value FROM meta WHERE name = 'schema_version'").fetchone()[0]
+        if int(version) > CACHE_SCHEMA_VERSION:
+            raise ValueError("%s has cache schema version %s, this version supports up to %d" % (cache_path, version, CACHE_SCHEMA_VERSION))
+
+        self.hits = 0
+        self.misses = 0
+        self.inserts = 0
+        self.evictions = 0
+
+    def get(self, key, fidelity):
+        """
+        Look up a synthesis.
+
+        Args:
+            key (str): Content key of the synthesis.
+            fidelity (int): Requested fidelity.
+
+        Returns:
+            tuple: (metrics, fidelity) - [latency, bram, dsp, ff, lut, uram, synth_time] and the
+                   fidelity of the entry, None on a miss.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT latency, util_bram, util_dsp, util_ff, util_lut, util_uram, synth_time, fidelity "
+                "FROM entries WHERE key = ? AND fidelity >= ?", (key, int(fidelity))
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+
+        return (list(row[0:7]), row[7])
+
+    def put(self, key, metrics, fidelity, reports=None):
+        """
+        Store a synthesis and evict the least recently used entries beyond the limits.
+
+        Args:
+            key (str): Content key of the synthesis.
+            metrics (list): [latency, bram, dsp, ff, lut, uram, synth_time].
+            fidelity (int): Fidelity reached.
+            reports (dict): Report file name -> text (stored compressed if store_reports is set).
+        """
+        blob = None
+        if self.store_reports and reports:
+            blob = zlib.compress(json.dumps(reports).encode(), 6)
+        size = 96 + len(key) + (len(blob) if blob is not None else 0)
+
+        item = (key, float(metrics[0]), int(metrics[1]), int(metrics[2]), int(metrics[3]), int(metrics[4]), int(metrics[5]),
+                int(metrics[6]), int(fidelity), time.time(), size, blob)
+
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A lower fidelity never replaces a higher one
+                self.conn.execute(
+                    "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET latency = excluded.latency, util_bram = excluded.util_bram, "
+                    "util_dsp = excluded.util_dsp, util_ff = excluded.util_ff, util_lut = excluded.util_lut, "
+                    "util_uram = excluded.util_uram, synth_time = excluded.synth_time, fidelity = excluded.fidelity, "
+                    "last_used = excluded.last_used, size = excluded.size, reports = excluded.reports "
+                    "WHERE excluded.fidelity >= entries.fidelity", item
+                )
+                self.inserts += 1
+                self.evictions += self._evict()
+                self.conn.execute("COMMIT")
+            except:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self):
+        """
+        Delete the least recently used entries beyond the limits (inside a write transaction).
+
+        Returns:
+            int: Number of evicted entries.
+        """
+        evicted = 0
+
+        if self.max_entries > 0:
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+            if count > self.max_entries:
+                evicted += self.conn.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_used LIMIT ?)", (count - self.max_entries,)
+                ).rowcount
+
+        if self.max_size > 0:
+            (total,) = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+            if total > self.max_size:
+                excess = total - self.max_size
+                keys = []
+                for (key, size) in self.conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+                    keys.append((key,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                self.conn.executemany("DELETE FROM entries WHERE key = ?", keys)
+                evicted += len(keys)
+
+        return evicted
+
+    def reports(self, key):
+        """
+        Retrieve the stored reports of a synthesis.
+
+        Returns:
+            dict: Report file name -> text, None if the entry or its reports are missing.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT reports FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+
+        return json.loads(zlib.decompress(row[0]).decode())
+
+    def summary(self):
+        """
+        Print the cache statistics of this process.
+        """
+        with self.lock:
+            (count, total) = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        print("Synthesis cache: %d hits, %d misses, %d inserts, %d evictions (%d entries, %.2f MB in %s)" % (
+            self.hits, self.misses, self.inserts, self.evictions, count, total / (1024.0 * 1024.0), self.cache_path))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
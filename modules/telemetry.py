@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import threading
+
+from threading import Lock
+from contextlib import contextmanager
+
+class Telemetry():
+    """
+    Phase spans and live metrics of the evaluation path.
+
+    Every span (job directory, rendering, Tcl generation, launch, synthesis, parsing,
+    DB and cache access, cleanup) is accumulated into per-phase totals and, if a
+    trace path is given, written as a complete event of the Chrome trace JSON array
+    format, one event per line (chrome://tracing and Perfetto load the file as is,
+    also while the run is still writing it). If a metrics path is given, a snapshot
+    of the in-flight jobs, the queue depth, the counters (DB and cache hits,
+    timeouts, failures) and the throughput is rewritten every interval seconds.
+    """
+
+    def __init__(self, trace_path=None, metrics_path=None, interval=30.0, threads=0):
+        """
+        Args:
+            trace_path (str): File the spans are written to (None: totals only).
+            metrics_path (str): File the metrics snapshot is periodically written to (None: disabled).
+            interval (float): Seconds between two metrics snapshots.
+            threads (int): Number of synthesis slots (for the utilization in the snapshot).
+        """
+        self.metrics_path = metrics_path
+        self.interval = interval
+        self.threads = threads
+
+        self.lock = Lock()
+        self.start = time.time()
+        self.pid = os.getpid()
+
+        self.counters = {}
+        # Phase name -> [count, total seconds]
+        self.phases = {}
+        self.in_flight = 0
+        self.queued = 0
+
+        # Thread identifiers -> small thread numbers of the trace
+        self.tids = {}
+
+        self.trace = None
+        if trace_path is not None:
+            self.trace = open(trace_path, 'w')
+            self.trace.write("[\n")
+            self.trace.flush()
+
+        self.stopped = threading.Event()
+        self.writer = None
+        if metrics_path is not None:
+            self.writer = threading.Thread(target=self._write_loop, daemon=True)
+            self.writer.start()
+
+    @contextmanager
+    def span(self, name, **args):
+        """
+        Time a phase. The yielded dict can be filled with further arguments of the span.
+
+        Args:
+            name (str): Phase name.
+            **args: Arguments recorded with the span (e.g. job number).
+        """
+        start = time.time()
+        try:
+            yield args
+        finally:
+            self.record(name, start, time.time(), **args)
+
+    def record(self, name, start, end, track=None, **args):
+        """
+        Record a phase that was timed by the caller.
+
+        Args:
+            name (str): Phase name.
+            start (float): Start timestamp (time.time()).
+            end (float): End timestamp (time.time()).
+            track (str): Trace row of the span (default: the calling thread), e.g. the job slot
+                         of a span recorded by an event loop that runs many jobs.
+            **args: Arguments recorded with the span.
+        """
+        ident = track if track is not None else threading.get_ident()
+        with self.lock:
+            phase = self.phases.setdefault(name, [0, 0.0])
+            phase[0] += 1
+            phase[1] += end - start
+
+            if self.trace is None:
+                return
+
+            tid = self.tids.get(ident)
+            if tid is None:
+                tid = len(self.tids) + 1
+                self.tids[ident] = tid
+                self._write_event({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": track if track is not None else threading.current_thread().name}})
+
+            self._write_event({"name": name, "ph": "X", "ts": int(start * 1e6), "dur": int((end - start) * 1e6), "pid": self.pid, "tid": tid, "args": args})
+
+    def _write_event(self, event):
+        self.trace.write(json.dumps(event) + ",\n")
+        self.trace.flush()
+
+    def count(self, name, n=1):
+        """
+        Increase a counter (e.g. cache_hits, timeouts).
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def enqueue(self, n):
+        """
+        Jobs handed to the runner that no worker picked up yet.
+        """
+        with self.lock:
+            self.queued += n
+
+    def dequeue(self):
+        with self.lock:
+            self.queued -= 1
+
+    def job_started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def job_finished(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Current in-flight jobs, queue depth, counters, throughput and phase totals.
+        """
+        now = time.time()
+        hours = max(now - self.start, 1e-9) / 3600.0
+        with self.lock:
+            counters = dict(self.counters)
+            phases = {name: {"count": count, "total": total, "mean": total / count} for name, (count, total) in self.phases.items()}
+            in_flight = self.in_flight
+            queued = self.queued
+
+        return {
+            "time": now,
+            "elapsed": now - self.start,
+            "in_flight": in_flight,
+            "queued": queued,
+            "threads": self.threads,
+            "utilization": in_flight / self.threads if self.threads > 0 else None,
+            "counters": counters,
+            "evals_per_hour": counters.get("evaluations", 0) / hours,
+            "syntheses_per_hour": counters.get("syntheses", 0) / hours,
+            "phases": phases
+        }
+
+    def write_metrics(self):
+        """
+        Atomically replace the metrics file with a new snapshot.
+        """
+        if self.metrics_path is None:
+            return
+
+        temp_path = self.metrics_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=4)
+        os.replace(temp_path, self.metrics_path)
+
+    def _write_loop(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.write_metrics()
+            except OSError as e:
+                print("Telemetry: cannot write " + self.metrics_path + " (" + str(e) + ")")
+
+    def close(self):
+        """
+        Stop the metrics writer, write the final snapshot and close the trace.
+        """
+        self.stopped.set()
+        if self.writer is not None:
+            self.writer.join()
+        self.write_metrics()
+
+        with self.lock:
+            if self.trace is not None:
+                self.trace.close()
+                self.trace = None
+
+    def summary(self):
+        """
+        Print the time spent per phase of the evaluation path.
+        """
+        with self.lock:
+            phases = sorted(self.phases.items(), key=lambda item: -item[1][1])
+
+        if len(phases) == 0:
+            return
+
+        print("")
+        print("Evaluation Phase Statistics")
+        print("")
+        for name, (count, total) in phases:
+            print("%-16s #%-6d total = %10.3f s   mean = %8.3f s" % (name, count, total, total / count))
+        print("")
@@ -0,0 +1,14 @@
+import argparse
+
+def str2bool(v):
+    """
+    Convert string arguments to boolean for argparse.
+    """
+    if isinstance(v, bool):
+        return v
+    if v.lower() in ('yes', 'true', 't', 'y', '1'):
+        return True
+    elif v.lower() in ('no', 'false', 'f', 'n', '0'):
+        return False
+    else:
+        raise argparse.ArgumentTypeError('Boolean value expected.')
@@ -0,0 +1,142 @@
+import numpy as np
+
+from pymoo.core.sampling import Sampling
+from pymoo.util.nds.non_dominated_sorting import NonDominatedSorting
+
+from modules.db import DB
+from modules.devices import rescale_utilization
+from modules.surrogate import FAILED_METRICS
+
+def translate(X, source_directives, target_directives):
+    """
+    Translate directive vectors of one directive table into another (e.g. of a kernel
+    variant) by matching the directive strings of every action point.
+
+    Args:
+        X (array): Directive vectors of the source table (n x n_var).
+        source_directives (list): Directive options per action point of the source.
+        target_directives (list): Directive options per action point of the target.
+
+    Returns:
+        tuple: (X_target, kept) - translated vectors and the indices of the source vectors
+               whose directives all exist in the target table.
+    """
+    if len(source_directives) != len(target_directives):
+        return (np.zeros((0, len(target_directives)), dtype=int), [])
+
+    lookup = [{d: j for j, d in enumerate(options)} for options in target_directives]
+
+    X_target = []
+    kept = []
+    for i, x in enumerate(X):
+        row = []
+        for k, v in enumerate(x):
+            j = lookup[k].get(source_directives[k][int(v)])
+            if j is None:
+                break
+            row.append(j)
+        else:
+            X_target.append(row)
+            kept.append(i)
+
+    return (np.array(X_target, dtype=int).reshape(-1, len(target_directives)), kept)
+
+def load_seeds(db_paths, directives, device_id):
+    """
+    Rank the configurations of existing result databases (other devices, clocks or
+    kernel variants) as candidates for a new run.
+
+    Utilization is rescaled to the target device; configurations are ordered by
+    feasibility, then Pareto rank, then latency. Failed syntheses are dropped.
+
+    Args:
+        db_paths (list): Paths of the source databases.
+        directives (list): Directive options per action point of the new run.
+        device_id (str): Target FPGA device of the new run.
+
+    Returns:
+        array: Distinct directive vectors of the new run, best first (n x n_var).
+    """
+    Xs = []
+    Fs = []
+    for db_path in db_paths:
+        db = DB(db_path, read_only=True)
+        meta = db.metadata()
+        (X, Y) = db.get_all()
+        db.close()
+
+        if len(meta["directives"]) > 0:
+            (X, kept) = translate(X, meta["directives"], directives)
+            Y = Y[kept]
+        elif len(meta["radices"]) != len(directives) or np.any(np.array(meta["radices"]) != [len(d) for d in directives]):
+            # No directive table recorded: only usable for the very same design space
+            print("Warm start: %s has no directive table and another design space, skipped" % db_path)
+            continue
+
+        ok = ~np.all(Y[:, 0:6] == FAILED_METRICS, axis=1)
+        F = Y[ok, 0:6].copy()
+        F[:, 1:6] = rescale_utilization(F[:, 1:6], meta["device_id"], device_id)
+
+        print("Warm start: %d configurations from %s" % (ok.sum(), db_path))
+        Xs.append(X[ok])
+        Fs.append(F)
+
+    if len(Xs) == 0:
+        return np.zeros((0, len(directives)), dtype=int)
+
+    X = np.vstack(Xs)
+    F = np.vstack(Fs)
+    if len(X) == 0:
+        return X
+
+    (_, rank) = NonDominatedSorting().do(F, return_rank=True)
+    infeasible = np.any(F[:, 1:6] > 100, axis=1)
+
+    seeds = []
+    seen = set()
+    for i in np.lexsort((F[:, 0], rank, infeasible)):
+        key = tuple(X[i])
+        if key not in seen:
+            seen.add(key)
+            seeds.append(X[i])
+
+    return np.array(seeds, dtype=int)
+
+class WarmStartSampling(Sampling):
+    """
+    Biased initial sampling: the best ranked configurations of existing result
+    databases make up a fraction of the initial population, the rest is drawn by
+    the configured sampling operator.
+    """
+
+    def __init__(self, seeds, sampling, fraction=0.5):
+        """
+        Args:
+            seeds (array): Ranked seed vectors (best first), as returned by load_seeds.
+            sampling (Sampling): The operator drawing the remaining samples.
+            fraction (float): Maximum fraction of the initial population taken from the seeds
+                              (1.0 injects the seeds as the initial population).
+        """
+        super().__init__()
+        self.seeds = seeds
+        self.sampling = sampling
+        self.fraction = fraction
+
+    def _do(self, problem, n_samples, **kwargs):
+        n_seeds = min(len(self.seeds), int(round(self.fraction * n_samples)))
+        X = [x for x in self.seeds[:n_seeds]]
+
+        seen = set(tuple(x) for x in X)
+        for _ in range(10):
+            if len(X) >= n_samples:
+                break
+            for x in self.sampling.do(problem, n_samples, pop=None, **kwargs):
+                if len(X) < n_samples and tuple(x) not in seen:
+                    seen.add(tuple(x))
+                    X.append(x)
+
+        # Design space smaller than the population: repeat samples (served by the DB)
+        while len(X) < n_samples:
+            X.append(X[len(X) % max(1, len(seen))])
+
+        return np.array(X, dtype=int)
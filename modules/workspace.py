@@ -0,0 +1,181 @@
+import os
+import json
+import shutil
+import tempfile
+
+from threading import Lock
+
+# Directory of tmpfs (RAM-backed) scratch space
+TMPFS_DIR = "/dev/shm"
+
+def directory_size(path):
+    """
+    Total size in bytes of the files below a directory.
+    """
+    size = 0
+    for (dirpath, dirnames, filenames) in os.walk(path):
+        for name in filenames:
+            try:
+                size += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return size
+
+def dominates(a, b):
+    """
+    Whether metrics a Pareto-dominate metrics b (all minimized).
+    """
+    return all(u <= v for u, v in zip(a, b)) and any(u < v for u, v in zip(a, b))
+
+class WorkspaceManager():
+    """
+    Per-job scratch directories of the synthesis jobs.
+
+    Every job gets its own directory (source, Tcl script, log and Vitis HLS project)
+    below a root private to the process (so concurrent runs in the same directory do
+    not collide), optionally on tmpfs, which is removed in-process as soon as the job
+    ends, on every exit path. Optionally, the directories of feasible jobs that are non-dominated
+    among the retained ones are moved to an artifact archive instead; retained jobs
+    that become dominated are removed, and the oldest ones are evicted while the
+    archive exceeds the disk limit.
+    """
+
+    def __init__(self, work_dir="./", tmpfs=False, archive_dir=None, disk_limit=0):
+        """
+        Args:
+            work_dir (str): Directory the root of the job directories is created in (unless on tmpfs).
+            tmpfs (bool): Create the job directories on tmpfs (/dev/shm) instead.
+            archive_dir (str): Directory the artifacts of Pareto-front jobs are kept in (None disables retention).
+            disk_limit (float): Maximum size of the archive in MB (0: no limit). The live job directories are not counted.
+        """
+        if tmpfs and not os.path.isdir(TMPFS_DIR):
+            print("Workspace: " + TMPFS_DIR + " not available, using " + work_dir)
+            tmpfs = False
+
+        self.tmpfs = tmpfs
+        self.root = tempfile.mkdtemp(prefix="GenHLS_", dir=TMPFS_DIR if tmpfs else work_dir)
+        self.archive_dir = archive_dir
+        self.disk_limit = disk_limit * 1024 * 1024
+
+        self.lock = Lock()
+        self.live = set()
+
+        # Retained jobs: name -> (metrics, size), oldest first
+        self.archive = {}
+        if archive_dir is not None:
+            os.makedirs(archive_dir, exist_ok=True)
+            self._load_archive()
+
+    def _load_archive(self):
+        entries = []
+        for name in os.listdir(self.archive_dir):
+            path = os.path.join(self.archive_dir, name, "result.json")
+            try:
+                with open(path) as f:
+                    result = json.load(f)
+                entries.append((os.path.getmtime(path), name, result["metrics"]))
+            except (OSError, ValueError, KeyError):
+                continue
+
+        for (mtime, name, metrics) in sorted(entries):
+            self.archive[name] = (metrics, directory_size(os.path.join(self.archive_dir, name)))
+
+    def create(self, job_id):
+        """
+        Create the directory of a job.
+
+        Args:
+            job_id (int): Unique job number.
+
+        Returns:
+            str: Path to the (empty) job directory.
+        """
+        path = os.path.join(self.root, "job_" + str(job_id))
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+        with self.lock:
+            self.live.add(path)
+
+        return path
+
+    def release(self, path, x=None, metrics=None, fidelity=None):
+        """
+        Remove the directory of a finished job, or move it to the archive if it is
+        a feasible, non-dominated result.
+
+        Args:
+            path (str): Job directory returned by create().
+            x (list): Directive vector of the job.
+            metrics (list): [latency, bram, dsp, ff, lut, uram] of the job, None if it failed.
+            fidelity (int): Fidelity reached by the job.
+        """
+        with self.lock:
+            self.live.discard(path)
+
+        try:
+            if self._retain(path, x, metrics, fidelity):
+                return
+        except OSError as e:
+            print("Workspace: cannot retain " + path + " (" + str(e) + ")")
+
+        shutil.rmtree(path, ignore_errors=True)
+
+    def _retain(self, path, x, metrics, fidelity):
+        if self.archive_dir is None or metrics is None or x is None:
+            return False
+        metrics = [float(m) for m in metrics[0:6]]
+        if metrics[0] == 0 or max(metrics[1:6]) > 100:
+            return False
+
+        # Job numbers restart with every run, the root of the run keeps the names unique
+        name = os.path.basename(self.root) + "_" + os.path.basename(path)
+        target = os.path.join(self.archive_dir, name)
+
+        # The archive is only changed under the lock, so a concurrent job never removes a
+        # directory that is being moved in or retains a result dominated by this one
+        with self.lock:
+            if any(m == metrics or dominates(m, metrics) for (m, size) in self.archive.values()):
+                return False
+
+            dominated = [n for n, (m, size) in self.archive.items() if dominates(metrics, m)]
+            for n in dominated:
+                del self.archive[n]
+                shutil.rmtree(os.path.join(self.archive_dir, n), ignore_errors=True)
+
+            shutil.rmtree(target, ignore_errors=True)
+            shutil.move(path, target)
+            with open(os.path.join(target, "result.json"), 'w') as f:
+                json.dump({"x": [int(v) for v in x], "metrics": metrics, "fidelity": fidelity}, f)
+            self.archive[name] = (metrics, directory_size(target))
+
+            while self.disk_limit > 0 and len(self.archive) > 1 and sum(size for (m, size) in self.archive.values()) > self.disk_limit:
+                oldest = next(iter(self.archive))
+                del self.archive[oldest]
+                shutil.rmtree(os.path.join(self.archive_dir, oldest), ignore_errors=True)
+
+        return True
+
+    def close(self):
+        """
+        Remove the directories of unfinished jobs and the root.
+        """
+        with self.lock:
+            live = list(self.live)
+            self.live.clear()
+
+        for path in live:
+            shutil.rmtree(path, ignore_errors=True)
+
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def summary(self):
+        """
+        Print the retained artifacts.
+        """
+        if self.archive_dir is None:
+            return
+
+        with self.lock:
+            size = sum(size for (m, size) in self.archive.values())
+            print("Workspace: %d Pareto-front job(s) retained in %s (%.2f MB)" % (len(self.archive), self.archive_dir, size / (1024.0 * 1024.0)))
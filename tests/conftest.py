@@ -0,0 +1,44 @@
+import os
+import sys
+import shutil
+import subprocess
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The modules are imported as in the scripts (from modules.x import ...), from the repository root
+sys.path.insert(0, REPO_DIR)
+
+class Sandbox():
+    """
+    Scratch copy of the scripts, modules, stub and inputs; run() starts a script in it
+    with the stub vitis_hls first in PATH.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def run(self, script, *args, env=None, timeout=600):
+        environ = dict(os.environ)
+        environ["PATH"] = str(self.path / "stubs") + os.pathsep + environ.get("PATH", "")
+        environ.update(env or {})
+        return subprocess.run([sys.executable, script] + [str(arg) for arg in args], cwd=str(self.path), env=environ,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, timeout=timeout)
+
+@pytest.fixture
+def sandbox(tmp_path):
+    for name in ("modules", "stubs", "Applications", "OperatorConfigurations"):
+        shutil.copytree(os.path.join(REPO_DIR, name), str(tmp_path / name), ignore=shutil.ignore_patterns("__pycache__"))
+    for name in ("GenHLSOptimizer.py", "GenHLSCampaign.py", "GenHLSWorker.py"):
+        shutil.copy(os.path.join(REPO_DIR, name), str(tmp_path))
+    os.makedirs(str(tmp_path / "Databases"))
+
+    return Sandbox(tmp_path)
+
+@pytest.fixture
+def stub_vitis_hls(monkeypatch):
+    """
+    Put the stub vitis_hls first in PATH of the processes launched by the test.
+    """
+    monkeypatch.setenv("PATH", os.path.join(REPO_DIR, "stubs") + os.pathsep + os.environ.get("PATH", ""))
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import itertools
+
+import pytest
+
+from modules.asyncEngine import AsyncEngine
+from modules.failures import FAILURE_UNKNOWN
+from modules.supervisor import ProcessSupervisor
+from modules.telemetry import Telemetry
+from modules.workspace import WorkspaceManager
+
+FAILED = [0, 101, 101, 101, 101, 101]
+
+class FakeProblem():
+    """
+    The job preparation, result and store hooks of a problem: vector [v] is a kernel
+    with a v cycle latency, [-1] cannot be rendered, [-2] exits without a synthesis
+    and cannot be stored.
+    """
+
+    def __init__(self, work_dir, timeout=60):
+        self.TELEMETRY = Telemetry()
+        self.RETRY_POLICY = None
+        self.TOP_LEVEL_FUNCTION = "top"
+        self.DEVICE_ID = "xczu7ev-ffvc1156-2-e"
+        self.SUPERVISOR = ProcessSupervisor()
+        self.WORKSPACE = WorkspaceManager(work_dir)
+        self.job_ids = itertools.count(1)
+        self.timeout = timeout
+        self.stored = []
+
+    def _cache_lookup(self, x, fidelity):
+        return (None, None)
+
+    def _prepare_job(self, x, fidelity, my_i, JOB_DIR):
+        if x[0] == -1:
+            raise OSError("cannot render the kernel")
+        with open(os.path.join(JOB_DIR, "kernel.cpp"), "w") as f:
+            f.write("void top() {}\n")
+        commands = ["open_project project", "set_top top", "add_files kernel.cpp", "open_solution solution1"]
+        if x[0] != -2:
+            commands.append("csynth_design")
+        with open(os.path.join(JOB_DIR, "script.tcl"), "w") as f:
+            f.write("\n".join(commands + ["exit"]) + "\n")
+        return {"id": my_i, "dir": JOB_DIR, "script": "script.tcl", "log": "vitis_hls.log", "x": list(x)}
+
+    def _job_limits(self, job, fidelity):
+        return (self.timeout, None)
+
+    def _job_result(self, job, fidelity, finished, abort_reason, monitor, reports=None, returncode=None):
+        if not finished or not os.path.isfile(os.path.join(job["dir"], "project", "solution1", "solution1_data.json")):
+            return (list(FAILED), fidelity, "timeout" if not finished else "design_error")
+        return ([job["x"][0], 1, 1, 1, 1, 0], fidelity, None)
+
+    def _store(self, x, metrics, fidelity, synth_time, key=None, reports=None, failure=None):
+        if x[0] == -2:
+            raise RuntimeError("database is locked")
+        self.stored.append((list(x), failure))
+        return metrics + [synth_time]
+
+def _max_overlap(trace_path):
+    with open(trace_path) as f:
+        records = [json.loads(line) for line in f]
+    events = sorted([(r["start"], 1) for r in records] + [(r["end"], -1) for r in records])
+    (running, peak) = (0, 0)
+    for (t, delta) in events:
+        running += delta
+        peak = max(peak, running)
+    return peak
+
+def test_running_jobs_are_capped(tmp_path, stub_vitis_hls, monkeypatch):
+    monkeypatch.setenv("VITIS_HLS_STUB_DELAY", "0.5")
+    monkeypatch.setenv("VITIS_HLS_STUB_TRACE", str(tmp_path / "trace.jsonl"))
+    problem = FakeProblem(str(tmp_path))
+    engine = AsyncEngine(problem, 2)
+
+    results = engine.map([[v] for v in range(10, 16)], 1)
+    engine.close()
+
+    assert [r[0] for r in results] == list(range(10, 16))
+    assert _max_overlap(str(tmp_path / "trace.jsonl")) == 2
+    assert len(engine.history) == 6
+    assert all(status == "exit=0" for (latency, wall_time, status) in engine.history)
+    # The job directories are released
+    assert os.listdir(problem.WORKSPACE.root) == []
+    snapshot = problem.TELEMETRY.snapshot()
+    assert snapshot["in_flight"] == 0
+    assert snapshot["phases"]["synthesis"]["count"] == 6
+
+def test_a_job_error_only_fails_its_job(tmp_path, stub_vitis_hls):
+    problem = FakeProblem(str(tmp_path))
+    engine = AsyncEngine(problem, 2)
+
+    results = engine.map([[10], [-1], [11]], 1)
+    engine.close()
+
+    assert [r[0:2] for r in results] == [[10, 1], [0, 101], [11, 1]]
+    assert ([-1], FAILURE_UNKNOWN) in problem.stored
+
+def test_timeout_kills_the_job(tmp_path, stub_vitis_hls, monkeypatch):
+    monkeypatch.setenv("VITIS_HLS_STUB_DELAY", "60")
+    problem = FakeProblem(str(tmp_path), timeout=1)
+    engine = AsyncEngine(problem, 2)
+
+    start = time.monotonic()
+    results = engine.map([[10]], 1)
+    engine.close()
+
+    assert time.monotonic() - start < 10
+    assert results[0][0:2] == [0, 101]
+    assert problem.stored == [([10], "timeout")]
+    assert engine.history[0][2] == "timeout"
+    assert len(engine.active) == 0
+
+def test_fatal_error_cancels_the_batch(tmp_path, stub_vitis_hls, monkeypatch):
+    monkeypatch.setenv("VITIS_HLS_STUB_DELAY", "60")
+    problem = FakeProblem(str(tmp_path))
+    engine = AsyncEngine(problem, 4)
+
+    start = time.monotonic()
+    with pytest.raises(RuntimeError):
+        engine.map([[10], [11], [-2]], 1)
+
+    # The running syntheses of the batch were killed, not waited for
+    assert time.monotonic() - start < 10
+    assert len(engine.active) == 0
+    assert problem.TELEMETRY.snapshot()["in_flight"] == 0
+    engine.close()
@@ -0,0 +1,99 @@
+import json
+import time
+import threading
+
+import pytest
+
+from modules.campaign import FairShareScheduler
+
+def test_targets_keep_their_own_names(sandbox):
+    # Two targets at 3.33 ns that only differ in the operator configuration
+    targets = [
+        {"application": "RodiniaHLS-KNN-Tiling", "device_id": "xczu7ev-ffvc1156-2-e", "clk_period": "3.33", "operator_config": "./OperatorConfigurations/config_01.json"},
+        {"application": "RodiniaHLS-KNN-Tiling", "device_id": "xczu7ev-ffvc1156-2-e", "clk_period": "3.33", "operator_config": "./OperatorConfigurations/config_02.json"}
+    ]
+    (sandbox.path / "campaign.json").write_text(json.dumps(targets))
+
+    result = sandbox.run("GenHLSCampaign.py", "--CAMPAIGN_PATH", "campaign.json", "--GENERATIONS", 1, "--THREADS", 4, "--PROGRESS_INTERVAL", 600)
+    assert result.returncode == 0, result.stdout
+
+    for config in ("config_01", "config_02"):
+        name = "RodiniaHLS-KNN-Tiling_xczu7ev-ffvc1156-2-e_3.33_" + config
+        assert (sandbox.path / "Databases" / (name + ".sqlite")).is_file()
+        with open(str(sandbox.path / (name + ".json"))) as f:
+            assert json.load(f)["synth_total"] > 0
+    assert not (sandbox.path / "RodiniaHLS-KNN-Tiling_xczu7ev-ffvc1156-2-e_3.json").exists()
+
+def _wait_queued(scheduler, counts, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        progress = scheduler.progress()
+        if all(progress[name]["queued"] == n for name, n in counts.items()):
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_slots_are_shared_by_weight():
+    scheduler = FairShareScheduler(1)
+    gate = threading.Event()
+    runners = {"gate": scheduler.register("gate"), "a": scheduler.register("a", 3.0), "b": scheduler.register("b", 1.0)}
+    order = []
+
+    # Block the slot until both targets have queued their batches
+    threads = [threading.Thread(target=runners["gate"], args=(lambda item: gate.wait(10), [0]))]
+    for name in ("a", "b"):
+        threads.append(threading.Thread(target=runners[name], args=(lambda item: order.append(item[0]), [(name, i) for i in range(8)])))
+    for thread in threads:
+        thread.start()
+    assert _wait_queued(scheduler, {"a": 8, "b": 8})
+    gate.set()
+    for thread in threads:
+        thread.join()
+    scheduler.close()
+
+    # Three evaluations of a per evaluation of b while both have a queue
+    assert order[0:8].count("a") == 6
+    assert order[0:8].count("b") == 2
+    progress = scheduler.progress()
+    assert progress["a"]["done"] == 8 and progress["b"]["done"] == 8
+    assert progress["a"]["batches"] == 1
+
+def test_results_keep_their_order():
+    scheduler = FairShareScheduler(4)
+    runner = scheduler.register("a")
+
+    results = runner(lambda x: time.sleep(0.01 * (5 - x)) or x * x, range(6))
+    scheduler.close()
+
+    assert results == [0, 1, 4, 9, 16, 25]
+
+def test_errors_are_raised_by_their_batch():
+    scheduler = FairShareScheduler(2)
+    failing = scheduler.register("failing")
+    other = scheduler.register("other")
+
+    def evaluate(x):
+        if x == 1:
+            raise RuntimeError("synthesis crashed")
+        return x
+
+    with pytest.raises(RuntimeError):
+        failing(evaluate, range(4))
+    assert other(evaluate, [2, 3]) == [2, 3]
+    scheduler.close()
+
+    # The batch ran to completion before the error was raised
+    progress = scheduler.progress()
+    assert progress["failing"]["done"] == 4
+    assert progress["failing"]["failed"] == 1
+    assert progress["other"]["failed"] == 0
+
+def test_register_checks_the_targets():
+    scheduler = FairShareScheduler(1)
+    scheduler.register("a")
+
+    with pytest.raises(ValueError):
+        scheduler.register("a")
+    with pytest.raises(ValueError):
+        scheduler.register("b", 0)
+    scheduler.close()
@@ -0,0 +1,82 @@
+import numpy as np
+
+from modules.canonicalizer import Canonicalizer, loop_nesting
+
+KERNEL = """void top(int a[16]) {
+L4: int buf[8];
+L1: for (int i = 0; i < 16; i++) {
+L2:     for (int j = 0; j < 4; j++) {
+            buf[j] += a[i]; // L3: is not a label here
+        }
+    }
+    /* L2: neither here { */
+L3: for (int k = 0; k < 8; k++) { a[k] = buf[k]; }
+}
+"""
+
+INFO = """header
+L1,loop,16
+L2,loop,4
+L3,loop,8
+L4,array,buf,1,8
+"""
+
+DIRECTIVES = [
+    ["", "#pragma HLS pipeline", "#pragma HLS pipeline II=1", "#pragma HLS unroll factor=2"],
+    ["", "#pragma HLS unroll factor=2", "#pragma HLS unroll"],
+    ["", "#pragma HLS pipeline"],
+    ["",
+     "#pragma HLS array_partition variable=buf block factor=2 dim=1",
+     "#pragma HLS array_partition variable=buf cyclic factor=4 dim=1",
+     "#pragma HLS array_partition variable=buf complete dim=1"]
+]
+
+def _canonicalizer(tmp_path, info=INFO):
+    source = tmp_path / "kernel.cpp"
+    source.write_text(KERNEL)
+    kernel_info = tmp_path / "kernel_info.txt"
+    kernel_info.write_text(info)
+    return Canonicalizer(DIRECTIVES, str(source), str(kernel_info))
+
+def test_loop_nesting():
+    assert loop_nesting(KERNEL, {1, 2, 3}) == {1: None, 2: 1, 3: None}
+
+def test_default_initiation_interval(tmp_path):
+    canonicalizer = _canonicalizer(tmp_path)
+
+    assert canonicalizer.canonicalize([2, 0, 0, 0]).tolist() == [[1, 0, 0, 0]]
+
+def test_partitions_are_canonical(tmp_path):
+    canonicalizer = _canonicalizer(tmp_path)
+
+    X = [[0, 0, 0, d] for d in range(4)]
+    assert canonicalizer.canonicalize(X).tolist() == X
+
+def test_loops_in_a_pipelined_loop(tmp_path):
+    canonicalizer = _canonicalizer(tmp_path)
+
+    X = np.array([
+        [1, 2, 1, 0],   # L1 pipelined: L2 is fully unrolled anyway
+        [2, 1, 1, 0],   # pipeline II=1 is the same
+        [3, 2, 1, 0],   # L1 unrolled: L2 matters
+        [0, 1, 1, 0]
+    ])
+    C = canonicalizer.canonicalize(X)
+
+    assert C.tolist() == [[1, 0, 1, 0], [1, 0, 1, 0], [3, 2, 1, 0], [0, 1, 1, 0]]
+    assert canonicalizer.n_vectors == 4
+    assert canonicalizer.n_changed == 2
+
+def test_parent_override(tmp_path):
+    # L3 declared as nested in L1 by the kernel info
+    canonicalizer = _canonicalizer(tmp_path, INFO.replace("L3,loop,8", "L3,loop,8,parent=L1"))
+
+    assert canonicalizer.canonicalize([1, 2, 1, 0]).tolist() == [[1, 0, 0, 0]]
+
+def test_canonical_vectors_are_fixed_points(tmp_path):
+    canonicalizer = _canonicalizer(tmp_path)
+
+    X = np.array([[a, b, c, d] for a in range(4) for b in range(3) for c in range(2) for d in range(4)])
+    C = canonicalizer.canonicalize(X)
+
+    assert (canonicalizer.canonicalize(C) == C).all()
@@ -0,0 +1,90 @@
+import random
+
+import numpy as np
+import pytest
+
+from pymoo.algorithms.moo.nsga2 import NSGA2
+from pymoo.core.problem import Problem
+from pymoo.factory import get_sampling, get_crossover, get_mutation, get_termination
+
+from modules.checkpoint import Checkpointer, IsolatedRandom
+
+class ToyProblem(Problem):
+    """
+    Records the evaluated vectors; optionally fails (as if the run was killed) once
+    a number of vectors have been evaluated.
+    """
+
+    def __init__(self, fail_after=None):
+        super().__init__(n_var=3, n_obj=2, xl=0, xu=7)
+        self.fail_after = fail_after
+        self.seen = []
+
+    def _evaluate(self, X, out, *args, **kwargs):
+        if self.fail_after is not None and len(self.seen) >= self.fail_after:
+            raise RuntimeError("killed")
+        self.seen += X.astype(int).tolist()
+        out["F"] = np.column_stack([X.sum(axis=1), (7 - X).sum(axis=1) + X[:, 0] % 3]).astype(float)
+
+def _algorithm():
+    return NSGA2(
+        pop_size=8,
+        n_offsprings=8,
+        sampling=get_sampling("int_random"),
+        crossover=get_crossover("int_sbx"),
+        mutation=get_mutation("int_pm"),
+        eliminate_duplicates=True
+    )
+
+def test_resume_reproduces_the_trajectory(tmp_path):
+    reference = ToyProblem()
+    res = Checkpointer(str(tmp_path / "reference.pkl")).minimize(reference, _algorithm(), get_termination("n_gen", 6), seed=1)
+
+    # Killed during the evaluation of the 4th generation, after the checkpoint of the 3rd
+    checkpointer = Checkpointer(str(tmp_path / "run.pkl"))
+    killed = ToyProblem(fail_after=24)
+    with pytest.raises(RuntimeError):
+        checkpointer.minimize(killed, _algorithm(), get_termination("n_gen", 6), seed=1)
+
+    # Scramble the global generators: the checkpoint restores them
+    np.random.seed(123)
+    random.seed(123)
+    resumed = ToyProblem()
+    res_resumed = checkpointer.minimize(resumed, _algorithm(), get_termination("n_gen", 6), resume=True, seed=1)
+
+    assert len(killed.seen) == 24 and len(resumed.seen) > 0
+    assert killed.seen + resumed.seen == reference.seen
+    assert np.array_equal(res_resumed.F, res.F)
+    assert res_resumed.algorithm.problem is resumed
+
+def test_checkpoint_does_not_hold_the_problem(tmp_path):
+    checkpointer = Checkpointer(str(tmp_path / "run.pkl"))
+    problem = ToyProblem()
+    algorithm = _algorithm()
+    algorithm.setup(problem, termination=get_termination("n_gen", 2), seed=1)
+
+    checkpointer.save_algorithm(algorithm)
+
+    assert algorithm.problem is problem
+    assert checkpointer.load().problem is None
+    assert not (tmp_path / "run.pkl.tmp").exists()
+
+def test_isolated_random_keeps_its_own_sequence():
+    a = IsolatedRandom()
+    b = IsolatedRandom()
+    np.random.seed(0)
+    with a:
+        np.random.seed(1)
+    with b:
+        np.random.seed(2)
+
+    # Interleaving draws of b does not change the sequence of a
+    with a:
+        first = np.random.randint(1000)
+    with b:
+        np.random.randint(1000)
+    with a:
+        second = np.random.randint(1000)
+
+    np.random.seed(1)
+    assert [first, second] == [np.random.randint(1000), np.random.randint(1000)]
@@ -0,0 +1,67 @@
+import numpy as np
+
+from modules.costModel import CostModel
+
+DIRECTIVES = [
+    ["", "#pragma HLS pipeline", "#pragma HLS unroll factor=4", "#pragma HLS unroll"],
+    ["", "#pragma HLS array_partition variable=a cyclic factor=2 dim=1", "#pragma HLS array_partition variable=a complete dim=1"]
+]
+
+def test_heuristic_order_before_training():
+    model = CostModel(DIRECTIVES)
+
+    X = np.array([[0, 0], [1, 0], [2, 0], [3, 2], [2, 1]])
+
+    # Sum of the log2 factors, full unrolls and partitions; pipelines cost nothing, ties keep the batch order
+    assert model.order(X) == [4, 2, 3, 0, 1]
+    assert model.order(np.zeros((0, 2))) == []
+
+def _times(X):
+    # Full unrolls are slow, partitions do not matter
+    return np.where(X[:, 0] == 3, 600, 30) + 10 * X[:, 1]
+
+def test_regression_learns_the_synthesis_times():
+    model = CostModel(DIRECTIVES, min_samples=10)
+    X = np.array([[a, b] for a in range(4) for b in range(3)] * 2)
+
+    assert model.fit(X, _times(X))
+
+    predicted = model.predict(X)
+    assert np.all(predicted[X[:, 0] == 3] > 3 * predicted[X[:, 0] != 3].max())
+    # The complete partition does not outweigh the unroll any more
+    assert model.order(np.array([[0, 2], [3, 0]])) == [1, 0]
+
+class FakeDB():
+    def __init__(self):
+        self.index = {}
+        self.X = np.zeros((0, 2), dtype=int)
+        self.Y = np.zeros((0, 7))
+        self.reads = 0
+
+    def add(self, X, T):
+        self.X = np.vstack([self.X, X])
+        Y = np.zeros((len(X), 7))
+        Y[:, 6] = T
+        self.Y = np.vstack([self.Y, Y])
+        for x in X:
+            self.index[tuple(x)] = True
+
+    def get_all(self):
+        self.reads += 1
+        return (self.X, self.Y)
+
+def test_update_retrains_only_on_new_samples():
+    db = FakeDB()
+    model = CostModel(DIRECTIVES, db=db, min_samples=10)
+
+    # Too few samples: heuristic order, the DB is not read again until it grows
+    db.add(np.array([[0, 0], [3, 0]]), [30, 600])
+    model.order(np.array([[0, 2], [3, 0]]))
+    model.order(np.array([[0, 2], [3, 0]]))
+    assert model.weights is None
+    assert db.reads == 1
+
+    db.add(np.array([[a, b] for a in range(4) for b in range(3)]), _times(np.array([[a, b] for a in range(4) for b in range(3)])))
+    assert model.order(np.array([[0, 2], [3, 0]])) == [1, 0]
+    assert model.weights is not None
+    assert db.reads == 2
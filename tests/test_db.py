@@ -0,0 +1,207 @@
+import json
+import time
+import sqlite3
+import threading
+
+import numpy as np
+import pytest
+
+from modules.db import DB, KeyCodec, SCHEMA_VERSION
+
+FAILED = [0, 101, 101, 101, 101, 101, 7]
+
+def test_codec_round_trip():
+    codec = KeyCodec([3, 4, 2])
+
+    X = [[a, b, c] for a in range(3) for b in range(4) for c in range(2)]
+    keys = [codec.encode(x) for x in X]
+
+    assert keys == list(range(24))
+    assert [codec.decode(key) for key in keys] == X
+    assert codec.decode_many(keys).tolist() == X
+
+def test_codec_order_is_lexicographic():
+    codec = KeyCodec([5, 7, 3, 9])
+    rng = np.random.default_rng(0)
+    X = [list(x) for x in rng.integers(0, [5, 7, 3, 9], size=(50, 4))]
+
+    assert sorted(X) == [codec.decode(key) for key in sorted(codec.encode(x) for x in X)]
+
+def test_codec_blob_keys():
+    # 2^70 vectors do not fit into an SQLite INTEGER
+    codec = KeyCodec([2] * 70)
+    x = [1, 0] * 35
+
+    assert not codec.fits
+    assert codec.sql_type == "BLOB"
+    key = codec.encode(x)
+    assert isinstance(key, bytes) and len(key) == codec.width
+    assert codec.decode(key) == x
+    assert codec.decode_many([key]).tolist() == [x]
+    assert codec.encode([0] * 69 + [1]) < codec.encode([0] * 68 + [1, 0])
+
+def test_codec_rejects_vectors_outside_the_space():
+    codec = KeyCodec([3, 4])
+
+    with pytest.raises(ValueError):
+        codec.encode([3, 0])
+    with pytest.raises(ValueError):
+        codec.encode([0, -1])
+    with pytest.raises(ValueError):
+        codec.encode([0, 0, 0])
+
+def test_insert_survives_reopen(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+
+    db = DB(path, radices=[3, 4])
+    db.insert([1, 2], [100, 1, 2, 3, 4, 0, 5], fidelity=1)
+    db.insert([2, 3], FAILED, fidelity=1, failure="design_error")
+    db.close()
+
+    db = DB(path, radices=[3, 4])
+    assert db.get([1, 2]) == [100, 1, 2, 3, 4, 0, 5]
+    assert db.get_failure([1, 2]) is None
+    assert db.get_failure([2, 3]) == "design_error"
+    db.close()
+
+def test_rejects_a_different_design_space(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    DB(path, radices=[3, 4]).close()
+
+    with pytest.raises(ValueError):
+        DB(path, radices=[3, 5])
+
+def _create_v1(path):
+    """
+    A version 1 database: no failure and no seq column.
+    """
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT)")
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [("schema_version", "1"), ("radices", json.dumps([3, 4]))])
+        conn.execute(
+            "CREATE TABLE results (key INTEGER PRIMARY KEY, "
+            "latency REAL, util_bram INTEGER, util_dsp INTEGER, util_ff INTEGER, util_lut INTEGER, util_uram INTEGER, "
+            "synth_time INTEGER, fidelity INTEGER)"
+        )
+        conn.execute("INSERT INTO results VALUES (6, 100, 1, 2, 3, 4, 0, 5, 1)")
+        conn.execute("INSERT INTO results VALUES (11, 0, 101, 101, 101, 101, 101, 7, 1)")
+    conn.close()
+
+def _columns(path):
+    conn = sqlite3.connect(path)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(results)")]
+    version = conn.execute("SELECT value FROM meta WHERE name = 'schema_version'").fetchone()[0]
+    conn.close()
+    return (columns, version)
+
+def test_upgrade_from_version_1(tmp_path):
+    path = str(tmp_path / "v1.sqlite")
+    _create_v1(path)
+
+    db = DB(path)
+    assert db.get([1, 2]) == [100, 1, 2, 3, 4, 0, 5]
+    assert db.get([2, 3]) == FAILED[0:6] + [7]
+    # Failures of a version 1 database stay uncategorized
+    assert db.get_failure([2, 3]) is None
+
+    db.insert([0, 1], FAILED, fidelity=1, failure="timeout")
+    db.close()
+
+    (columns, version) = _columns(path)
+    assert "failure" in columns and "seq" in columns
+    assert version == str(SCHEMA_VERSION)
+
+    conn = sqlite3.connect(path)
+    rows = dict(conn.execute("SELECT key, seq FROM results"))
+    conn.close()
+    # Upgraded rows have seq 0, new rows are numbered from 1
+    assert rows == {6: 0, 11: 0, 1: 1}
+
+    db = DB(path)
+    assert db.get_failure([0, 1]) == "timeout"
+    db.close()
+
+def test_read_only_does_not_upgrade(tmp_path):
+    path = str(tmp_path / "v1.sqlite")
+    _create_v1(path)
+
+    db = DB(path, read_only=True)
+    assert db.get([1, 2]) == [100, 1, 2, 3, 4, 0, 5]
+    assert db.get_failure([2, 3]) is None
+    with pytest.raises(ValueError):
+        db.insert([0, 0], FAILED)
+    db.close()
+
+    assert _columns(path) == (["key", "latency", "util_bram", "util_dsp", "util_ff", "util_lut", "util_uram", "synth_time", "fidelity"], "1")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["v1.sqlite"]
+
+def test_read_only_requires_an_existing_database(tmp_path):
+    path = str(tmp_path / "missing.sqlite")
+
+    with pytest.raises(ValueError):
+        DB(path, read_only=True)
+    assert not (tmp_path / "missing.sqlite").exists()
+
+def _committed(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+    finally:
+        conn.close()
+
+def _wait_committed(path, n, timeout=5):
+    deadline = time.monotonic() + timeout
+    while _committed(path) < n and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return _committed(path)
+
+def test_inserts_are_written_in_batches(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    db = DB(path, radices=[4, 4], batch_size=3, max_delay=60)
+
+    db.insert([0, 1], [100, 1, 2, 3, 4, 0, 5])
+    db.insert([0, 2], [200, 1, 2, 3, 4, 0, 5])
+    # Served from the index before they are written
+    assert db.get([0, 2])[0] == 200
+    time.sleep(0.2)
+    assert _committed(path) == 0
+
+    db.insert([0, 3], [300, 1, 2, 3, 4, 0, 5])
+    assert _wait_committed(path, 3) == 3
+    db.close()
+
+def test_pending_inserts_are_written_after_max_delay(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    db = DB(path, radices=[4, 4], batch_size=100, max_delay=0.2)
+
+    db.insert([1, 1], [100, 1, 2, 3, 4, 0, 5])
+
+    assert _wait_committed(path, 1) == 1
+    db.close()
+
+def test_concurrent_inserts_are_all_written(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    db = DB(path, radices=[8, 50], batch_size=16, max_delay=0.05)
+
+    def insert(a):
+        for b in range(50):
+            db.insert([a, b], [a * 100 + b, 1, 2, 3, 4, 0, 5])
+    threads = [threading.Thread(target=insert, args=(a,)) for a in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # A result synthesized again replaces the pending or written row
+    db.insert([0, 0], [1, 1, 2, 3, 4, 0, 5])
+    db.close()
+
+    db = DB(path, radices=[8, 50])
+    assert len(db.index) == 400
+    assert db.get([7, 49])[0] == 749
+    assert db.get([0, 0])[0] == 1
+    db.close()
+    conn = sqlite3.connect(path)
+    seqs = [row[0] for row in conn.execute("SELECT seq FROM results")]
+    conn.close()
+    assert len(set(seqs)) == 400
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import threading
+
+from modules.distributed import FileBroker, RemoteBackend, Worker
+from modules.failures import FAILURE_LOST
+
+class SleepingProblem():
+    """
+    Runs every job as a long sleep through the worker's supervisor.
+    """
+
+    def __init__(self, supervisor):
+        self.supervisor = supervisor
+
+    def _synthesize(self, x, fidelity):
+        job = self.supervisor.launch(0, ["sleep", "60"])
+        stats = self.supervisor.wait(job, 120)
+        return ([1, 1, 1, 1, 1, 1], fidelity, None if stats.returncode == 0 else "crash")
+
+def _backend(tmp_path, poll_interval=3600):
+    kernel = tmp_path / "kernel.cpp"
+    kernel.write_text("void top() {}\n")
+    # By default the monitor thread stays idle and the tests drive it by hand
+    return RemoteBackend(str(tmp_path / "broker"), str(kernel), ".cpp", "top", [[""]], "xczu7ev-ffvc1156-2-e", "3.33", 10, heartbeat_timeout=10, poll_interval=poll_interval)
+
+def test_cancelled_job_is_killed_and_dropped(tmp_path):
+    root = str(tmp_path / "broker")
+    worker = Worker(root, str(tmp_path / "work"), 1, worker_id="w", poll_interval=0.05)
+    worker.problems["c"] = SleepingProblem(worker.supervisor)
+    worker.broker.push("job", {"campaign_id": "c", "x": [0], "fidelity": 1})
+
+    slot = threading.Thread(target=worker._slot, daemon=True)
+    slot.start()
+    while len(worker.supervisor.active) == 0:
+        time.sleep(0.05)
+
+    worker.broker.cancel("job", "w")
+    start = time.monotonic()
+    worker._cancel()
+    while len(worker.running) > 0:
+        time.sleep(0.05)
+    time.sleep(0.2)
+
+    assert time.monotonic() - start < 10
+    assert worker.done == 0
+    assert os.listdir(worker.broker.done_dir) == []
+    assert worker.broker.cancellations("w") == []
+
+def test_stuck_job_is_requeued_and_cancelled(tmp_path):
+    backend = _backend(tmp_path)
+    try:
+        broker = backend.broker
+        broker.push("job", {"x": [0]})
+        broker.heartbeat("w", {"beat": 1})
+        (job_id, job, claimed_path) = broker.claim("w")
+        backend.waiting[job_id] = True
+        backend.claimed_since[job_id] = time.monotonic() - 100
+
+        backend._requeue_lost()
+
+        assert os.path.exists(os.path.join(broker.pending_dir, "job.json"))
+        assert [job_id for (job_id, path) in broker.cancellations("w")] == ["job"]
+    finally:
+        backend.close()
+
+def test_orphan_results_are_deleted(tmp_path):
+    backend = _backend(tmp_path)
+    try:
+        broker = backend.broker
+        backend.waiting["mine"] = True
+        for job_id in ("mine", "earlier"):
+            with open(os.path.join(broker.done_dir, job_id + ".json"), "w") as f:
+                json.dump({"metrics": [1, 1, 1, 1, 1, 1], "fidelity": 1}, f)
+
+        backend._collect()
+
+        assert os.listdir(broker.done_dir) == []
+        assert backend.results["mine"]["fidelity"] == 1
+    finally:
+        backend.close()
+
+def test_claimed_ignores_cancellations(tmp_path):
+    broker = FileBroker(str(tmp_path))
+    broker.push("job", {"x": [0]})
+    broker.claim("w")
+    broker.cancel("other", "w")
+
+    assert [job_id for (job_id, worker_id, path) in broker.claimed()] == ["job"]
+    assert broker.cancellations("v") == []
+
+def test_jobs_of_a_dead_worker_are_requeued(tmp_path):
+    backend = _backend(tmp_path)
+    try:
+        broker = backend.broker
+        broker.push("job", {"x": [0]})
+        broker.heartbeat("w", {"beat": 1})
+        broker.claim("w")
+        backend.waiting["job"] = True
+
+        backend._requeue_lost()
+        assert broker.claimed() != []
+
+        # The heartbeat has not changed for longer than the heartbeat timeout
+        (beat, seen) = backend.beats["w"]
+        backend.beats["w"] = (beat, seen - 100)
+        backend._requeue_lost()
+
+        assert broker.claimed() == []
+        assert os.path.exists(os.path.join(broker.pending_dir, "job.json"))
+        assert backend.requeues["job"] == 1
+        # A lost worker is not sent a cancellation
+        assert broker.cancellations("w") == []
+    finally:
+        backend.close()
+
+def test_job_lost_too_often_is_reported_as_failed(tmp_path):
+    backend = _backend(tmp_path)
+    backend.max_requeues = 0
+    try:
+        broker = backend.broker
+        broker.push("job", {"x": [0]})
+        broker.claim("w")
+        backend.waiting["job"] = True
+        backend.beats["w"] = (None, time.monotonic() - 100)
+
+        backend._requeue_lost()
+
+        assert backend.results["job"]["failure"] == FAILURE_LOST
+        assert broker.claimed() == []
+    finally:
+        backend.close()
+
+def test_claim_is_exclusive(tmp_path):
+    broker = FileBroker(str(tmp_path))
+    for i in range(20):
+        broker.push("job%02d" % i, {"x": [i]})
+
+    claims = {"a": [], "b": []}
+    def claim_all(worker_id):
+        while True:
+            claimed = broker.claim(worker_id)
+            if claimed is None:
+                return
+            claims[worker_id].append(claimed[0])
+
+    threads = [threading.Thread(target=claim_all, args=(worker_id,)) for worker_id in claims]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claims["a"] + claims["b"]) == ["job%02d" % i for i in range(20)]
+
+class EchoProblem():
+    def _synthesize(self, x, fidelity):
+        return ([10 + x[0], 1, 1, 1, 1, 0], fidelity, None)
+
+def test_round_trip_through_a_worker(tmp_path):
+    backend = _backend(tmp_path, poll_interval=0.05)
+
+    worker = Worker(str(tmp_path / "broker"), str(tmp_path / "work"), 2, worker_id="w", poll_interval=0.05)
+    worker.problems[backend.campaign_id] = EchoProblem()
+    for _ in range(2):
+        threading.Thread(target=worker._slot, daemon=True).start()
+
+    try:
+        results = [backend.synthesize([i], 1) for i in range(4)]
+    finally:
+        backend.close()
+
+    assert results == [([10 + i, 1, 1, 1, 1, 0], 1, None) for i in range(4)]
+    assert os.listdir(backend.broker.done_dir) == []
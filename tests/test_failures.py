@@ -0,0 +1,71 @@
+import signal
+
+import pytest
+
+from modules.failures import classify, RetryPolicy, LOG_HEAD, LOG_TAIL
+from modules.failures import FAILURE_LICENSE, FAILURE_JVM_CRASH, FAILURE_TOOL_CRASH, FAILURE_DISK_FULL, FAILURE_OUT_OF_MEMORY, FAILURE_DESIGN, FAILURE_TIMEOUT, FAILURE_UNKNOWN
+
+@pytest.mark.parametrize("message, category", [
+    ("ERROR: [Common 17-345] A valid license was not found for feature 'HLS'", FAILURE_LICENSE),
+    ("ERROR: Failed to checkout a license", FAILURE_LICENSE),
+    ("ERROR: write failed: No space left on device", FAILURE_DISK_FULL),
+    ("terminate called after throwing an instance of 'std::bad_alloc'", FAILURE_OUT_OF_MEMORY),
+    ("# A fatal error has been detected by the Java Runtime Environment:", FAILURE_JVM_CRASH),
+    ("Abnormal program termination (11)", FAILURE_TOOL_CRASH),
+    ("ERROR: [HLS 214-124] use of undeclared identifier 'x'", FAILURE_DESIGN),
+    ("INFO: [HLS 200-10] Analyzing design file", FAILURE_UNKNOWN)
+])
+def test_classify_log(tmp_path, message, category):
+    log = tmp_path / "vitis_hls.log"
+    log.write_text("INFO: [HLS 200-10] Running\n" + message + "\n")
+
+    assert classify(str(log)) == category
+
+def test_infrastructure_failures_before_design_errors(tmp_path):
+    log = tmp_path / "vitis_hls.log"
+    log.write_text("ERROR: [HLS 200-70] Compilation errors found\nSegmentation fault (core dumped)\n")
+
+    assert classify(str(log), returncode=1) == FAILURE_TOOL_CRASH
+
+def test_classify_outcome(tmp_path):
+    log = tmp_path / "vitis_hls.log"
+    log.write_text("INFO: [HLS 200-10] Running\n")
+
+    assert classify(str(log), returncode=-signal.SIGKILL) == FAILURE_OUT_OF_MEMORY
+    assert classify(str(log), timed_out=True) == FAILURE_TIMEOUT
+    assert classify(str(log), abort_reason="stall") == FAILURE_TIMEOUT
+    assert classify(str(log), returncode=1) == FAILURE_DESIGN
+    assert classify(str(log), returncode=0) == FAILURE_UNKNOWN
+    assert classify(str(tmp_path / "missing.log"), timed_out=True) == FAILURE_TIMEOUT
+
+    (tmp_path / "hs_err_pid1234.log").write_text("")
+    assert classify(str(log), job_dir=str(tmp_path), timed_out=True) == FAILURE_JVM_CRASH
+
+def test_classify_large_log(tmp_path):
+    log = tmp_path / "vitis_hls.log"
+    filler = "INFO: [HLS 200-10] Scheduling\n" * ((LOG_HEAD + LOG_TAIL) // 16)
+
+    # The license checkout is at the beginning of the log
+    log.write_text("ERROR: [Common 17-345] A valid license was not found\n" + filler)
+    assert classify(str(log)) == FAILURE_LICENSE
+
+    # Errors are at the end, the middle is not read
+    log.write_text(filler + "ERROR: [HLS 214-124] use of undeclared identifier 'x'\n")
+    assert classify(str(log)) == FAILURE_DESIGN
+    log.write_text(filler + "ERROR: No space left on device\n" + filler)
+    assert classify(str(log)) == FAILURE_UNKNOWN
+
+def test_retry_policy():
+    policy = RetryPolicy(retries=2, backoff=10, max_backoff=25)
+
+    assert policy.retry(FAILURE_LICENSE, 0)
+    assert policy.retry(FAILURE_OUT_OF_MEMORY, 1)
+    assert not policy.retry(FAILURE_LICENSE, 2)
+    assert not policy.retry(FAILURE_DESIGN, 0)
+    assert not policy.retry(FAILURE_TIMEOUT, 0)
+    assert not policy.retry(None, 0)
+
+    for _ in range(100):
+        assert 5 <= policy.delay(0) <= 10
+        assert 10 <= policy.delay(1) <= 20
+        assert 12.5 <= policy.delay(2) <= 25
@@ -0,0 +1,183 @@
+import time
+import threading
+
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+from modules.hlsDirectiveOptimizationProblem import HLSDirectiveOptimizationProblem, FIDELITY_CSYNTH, FIDELITY_EXPORT
+from modules.failures import RetryPolicy, FAILURE_LICENSE
+from modules.telemetry import Telemetry
+from modules.db import DB
+
+class FakeSynthesis():
+    """
+    _synthesize() of a problem: vector 0 fails its first license checkout, every synthesis takes 0.2 s.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.runs = []
+
+    def __call__(self, x, fidelity, reports=None):
+        with self.lock:
+            self.runs.append((int(x[0]), time.time()))
+            first = sum(1 for (v, t) in self.runs if v == int(x[0])) == 1
+        time.sleep(0.2)
+        if int(x[0]) == 0 and first:
+            return ([0, 101, 101, 101, 101, 101], fidelity, FAILURE_LICENSE)
+        return ([10 + int(x[0]), 1, 1, 1, 1, 0], fidelity, None)
+
+def _problem(retry_policy):
+    # Only the dispatch path is exercised: no kernel, DB or cache
+    problem = HLSDirectiveOptimizationProblem.__new__(HLSDirectiveOptimizationProblem)
+    problem.TELEMETRY = Telemetry()
+    problem.RETRY_POLICY = retry_policy
+    problem.COST_MODEL = None
+    problem.ENGINE = None
+    problem.CACHE = None
+    problem._synthesize = FakeSynthesis()
+    problem._cache_lookup = lambda x, fidelity: (None, None)
+    problem._store = lambda x, metrics, fidelity, synth_time, key=None, reports=None, failure=None: metrics + [synth_time]
+    return problem
+
+def test_backoff_does_not_block_the_slot():
+    # One slot, a backoff of 1 to 2 s after the first failure of vector 0
+    problem = _problem(RetryPolicy(retries=1, backoff=2.0, max_backoff=2.0))
+    pool = ThreadPool(1)
+
+    start = time.time()
+    results = problem._dispatch([[0], [1], [2]], FIDELITY_EXPORT, pool.map)
+    pool.close()
+
+    assert [r[0] for r in results] == [10, 11, 12]
+
+    runs = problem._synthesize.runs
+    assert [v for (v, t) in runs] == [0, 1, 2, 0]
+    # The other jobs ran in the slot right after the failure, not after the backoff
+    assert runs[2][1] - start < 0.8
+    # The retry waited for its backoff
+    assert runs[3][1] - runs[0][1] >= 1.0
+
+def test_retries_are_bounded():
+    problem = _problem(RetryPolicy(retries=0))
+
+    results = problem._dispatch([[0], [1]], FIDELITY_EXPORT, map)
+
+    assert results[0][0:2] == [0, 101]
+    assert results[1][0] == 11
+    assert len(problem._synthesize.runs) == 2
+
+class CountingPolicy():
+    def __init__(self):
+        self.observed = 0
+
+    def observe(self, monitor):
+        self.observed += 1
+
+def test_only_successful_jobs_are_observed(tmp_path):
+    problem = _problem(None)
+    problem.TIMEOUT_POLICY = CountingPolicy()
+    log = tmp_path / "vitis_hls.log"
+    log.write_text("ERROR: [HLS 214-124] use of undeclared identifier 'x'\n")
+    job = {"id": 1, "dir": str(tmp_path), "log_path": str(log), "project_path": str(tmp_path / "project")}
+
+    # A design error exits on its own without a report
+    problem._parse_results = lambda path, fidelity, reports=None: ([0, 101, 101, 101, 101, 101], fidelity)
+    (metrics, fidelity, failure) = problem._job_result(job, FIDELITY_EXPORT, True, None, object(), returncode=1)
+    assert failure == "design_error"
+    assert problem.TIMEOUT_POLICY.observed == 0
+
+    problem._parse_results = lambda path, fidelity, reports=None: ([10, 1, 1, 1, 1, 0], fidelity)
+    (metrics, fidelity, failure) = problem._job_result(job, FIDELITY_EXPORT, True, None, object(), returncode=0)
+    assert failure is None
+    assert problem.TIMEOUT_POLICY.observed == 1
+
+def test_csynth_fidelity_does_not_export():
+    problem = _problem(None)
+
+    csynth = problem._tcl_commands("project", "top", "kernel.cpp", "xczu7ev-ffvc1156-2-e", "3.33", False, FIDELITY_CSYNTH)
+    export = problem._tcl_commands("project", "top", "kernel.cpp", "xczu7ev-ffvc1156-2-e", "3.33", False, FIDELITY_EXPORT)
+
+    assert csynth[-1] == "csynth_design"
+    assert export[-1].startswith("export_design")
+    assert export[:-1] == csynth
+
+class FidelityDB():
+    def __init__(self, fidelities):
+        self.fidelities = fidelities
+
+    def get_fidelity(self, x):
+        return self.fidelities[int(x[0])]
+
+def test_promote_only_exports_lower_fidelity_results():
+    problem = _problem(None)
+    problem.PRUNER = None
+    problem.CANONICALIZER = None
+    problem.DB = FidelityDB({0: FIDELITY_CSYNTH, 1: FIDELITY_EXPORT, 2: FIDELITY_CSYNTH})
+    runs = []
+    problem._synthesize = lambda x, fidelity, reports=None: runs.append((int(x[0]), fidelity)) or ([10, 1, 1, 1, 1, 0], fidelity, None)
+
+    # Duplicates of the front are promoted once
+    promoted = problem.promote(np.array([[0], [1], [2], [2]]), map)
+
+    assert promoted == 2
+    assert sorted(runs) == [(0, FIDELITY_EXPORT), (2, FIDELITY_EXPORT)]
+
+def _batch_problem(db):
+    problem = _problem(None)
+    problem.PRUNER = None
+    problem.CANONICALIZER = None
+    problem.SCREEN = None
+    problem.FIDELITY = FIDELITY_EXPORT
+    problem.DB = db
+    problem.retried = set()
+    runs = []
+    problem._synthesize = lambda x, fidelity, reports=None: runs.append(int(x[0])) or ([10 + int(x[0]), 1, 1, 1, 1, 0], fidelity, None)
+    problem._store = lambda x, metrics, fidelity, synth_time, key=None, reports=None, failure=None: db.insert(x, metrics + [synth_time], fidelity, failure) or metrics + [synth_time]
+    return (problem, runs)
+
+def test_batch_synthesizes_each_miss_once(tmp_path):
+    db = DB(str(tmp_path / "results.sqlite"), radices=[4])
+    db.insert([1], [50, 1, 1, 1, 1, 0, 3], FIDELITY_EXPORT)
+    (problem, runs) = _batch_problem(db)
+
+    (F, G) = problem._evaluate_batch(np.array([[2], [1], [2], [3], [2]]), map)
+
+    # Vector 1 comes from the DB, the duplicates of vector 2 are synthesized once
+    assert sorted(runs) == [2, 3]
+    assert F[:, 0].tolist() == [12, 50, 12, 13, 12]
+    assert F.shape == (5, 6) and G.shape == (5, 5)
+    assert np.all(G == F[:, 1:6] - 100)
+
+    # Everything is stored now: the next batch is served in bulk from the DB
+    problem._evaluate_batch(np.array([[3], [2], [1]]), map)
+    assert sorted(runs) == [2, 3]
+    db.close()
+
+class HalfScreen():
+    """
+    Screen that synthesizes the first candidate and predicts the others.
+    """
+
+    def __init__(self):
+        self.candidates = None
+
+    def screen(self, X):
+        self.candidates = X.tolist()
+        return ([0], {j: [99, 1, 1, 1, 1, 0] for j in range(1, len(X))})
+
+def test_screen_only_sees_the_misses(tmp_path):
+    db = DB(str(tmp_path / "results.sqlite"), radices=[4])
+    db.insert([0], [50, 1, 1, 1, 1, 0, 3], FIDELITY_EXPORT)
+    (problem, runs) = _batch_problem(db)
+    problem.SCREEN = HalfScreen()
+
+    (F, G) = problem._evaluate_batch(np.array([[0], [1], [2], [3]]), map)
+
+    assert problem.SCREEN.candidates == [[1], [2], [3]]
+    assert runs == [1]
+    assert F[:, 0].tolist() == [50, 11, 99, 99]
+    # Predictions are not stored
+    assert db.get_many([[1], [2], [3]])[1:] == [None, None]
+    db.close()
@@ -0,0 +1,106 @@
+import pytest
+
+from modules.kernelTemplate import KernelTemplate
+
+# Ten action points: L1 must not match L10, labels in comments and strings are not action points
+KERNEL = """#include <cstdio>
+
+static void helper(int x[8]) {
+L10:    int y[8];
+L2: COPY: for (int i = 0; i < 8; i++) {
+        y[i] = x[i]; // L3: not here
+    }
+}
+
+extern "C" {
+void top(int a[8]) {
+L1: LOAD: for (int i = 0; i < 8; i++) {
+L3:     for (int j = 0; j < 2; j++) {
+            printf("L4: not here\\n");
+        }
+    }
+    /* L5: not here */
+L4: int b[8];
+L5: int c[8];
+L6: int d[8];
+L7: int e[8];
+L8: int f[8];
+L9: while (a[0] > 0) { a[0]--; }
+    helper(a);
+}
+}
+"""
+
+DIRECTIVES = [
+    "#pragma HLS pipeline II=2",
+    "#pragma HLS unroll factor=2",
+    "#pragma HLS unroll",
+    "#pragma HLS array_partition variable=b cyclic factor=2 dim=1",
+    "",
+    "",
+    "",
+    "",
+    "#pragma HLS pipeline",
+    "#pragma HLS array_partition variable=y complete dim=1"
+]
+
+def _template(tmp_path, kernel=KERNEL, n_labels=10):
+    source = tmp_path / "kernel.cpp"
+    source.write_text(kernel)
+    return KernelTemplate(str(source), n_labels)
+
+def _inserted_after(rendered, line):
+    lines = rendered.split("\n")
+    return lines[lines.index(line) + 1]
+
+def test_render(tmp_path):
+    template = _template(tmp_path)
+
+    rendered = template.render(DIRECTIVES)
+
+    assert _inserted_after(rendered, "L1: LOAD: for (int i = 0; i < 8; i++) {") == DIRECTIVES[0]
+    assert _inserted_after(rendered, "L10:    int y[8];") == DIRECTIVES[9]
+    assert _inserted_after(rendered, "L2: COPY: for (int i = 0; i < 8; i++) {") == DIRECTIVES[1]
+    assert _inserted_after(rendered, "L3:     for (int j = 0; j < 2; j++) {") == DIRECTIVES[2]
+    assert _inserted_after(rendered, "L9: while (a[0] > 0) { a[0]--; }") == DIRECTIVES[8]
+    # Nothing is inserted after the labels in comments and strings
+    assert _inserted_after(rendered, "        y[i] = x[i]; // L3: not here") == "    }"
+    assert rendered.count("\n") == KERNEL.count("\n") + len(DIRECTIVES)
+
+def test_render_without_directives_keeps_the_source(tmp_path):
+    template = _template(tmp_path)
+
+    rendered = template.render([""] * 10)
+
+    assert rendered.replace("\n\n", "\n") == KERNEL.replace("\n\n", "\n")
+
+def test_labels_are_checked(tmp_path):
+    with pytest.raises(ValueError, match="L11"):
+        _template(tmp_path, n_labels=11)
+
+    with pytest.raises(ValueError, match="more than once"):
+        _template(tmp_path, KERNEL.replace("L8: int f[8];", "L7: int f[8];"), n_labels=7)
+
+def test_tcl_commands(tmp_path):
+    template = _template(tmp_path)
+    directives = DIRECTIVES[0:4] + ["#pragma HLS array_partition variable=" + v + " complete dim=1" for v in "cdef"] + DIRECTIVES[8:10]
+
+    commands = template.tcl_commands(directives)
+
+    assert commands[0] == 'set_directive_pipeline -II 2 "top/LOAD"'
+    assert commands[1] == 'set_directive_unroll -factor 2 "helper/COPY"'
+    # A loop without a name of its own is named by its action point label
+    assert commands[2] == 'set_directive_unroll "top/L3"'
+    assert commands[3] == 'set_directive_array_partition -type cyclic -factor 2 -dim 1 "top" b'
+    assert commands[8] == 'set_directive_pipeline "top/L9"'
+    assert commands[9] == 'set_directive_array_partition -type complete -dim 1 "helper" y'
+
+    # L4 is not a loop
+    with pytest.raises(ValueError):
+        template.tcl_commands(directives[0:3] + ["#pragma HLS pipeline"] + directives[4:])
+
+def test_digest(tmp_path):
+    template = _template(tmp_path)
+
+    assert template.digest(DIRECTIVES) == template.digest(list(DIRECTIVES))
+    assert template.digest(DIRECTIVES) != template.digest([""] * 10)
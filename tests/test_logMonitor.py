@@ -0,0 +1,104 @@
+import json
+import time
+
+from modules.logMonitor import LogMonitor, AdaptiveTimeout
+from modules.supervisor import ProcessSupervisor
+
+def test_fatal_message_split_across_polls(tmp_path):
+    log = tmp_path / "vitis_hls.log"
+    log.write_text("INFO: [HLS 200-10] Analyzing design file\nERR")
+    monitor = LogMonitor(str(log))
+
+    assert not monitor.check()
+    with open(str(log), "a") as f:
+        f.write("OR: [HLS 207-812] 'x' was not declared\n")
+
+    assert monitor.check()
+    assert monitor.reason == "fatal"
+    assert monitor.message == "ERROR: [HLS 207-812] 'x' was not declared"
+
+def test_paused_time_is_not_a_stall(tmp_path):
+    log = tmp_path / "vitis_hls.log"
+    log.write_text("INFO: [HLS 200-10] Analyzing design file\n")
+    monitor = LogMonitor(str(log), stall_timeout=0.5)
+    assert not monitor.check()
+
+    time.sleep(0.8)
+    # Paused by the admission scheduler for the whole silence
+    assert not monitor.check(paused_time=0.8)
+    assert monitor.check(paused_time=0.1)
+    assert monitor.reason == "stall"
+
+def _solution_data(project, lut):
+    solution = project / "solution1"
+    solution.mkdir(parents=True)
+    area = {"UTIL_BRAM": "3", "UTIL_DSP": "~0", "UTIL_FF": "10", "UTIL_LUT": str(lut), "UTIL_URAM": "0"}
+    (solution / "solution1_data.json").write_text(json.dumps({"ModuleInfo": {"Metrics": {"top": {"Area": area}}}}))
+
+def test_infeasible_estimate_aborts(tmp_path):
+    log = tmp_path / "vitis_hls.log"
+    log.write_text("")
+    feasible = LogMonitor(str(log), str(tmp_path / "a"), "top", check_infeasible=True)
+    infeasible = LogMonitor(str(log), str(tmp_path / "b"), "top", check_infeasible=True)
+
+    # No estimate yet
+    assert not infeasible.check()
+
+    _solution_data(tmp_path / "a", 80)
+    _solution_data(tmp_path / "b", 140)
+    assert not feasible.check()
+    assert infeasible.check()
+    assert infeasible.reason == "infeasible"
+
+def test_stalled_synthesis_is_aborted(tmp_path, stub_vitis_hls, monkeypatch):
+    monkeypatch.setenv("VITIS_HLS_STUB_DELAY", "60")
+    source = tmp_path / "kernel.cpp"
+    source.write_text("void top() {}\n")
+    script = tmp_path / "script.tcl"
+    script.write_text("open_project %s\nset_top top\nadd_files %s\nopen_solution solution1\ncsynth_design\nexit\n" % (tmp_path / "project", source))
+    log = tmp_path / "vitis_hls.log"
+    supervisor = ProcessSupervisor()
+
+    start = time.monotonic()
+    job = supervisor.launch(1, ["vitis_hls", "-f", str(script), "-l", str(log)])
+    stats = supervisor.wait(job, 60, monitor=LogMonitor(str(log), stall_timeout=1, interval=0.2))
+
+    assert time.monotonic() - start < 10
+    assert stats.abort_reason == "stall"
+    assert not stats.timed_out
+
+class FakeDB():
+    def __init__(self, index):
+        self.index = index
+
+def _entry(synth_time, fidelity=1, failed=False):
+    if failed:
+        return (0, 101, 101, 101, 101, 101, synth_time, fidelity)
+    return (100, 1, 1, 1, 1, 0, synth_time, fidelity)
+
+def test_adaptive_timeout_per_fidelity():
+    index = {i: _entry(100 + i) for i in range(10)}
+    index.update({100 + i: _entry(5000, failed=True) for i in range(5)})
+    index.update({200 + i: _entry(400, fidelity=2) for i in range(3)})
+    policy = AdaptiveTimeout(FakeDB(index), 3600, quantile=1.0, factor=3.0, min_timeout=60)
+
+    # Failures are left out; too few export samples keep the user timeout
+    assert policy.timeout(1) == 3 * 109
+    assert policy.timeout(2) == 3600
+
+    index.update({300 + i: _entry(2000) for i in range(10)})
+    assert policy.timeout(1) == 3600
+
+def test_stall_limit_is_learned():
+    policy = AdaptiveTimeout(None, 3600, min_samples=3, stall_factor=5.0, min_stall=30)
+    monitor = LogMonitor("unused.log")
+
+    assert policy.timeout(1) == 3600
+    for gap in (2.0, 10.0):
+        monitor.max_gap = gap
+        policy.observe(monitor)
+    assert policy.stall_timeout() is None
+
+    monitor.max_gap = 4.0
+    policy.observe(monitor)
+    assert policy.stall_timeout() == 50.0
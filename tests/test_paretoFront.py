@@ -0,0 +1,80 @@
+import numpy as np
+
+from modules.db import DB
+from modules.paretoFront import ParetoFront, non_dominated, SWEEP_BLOCK
+
+def _brute_force(F):
+    F = np.asarray(F, dtype=float)
+    return [i for i in range(len(F)) if not any(np.all(g <= F[i]) and np.any(g < F[i]) for g in F)]
+
+def test_non_dominated():
+    rng = np.random.default_rng(0)
+    for (n, m) in [(1, 2), (10, 2), (100, 3), (3 * SWEEP_BLOCK + 7, 2), (600, 4)]:
+        F = rng.integers(0, 20, size=(n, m))
+        assert non_dominated(F).tolist() == _brute_force(F)
+
+def test_non_dominated_keeps_equal_rows():
+    F = [[1, 2], [1, 2], [2, 1], [2, 2]]
+
+    assert non_dominated(F).tolist() == [0, 1, 2]
+
+def test_non_dominated_empty():
+    assert non_dominated(np.zeros((0, 3))).tolist() == []
+
+def _random_metrics(rng):
+    return [float(rng.integers(1, 1000))] + rng.integers(0, 60, size=5).tolist() + [1]
+
+def test_incremental_update_matches_a_full_load(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    rng = np.random.default_rng(1)
+
+    db = DB(path, radices=[20, 20])
+    for _ in range(50):
+        db.insert(rng.integers(0, 20, size=2), _random_metrics(rng))
+    db.flush()
+
+    front = ParetoFront(path)
+    for _ in range(10):
+        for _ in range(15):
+            x = rng.integers(0, 20, size=2)
+            kind = rng.integers(0, 4)
+            if kind == 0:
+                db.insert(x, [0, 101, 101, 101, 101, 101, 3], failure="design_error")
+            elif kind == 1:
+                db.insert(x, [10, 120, 0, 0, 0, 0, 3])
+            else:
+                db.insert(x, _random_metrics(rng))
+        db.flush()
+
+        (added, removed) = front.update()
+        reference = ParetoFront(path)
+        assert front.front == reference.front
+        assert front.points == reference.points
+        assert set(added) <= front.front
+        assert not (set(removed) - set(added)) & front.front
+        reference.close()
+
+    # Failed and infeasible points never enter the front
+    for row in front.rows():
+        assert row["latency"] > 0 and max(row[name] for name in ["util_bram", "util_dsp", "util_ff", "util_lut", "util_uram"]) <= 100
+
+    front.close()
+    db.close()
+
+def test_update_without_changes(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    db = DB(path, radices=[4, 4])
+    db.insert([1, 1], [10, 1, 1, 1, 1, 0, 1])
+    db.flush()
+
+    front = ParetoFront(path)
+    assert front.update() == ([], [])
+    assert [row["x"] for row in front.rows()] == [[1, 1]]
+
+    # A dominating point replaces the front member
+    db.insert([2, 2], [5, 1, 1, 1, 1, 0, 1])
+    db.flush()
+    assert front.update() == ([db.codec.encode([2, 2])], [db.codec.encode([1, 1])])
+
+    front.close()
+    db.close()
@@ -0,0 +1,118 @@
+import math
+
+import numpy as np
+
+from modules.db import DB
+from modules.pruning import SpacePruner, option_family, array_accesses
+
+DEVICE = "xczu7ev-ffvc1156-2-e"
+
+KERNEL = """void top(int a[64]) {
+L3: int buf[64];
+L1: for (int i = 0; i < 16; i++) {
+L2:     for (int j = 0; j < 4; j++) {
+            buf[i * 4 + j] = a[i * 4 + j];
+        }
+    }
+}
+"""
+
+INFO = """header
+L1,loop,16
+L2,loop,4
+L3,array,buf,1,64
+"""
+
+DIRECTIVES = [
+    ["", "#pragma HLS pipeline"],
+    ["", "#pragma HLS unroll factor=2", "#pragma HLS unroll"],
+    ["",
+     "#pragma HLS array_partition variable=buf block factor=2 dim=1",
+     "#pragma HLS array_partition variable=buf cyclic factor=4 dim=1",
+     "#pragma HLS array_partition variable=buf cyclic factor=8 dim=1",
+     "#pragma HLS array_partition variable=buf cyclic factor=1024 dim=1",
+     "#pragma HLS array_partition variable=buf complete dim=1"]
+]
+
+def _files(tmp_path, kernel=KERNEL):
+    source = tmp_path / "kernel.cpp"
+    source.write_text(kernel)
+    kernel_info = tmp_path / "kernel_info.txt"
+    kernel_info.write_text(INFO)
+    return (str(source), str(kernel_info))
+
+def test_option_family():
+    assert option_family("#pragma HLS unroll factor=4") == ("unroll", 4)
+    assert option_family("#pragma HLS unroll") == ("unroll", math.inf)
+    assert option_family(DIRECTIVES[2][3]) == ("partition dim=1", 8)
+    assert option_family(DIRECTIVES[2][5]) == ("partition dim=1", math.inf)
+    assert option_family("#pragma HLS pipeline") is None
+
+def test_array_accesses():
+    assert array_accesses(KERNEL, "buf", 3, {1, 2}) == [[1, 2]]
+    # Passed to a function: the accesses are unknown
+    assert array_accesses(KERNEL.replace("    }\n}", "    }\n    sink(buf);\n}"), "buf", 3, {1, 2}) is None
+
+def test_device_and_coupling(tmp_path, capsys):
+    (source, kernel_info) = _files(tmp_path)
+    pruner = SpacePruner(DIRECTIVES)
+
+    kept = pruner.prune(DEVICE, source, kernel_info)
+
+    # 1024 banks exceed the BRAM of the device, 8 banks exceed the 4 parallel accesses of the loops
+    assert kept == [[0, 1], [0, 1, 2], [0, 1, 2, 5]]
+    assert "2 options removed (coupling = 1, device = 1)" in capsys.readouterr().out
+
+def test_coupling_keeps_escaping_arrays(tmp_path):
+    (source, kernel_info) = _files(tmp_path, KERNEL.replace("    }\n}", "    }\n    sink(buf);\n}"))
+    pruner = SpacePruner(DIRECTIVES)
+
+    kept = pruner.prune("unknown-device", source, kernel_info)
+
+    assert kept == [[0, 1], [0, 1, 2], [0, 1, 2, 3, 4, 5]]
+
+def _evidence(tmp_path):
+    path = str(tmp_path / "evidence.sqlite")
+    db = DB(path, radices=[len(options) for options in DIRECTIVES], metadata={"device_id": DEVICE, "directives": DIRECTIVES})
+    for a in range(2):
+        for c in range(3):
+            # A full unroll of L2 never fits, the other options do
+            db.insert([a, 2, c], [100, 150, 10, 10, 10, 0, 1])
+            db.insert([a, 0, c], [400, 10, 10, 10, 10, 0, 1])
+            db.insert([a, 1, c], [200, 10, 10, 10, 10, 0, 1])
+    db.close()
+    return path
+
+def test_evidence(tmp_path):
+    (source, kernel_info) = _files(tmp_path)
+    evidence = _evidence(tmp_path)
+
+    kept = SpacePruner(DIRECTIVES).prune(DEVICE, source, kernel_info, [evidence], min_samples=5)
+    assert kept[1] == [0, 1]
+
+    # Too few samples of the option
+    kept = SpacePruner(DIRECTIVES).prune(DEVICE, source, kernel_info, [evidence], min_samples=10)
+    assert kept[1] == [0, 1, 2]
+
+def test_expand_and_reduce(tmp_path):
+    pruner = SpacePruner(DIRECTIVES, kept=[[0, 1], [0, 2], [0, 3, 5]])
+
+    (n_var, xl, xu) = pruner.bounds()
+    assert n_var == 3
+    assert xl.tolist() == [0, 0, 0]
+    assert xu.tolist() == [1, 1, 2]
+
+    X = np.array([[1, 1, 2], [0, 0, 1]])
+    F = pruner.expand(X)
+    assert F.tolist() == [[1, 2, 5], [0, 0, 3]]
+
+    # Vectors with a pruned option are dropped
+    (R, rows) = pruner.reduce(np.vstack([F, [[0, 1, 0]]]))
+    assert R.tolist() == X.tolist()
+    assert rows == [0, 1]
+
+    path = str(tmp_path / "prune.json")
+    pruner.save(path)
+    restored = SpacePruner(DIRECTIVES)
+    restored.load(path)
+    assert restored.kept == pruner.kept
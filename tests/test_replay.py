@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import subprocess
+
+from modules.db import DB
+from modules.surrogate import FAILED_METRICS
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DIRECTIVES = [["#pragma HLS pipeline", "#pragma HLS unroll factor=2", "#pragma HLS unroll"], ["#pragma HLS pipeline", "#pragma HLS unroll"]]
+
+KERNEL = """void top(int a[8], int b[8]) {
+L1: for (int i = 0; i < 8; i++) {
+%s
+    a[i] += 1;
+  }
+L2: for (int i = 0; i < 8; i++) {
+%s
+    b[i] += a[i];
+  }
+}
+"""
+
+def _recorded(tmp_path):
+    path = str(tmp_path / "recorded.sqlite")
+    db = DB(path, radices=[3, 2], metadata={"device_id": "xczu7ev-ffvc1156-2-e", "clock_period": "10", "directives": DIRECTIVES})
+    db.insert([1, 0], [0.5, 3, 2, 4, 9, 0, 120], fidelity=1)
+    db.insert([2, 1], FAILED_METRICS + [30], fidelity=1, failure="design_error")
+    db.close()
+    return path
+
+def _replay(tmp_path, recorded, x, name):
+    source = tmp_path / (name + ".cpp")
+    source.write_text(KERNEL % (DIRECTIVES[0][x[0]], DIRECTIVES[1][x[1]]))
+    project = tmp_path / name
+    script = tmp_path / (name + ".tcl")
+    script.write_text("open_project %s\nset_top top\nadd_files %s\nopen_solution solution1\ncreate_clock -period 10\ncsynth_design\nexit\n" % (project, source))
+
+    env = dict(os.environ)
+    env["PATH"] = os.path.join(REPO_DIR, "stubs") + os.pathsep + env.get("PATH", "")
+    env["VITIS_HLS_STUB_REPLAY_DB"] = recorded
+    env["VITIS_HLS_STUB_TIME_SCALE"] = "0"
+    env["VITIS_HLS_STUB_TRACE"] = str(tmp_path / "trace.jsonl")
+    output = subprocess.run(["vitis_hls", "-f", str(script)], env=env, stdout=subprocess.PIPE, universal_newlines=True, timeout=60).stdout
+
+    data = project / "solution1" / "solution1_data.json"
+    if not data.is_file():
+        return (output, None)
+    with open(str(data)) as f:
+        return (output, json.load(f))
+
+def test_recorded_vector_is_replayed(tmp_path):
+    recorded = _recorded(tmp_path)
+
+    (output, data) = _replay(tmp_path, recorded, [1, 0], "exact")
+
+    assert "nearest" not in output
+    # The DB stores the latency in ms (cycles * period / 10^6)
+    assert data["ClockInfo"]["Latency"] == "50000"
+    assert data["ModuleInfo"]["Metrics"]["top"]["Area"]["UTIL_LUT"] == "9"
+    with open(str(tmp_path / "trace.jsonl")) as f:
+        trace = [json.loads(line) for line in f]
+    assert [(r["phase"], r["metrics"]) for r in trace] == [("csynth", [0.5, 3, 2, 4, 9, 0])]
+
+def test_unrecorded_vector_gets_the_nearest_entry(tmp_path):
+    recorded = _recorded(tmp_path)
+
+    (output, data) = _replay(tmp_path, recorded, [0, 0], "nearest")
+
+    assert "nearest recorded configuration (1 directive(s) differ)" in output
+    assert data["ModuleInfo"]["Metrics"]["top"]["Area"]["UTIL_LUT"] == "9"
+
+def test_recorded_failure_fails_again(tmp_path):
+    recorded = _recorded(tmp_path)
+
+    (output, data) = _replay(tmp_path, recorded, [2, 1], "failure")
+
+    assert "ERROR: [HLS 200-70] Replay: recorded synthesis failure." in output
+    assert data is None
+
+def test_suite_reports_every_scenario(tmp_path):
+    application = os.path.join(REPO_DIR, "Applications", "RodiniaHLS-KNN-Baseline")
+    output_json = tmp_path / "replay.json"
+
+    result = subprocess.run([
+        sys.executable, os.path.join(REPO_DIR, "benchmarks", "replay_suite.py"),
+        "--DB_PATH", os.path.join(REPO_DIR, "Databases", "RodiniaHLS-KNN-Baseline_xczu7ev-ffvc1156-2-e_10.sqlite"),
+        "--INPUT_SOURCE_PATH", os.path.join(application, "knn.cpp"),
+        "--INPUT_SOURCE_INFO_PATH", os.path.join(application, "kernel_info.txt"),
+        "--CONFIGS", os.path.join(REPO_DIR, "OperatorConfigurations", "config_01.json"),
+        "--THREADS", "1", "4",
+        "--GENERATIONS", "2",
+        "--TIME_SCALE", "0.001",
+        "--OUTPUT_JSON", str(output_json)
+    ], cwd=str(tmp_path), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, timeout=600)
+    assert result.returncode == 0, result.stdout
+
+    with open(str(output_json)) as f:
+        scenarios = json.load(f)["scenarios"]
+    assert [s["threads"] for s in scenarios] == [1, 4]
+    for s in scenarios:
+        assert 0 < s["syntheses"] <= s["evaluations"]
+        assert 0.0 <= s["idle_fraction"] <= 1.0
+        assert len(s["hypervolume"]) == 4
+        assert s["hypervolume"] == sorted(s["hypervolume"])
+        assert s["hypervolume"][-1] <= 100.0 + 1e-6
+    # The runs happen in scratch directories, nothing is left in the working directory
+    assert sorted(os.listdir(str(tmp_path))) == ["replay.json"]
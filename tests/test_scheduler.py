@@ -0,0 +1,96 @@
+import json
+import time
+import threading
+
+import psutil
+
+from modules.scheduler import AdmissionScheduler
+from modules.supervisor import ProcessSupervisor
+
+class FakeJob():
+    def __init__(self, pid):
+        self.pid = pid
+        self.job_id = pid
+        self.start_time = 0.0
+        self.paused_since = None
+        self.paused_time = 0.0
+
+def test_license_cap_without_memory_control():
+    scheduler = AdmissionScheduler(memory_limit=0, licenses=1, default_estimate=10**9, sample_interval=0.05)
+
+    # The huge estimate is ignored without memory control
+    scheduler.admit("k")
+    scheduler.started(FakeJob(1), "k")
+
+    admitted = threading.Event()
+    thread = threading.Thread(target=lambda: (scheduler.admit("k"), admitted.set()))
+    thread.start()
+    assert not admitted.wait(0.3)
+
+    scheduler.finished(FakeJob(1))
+    assert admitted.wait(2)
+    thread.join()
+    scheduler.cancel("k")
+    scheduler.close()
+
+def test_estimates_are_replaced_atomically(tmp_path):
+    path = tmp_path / "memory_estimates.json"
+    path.write_text(json.dumps({"top@dev": 100.0}))
+
+    scheduler = AdmissionScheduler(memory_limit=0, estimates_path=str(path))
+    assert scheduler.estimate("top@dev") == 100.0
+    scheduler.estimates["other@dev"] = 200.0
+    scheduler.close()
+
+    assert json.loads(path.read_text()) == {"top@dev": 100.0, "other@dev": 200.0}
+    # No temporary file is left behind
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["memory_estimates.json"]
+
+def test_first_job_is_always_admitted():
+    # Far more memory than the host has: only one job at a time
+    scheduler = AdmissionScheduler(memory_limit=0.9, default_estimate=10**9, sample_interval=0.05)
+
+    scheduler.admit("k")
+    scheduler.started(FakeJob(1), "k")
+    with scheduler.cond:
+        assert not scheduler._can_admit("k")
+
+    scheduler.finished(FakeJob(1))
+    with scheduler.cond:
+        assert scheduler._can_admit("k")
+    scheduler.close()
+
+def test_estimates_are_a_moving_average_of_the_peak_rss():
+    scheduler = AdmissionScheduler(memory_limit=0, alpha=0.3, default_estimate=4096)
+
+    for (pid, peak_rss) in ((1, 100.0), (2, 200.0)):
+        scheduler.admit("k")
+        scheduler.started(FakeJob(pid), "k")
+        scheduler.running[pid].peak_rss = peak_rss
+        scheduler.finished(FakeJob(pid))
+
+    assert abs(scheduler.estimate("k") - (0.7 * 100.0 + 0.3 * 200.0)) < 1e-9
+    assert scheduler.estimate("other") == 4096
+    scheduler.close()
+
+def test_paused_job_is_stopped_and_its_paused_time_counted():
+    scheduler = AdmissionScheduler(memory_limit=0, sample_interval=0.05)
+    supervisor = ProcessSupervisor(scheduler=scheduler)
+
+    job = supervisor.launch(1, ["sleep", "60"], key="k")
+    entry = scheduler.running[job.pid]
+    with scheduler.cond:
+        scheduler._pause(entry)
+    time.sleep(0.3)
+    assert psutil.Process(job.pid).status() == psutil.STATUS_STOPPED
+
+    with scheduler.cond:
+        scheduler._resume(entry)
+    assert job.paused_since is None
+    assert job.paused_time >= 0.3
+    assert psutil.Process(job.pid).status() != psutil.STATUS_STOPPED
+
+    supervisor.kill_all()
+    supervisor.wait(job, 1)
+    assert len(scheduler.running) == 0
+    scheduler.close()
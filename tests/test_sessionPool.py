@@ -0,0 +1,69 @@
+from modules.supervisor import ProcessSupervisor
+from modules.sessionPool import SessionPool
+
+class RecordingScheduler():
+    """
+    Admits every job and records the keys.
+    """
+
+    def __init__(self):
+        self.admitted = []
+        self.running = {}
+
+    def admit(self, key):
+        self.admitted.append(key)
+
+    def started(self, job, key):
+        self.running[job.pid] = key
+
+    def cancel(self, key):
+        pass
+
+    def finished(self, job):
+        self.running.pop(job.pid, None)
+        return job
+
+def test_sessions_are_admitted(tmp_path, stub_vitis_hls):
+    scheduler = RecordingScheduler()
+    pool = SessionPool(1, 50, ProcessSupervisor(scheduler=scheduler), log_dir=str(tmp_path))
+
+    for job_id in (1, 2):
+        assert pool.run(("xczu7ev-ffvc1156-2-e", "3.33"), job_id, ['puts "job %d"' % job_id], str(tmp_path / ("job_%d.log" % job_id)), 30, admission_key="top@xczu7ev-ffvc1156-2-e")
+
+    # One session served both jobs and holds its admission until it is closed
+    assert scheduler.admitted == ["top@xczu7ev-ffvc1156-2-e"]
+    assert len(scheduler.running) == 1
+    pool.close()
+    assert len(scheduler.running) == 0
+
+    assert "job 2" in (tmp_path / "job_2.log").read_text()
+    assert (tmp_path / "vitis_hls_session_1.log").is_file()
+
+KEY = ("xczu7ev-ffvc1156-2-e", "3.33")
+
+def test_sessions_are_recycled_after_max_jobs(tmp_path, stub_vitis_hls):
+    pool = SessionPool(1, 2, ProcessSupervisor(), log_dir=str(tmp_path))
+
+    for job_id in range(3):
+        assert pool.run(KEY, job_id, ['puts "job %d"' % job_id], str(tmp_path / "job.log"), 30)
+    pool.close()
+
+    assert pool.n_created == 2
+    assert pool.n_alive == 0
+
+def test_timed_out_session_is_killed_and_replaced(tmp_path, stub_vitis_hls, monkeypatch):
+    monkeypatch.setenv("VITIS_HLS_STUB_DELAY", "60")
+    source = tmp_path / "kernel.cpp"
+    source.write_text("void top() {}\n")
+    supervisor = ProcessSupervisor()
+    pool = SessionPool(1, 50, supervisor, log_dir=str(tmp_path))
+
+    commands = ["open_project " + str(tmp_path / "p"), "set_top top", "add_files " + str(source), "csynth_design"]
+    assert not pool.run(KEY, 1, commands, str(tmp_path / "job_1.log"), 1)
+
+    # The stuck session was killed, the next job gets a new one
+    assert pool.n_alive == 0
+    assert len(supervisor.active) == 0
+    assert pool.run(KEY, 2, ['puts "job 2"'], str(tmp_path / "job_2.log"), 30)
+    assert pool.n_created == 2
+    pool.close()
@@ -0,0 +1,84 @@
+import threading
+
+import numpy as np
+
+from multiprocessing.pool import ThreadPool
+
+from pymoo.core.problem import Problem
+from pymoo.factory import get_sampling, get_crossover, get_mutation, get_selection
+
+from modules.steadyStateNSGA2 import SteadyStateNSGA2
+
+class ToyProblem(Problem):
+    """
+    Two conflicting objectives of integer vectors; the first evaluation is a straggler
+    that only completes once enough of the later ones have.
+    """
+
+    def __init__(self, n_others):
+        super().__init__(n_var=3, n_obj=2, n_constr=1, xl=0, xu=7)
+        self.n_others = n_others
+        self.lock = threading.Lock()
+        self.n_started = 0
+        self.n_done = 0
+        self.released = threading.Event()
+        self.straggler_waited = None
+
+    def _evaluate_batch(self, X, runner):
+        with self.lock:
+            self.n_started += 1
+            straggler = self.n_started == 1
+
+        if straggler:
+            self.straggler_waited = self.released.wait(30)
+        else:
+            with self.lock:
+                self.n_done += 1
+                if self.n_done >= self.n_others:
+                    self.released.set()
+
+        F = np.column_stack([X.sum(axis=1), (7 - X).sum(axis=1)]).astype(float)
+        G = -np.ones((len(X), 1))
+        return (F, G)
+
+def _driver(problem, pool, n_workers, n_max_evals):
+    return SteadyStateNSGA2(
+        problem,
+        pool,
+        n_workers,
+        8,
+        get_sampling("int_random"),
+        get_selection("random"),
+        get_crossover("int_sbx"),
+        get_mutation("int_pm"),
+        n_max_evals,
+        report_interval=1000
+    )
+
+def test_straggler_does_not_block_the_other_slots():
+    problem = ToyProblem(n_others=10)
+    pool = ThreadPool(2)
+    try:
+        res = _driver(problem, pool, 2, 20).run()
+    finally:
+        pool.close()
+
+    # The second slot completed ten evaluations while the first one was busy
+    assert problem.straggler_waited
+    assert res.algorithm.n_eval == 20
+    assert problem.n_started == 20
+
+def test_result_is_the_feasible_front_of_the_archive():
+    problem = ToyProblem(n_others=0)
+    problem.released.set()
+    pool = ThreadPool(4)
+    try:
+        res = _driver(problem, pool, 4, 40).run()
+    finally:
+        pool.close()
+
+    assert len(res.pop) == 8
+    assert len(res.X) > 0
+    # No point of the result dominates another one
+    for f in res.F:
+        assert not any(np.all(g <= f) and np.any(g < f) for g in res.F)
@@ -0,0 +1,87 @@
+import time
+import subprocess
+
+import psutil
+
+from modules.supervisor import ProcessSupervisor
+
+def _gone(pid, timeout=5):
+    """
+    Whether a process is dead (killed processes may linger as zombies until reaped).
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if psutil.Process(pid).status() == psutil.STATUS_ZOMBIE:
+                return True
+        except psutil.NoSuchProcess:
+            return True
+        time.sleep(0.05)
+    return False
+
+def _background_pid(job):
+    return int(job.process.stdout.readline())
+
+def test_exit_code_and_statistics():
+    supervisor = ProcessSupervisor()
+
+    stats = supervisor.run(7, ["sh", "-c", "exit 3"], 30)
+
+    assert stats.job_id == 7
+    assert stats.returncode == 3
+    assert stats.finished()
+    assert not stats.timed_out
+    assert len(supervisor.active) == 0
+    assert supervisor.history == [stats]
+
+def test_timeout_kills_the_process_group():
+    supervisor = ProcessSupervisor()
+
+    start = time.monotonic()
+    job = supervisor.launch(1, ["sh", "-c", "sleep 60 & echo $!; wait"], stdout=subprocess.PIPE)
+    background = _background_pid(job)
+    stats = supervisor.wait(job, 1)
+
+    assert time.monotonic() - start < 10
+    assert stats.timed_out
+    assert stats.returncode is None
+    assert not stats.finished()
+    assert _gone(background)
+
+def test_leftovers_of_a_finished_job_are_killed():
+    supervisor = ProcessSupervisor()
+
+    job = supervisor.launch(1, ["sh", "-c", "sleep 60 & echo $!"], stdout=subprocess.PIPE)
+    background = _background_pid(job)
+    stats = supervisor.wait(job, 30)
+
+    assert stats.finished()
+    assert stats.returncode == 0
+    assert _gone(background)
+
+def test_paused_time_extends_the_deadline():
+    supervisor = ProcessSupervisor()
+
+    job = supervisor.launch(1, ["sleep", "60"])
+    # As if the admission scheduler had paused the job for a minute
+    job.paused_time = 60
+    assert job.deadline(1) - job.start_time == 61
+
+    supervisor.kill_all()
+    stats = supervisor.wait(job, 1)
+    assert stats.returncode is not None
+
+def test_kill_thread_only_kills_the_jobs_of_the_thread():
+    supervisor = ProcessSupervisor()
+
+    mine = supervisor.launch(1, ["sleep", "60"])
+    other = supervisor.launch(2, ["sleep", "60"])
+    other.thread = -1
+
+    supervisor.kill_thread(mine.thread)
+
+    assert _gone(mine.pid)
+    assert not _gone(other.pid, timeout=0.5)
+    supervisor.kill_all()
+    for job in (mine, other):
+        supervisor.wait(job, 1)
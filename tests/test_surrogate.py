@@ -0,0 +1,81 @@
+import numpy as np
+
+from modules.surrogate import Surrogate, SurrogateScreen, directive_features, _ranks, FAILED_METRICS
+
+DIRECTIVES = [
+    ["", "#pragma HLS unroll factor=2", "#pragma HLS unroll factor=4", "#pragma HLS unroll"],
+    ["", "#pragma HLS pipeline", "#pragma HLS array_partition variable=a cyclic factor=2 dim=1", "#pragma HLS array_partition variable=a complete dim=1"]
+]
+
+def _metrics(x):
+    # Unrolling trades latency for LUTs; the complete partition never fits
+    if x[1] == 3:
+        return FAILED_METRICS + [1]
+    return [1000.0 / (1 + x[0]) / (2 if x[1] == 1 else 1), 1, 1, 1, 10.0 * (1 + x[0]), 0, 1]
+
+def _samples():
+    X = np.array([[a, b] for a in range(4) for b in range(4)] * 2)
+    Y = np.array([_metrics(x) for x in X], dtype=float)
+    return (X, Y)
+
+def test_directive_features():
+    assert directive_features("") == [0, 0, 0, 0, 0, 0]
+    assert directive_features("#pragma HLS pipeline") == [1, 0, 0, 0, 0, 0]
+    assert directive_features("#pragma HLS unroll factor=4") == [0, 2, 0, 0, 0, 0]
+    assert directive_features("#pragma HLS unroll") == [0, 0, 1, 0, 0, 0]
+    assert directive_features("#pragma HLS array_partition variable=a cyclic factor=2 dim=1") == [0, 0, 0, 0, 1, 1]
+    assert directive_features("#pragma HLS array_partition variable=a complete dim=1") == [0, 0, 0, 1, 0, 0]
+
+def test_ranks():
+    F = np.array([[1, 3], [2, 2], [2, 3], [3, 3], [1, 3]])
+
+    assert _ranks(F).tolist() == [0, 0, 1, 2, 0]
+
+def test_too_few_samples():
+    surrogate = Surrogate(DIRECTIVES, min_samples=100)
+    (X, Y) = _samples()
+
+    assert not surrogate.fit(X, Y)
+
+def test_screen_budget_and_predicted_failures():
+    surrogate = Surrogate(DIRECTIVES, min_samples=10, n_estimators=20)
+    (X, Y) = _samples()
+    assert surrogate.fit(X, Y)
+
+    candidates = np.array([[a, b] for a in range(4) for b in range(4)])
+    (selected, mean) = surrogate.screen(candidates, 6)
+
+    assert len(selected) == 6
+    assert len(set(selected)) == 6
+    # The complete partition always failed: predicted as a failed synthesis
+    for i, x in enumerate(candidates):
+        if x[1] == 3:
+            assert mean[i].tolist() == FAILED_METRICS
+        else:
+            assert mean[i][1] <= 100
+
+class FakeDB():
+    def __init__(self, X, Y):
+        self.X = X
+        self.Y = Y
+
+    def get_all(self):
+        return (self.X, self.Y)
+
+def test_screen_predicts_the_rest_of_the_batch():
+    (X, Y) = _samples()
+    screen = SurrogateScreen(Surrogate(DIRECTIVES, min_samples=10, n_estimators=20), FakeDB(X, Y), synth_fraction=0.25)
+
+    candidates = np.array([[a, b] for a in range(4) for b in range(3)])
+    (chosen, predictions) = screen.screen(candidates)
+
+    assert len(chosen) == 3
+    assert sorted(list(chosen) + list(predictions.keys())) == list(range(len(candidates)))
+
+def test_without_a_model_everything_is_synthesized():
+    screen = SurrogateScreen(Surrogate(DIRECTIVES), FakeDB(np.zeros((0, 2)), np.zeros((0, 7))), synth_fraction=0.25)
+
+    (chosen, predictions) = screen.screen(np.array([[0, 0], [1, 0], [2, 0], [3, 0]]))
+
+    assert chosen == [0, 1, 2, 3]
+    assert predictions == {}
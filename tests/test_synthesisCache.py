@@ -0,0 +1,82 @@
+import itertools
+
+import pytest
+
+import modules.synthesisCache
+from modules.synthesisCache import SynthesisCache, content_key, tool_version
+
+METRICS = [100, 1, 2, 3, 4, 0, 5]
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Strictly increasing last_used stamps
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(modules.synthesisCache.time, "time", lambda: float(next(ticks)))
+
+def _cache(tmp_path, **kwargs):
+    return SynthesisCache(str(tmp_path / "cache.sqlite"), version="v2021.1", **kwargs)
+
+def test_content_key():
+    key = content_key("void top() {}", ["set_part xczu7ev", "create_clock -period 10"], "h", "v2021.1")
+
+    assert key == content_key("void top() {}", ["set_part xczu7ev", "create_clock -period 10"], "h", "v2021.1")
+    assert key != content_key("void top() {}", ["set_part xczu7ev", "create_clock -period 5"], "h", "v2021.1")
+    assert key != content_key("void top() { }", ["set_part xczu7ev", "create_clock -period 10"], "h", "v2021.1")
+    assert key != content_key("void top() {}", ["set_part xczu7ev", "create_clock -period 10"], "g", "v2021.1")
+    assert key != content_key("void top() {}", ["set_part xczu7ev", "create_clock -period 10"], "h", "v2023.2")
+
+def test_tool_version_without_the_tool():
+    assert tool_version("/nonexistent/vitis_hls") == ""
+
+def test_fidelity(tmp_path, clock):
+    cache = _cache(tmp_path)
+
+    cache.put("a", METRICS, 0)
+    assert cache.get("a", 0) == (METRICS, 0)
+    assert cache.get("a", 1) is None
+
+    cache.put("a", [50] + METRICS[1:], 1)
+    assert cache.get("a", 0) == ([50] + METRICS[1:], 1)
+
+    # A lower fidelity never replaces a higher one
+    cache.put("a", METRICS, 0)
+    assert cache.get("a", 1) == ([50] + METRICS[1:], 1)
+
+    assert (cache.hits, cache.misses) == (3, 1)
+    cache.close()
+
+def test_evict_least_recently_used_entries(tmp_path, clock):
+    cache = _cache(tmp_path, max_entries=3)
+
+    for key in "abc":
+        cache.put(key, METRICS, 1)
+    # a is used again, b becomes the least recently used entry
+    assert cache.get("a", 1) is not None
+    cache.put("d", METRICS, 1)
+
+    assert cache.get("b", 1) is None
+    assert all(cache.get(key, 1) is not None for key in "acd")
+    assert cache.evictions == 1
+    cache.close()
+
+def test_evict_beyond_max_size(tmp_path, clock):
+    # Entries without reports take 96 bytes + the key
+    cache = _cache(tmp_path, max_size=300 / (1024.0 * 1024.0))
+
+    for key in "abcd":
+        cache.put(key * 4, METRICS, 1)
+
+    assert cache.get("aaaa", 1) is None
+    assert all(cache.get(key * 4, 1) is not None for key in "bcd")
+    assert cache.evictions == 1
+    cache.close()
+
+def test_shared_between_instances(tmp_path, clock):
+    writer = _cache(tmp_path, store_reports=True)
+    writer.put("a", METRICS, 1, reports={"csynth.rpt": "report"})
+    writer.close()
+
+    reader = _cache(tmp_path)
+    assert reader.get("a", 1) == (METRICS, 1)
+    assert reader.reports("a") == {"csynth.rpt": "report"}
+    reader.close()
@@ -0,0 +1,104 @@
+import json
+import time
+import threading
+
+import pytest
+
+from modules.telemetry import Telemetry
+
+def _events(path):
+    # One event per line after the opening bracket; the array is not closed
+    with open(str(path)) as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "["
+    return [json.loads(line.rstrip(",")) for line in lines[1:]]
+
+def test_spans_are_traced_per_thread(tmp_path):
+    telemetry = Telemetry(trace_path=str(tmp_path / "run.trace.json"))
+
+    with telemetry.span("render", job=1):
+        pass
+    worker = threading.Thread(target=lambda: telemetry.record("parse", 10.0, 10.5, job=2), name="worker")
+    worker.start()
+    worker.join()
+    telemetry.record("synthesis", 10.0, 12.0, track="slot-3", job=3)
+    telemetry.close()
+
+    events = _events(tmp_path / "run.trace.json")
+    names = {e["tid"]: e["args"]["name"] for e in events if e["ph"] == "M"}
+    spans = [e for e in events if e["ph"] == "X"]
+
+    assert [e["name"] for e in spans] == ["render", "parse", "synthesis"]
+    assert [e["args"]["job"] for e in spans] == [1, 2, 3]
+    assert len(set(e["tid"] for e in spans)) == 3
+    assert names[spans[1]["tid"]] == "worker"
+    assert names[spans[2]["tid"]] == "slot-3"
+    assert spans[2]["ts"] == 10000000 and spans[2]["dur"] == 2000000
+
+def test_failed_span_is_recorded():
+    telemetry = Telemetry()
+
+    with pytest.raises(RuntimeError):
+        with telemetry.span("launch") as span:
+            span["pid"] = 42
+            raise RuntimeError("cannot start vitis_hls")
+
+    assert telemetry.snapshot()["phases"]["launch"]["count"] == 1
+
+def test_snapshot_of_jobs_and_counters():
+    telemetry = Telemetry(threads=4)
+
+    telemetry.enqueue(3)
+    telemetry.dequeue()
+    telemetry.job_started()
+    telemetry.count("evaluations", 10)
+    telemetry.count("cache_hits")
+    telemetry.count("cache_hits")
+    telemetry.record("synthesis", 0.0, 2.0)
+    telemetry.record("synthesis", 0.0, 4.0)
+
+    snapshot = telemetry.snapshot()
+    assert snapshot["queued"] == 2
+    assert snapshot["in_flight"] == 1
+    assert snapshot["utilization"] == 0.25
+    assert snapshot["counters"] == {"evaluations": 10, "cache_hits": 2}
+    assert snapshot["evals_per_hour"] > 0
+    assert snapshot["phases"]["synthesis"] == {"count": 2, "total": 6.0, "mean": 3.0}
+
+def test_metrics_file_is_rewritten(tmp_path):
+    path = tmp_path / "run.metrics.json"
+    telemetry = Telemetry(metrics_path=str(path), interval=0.1)
+
+    telemetry.count("evaluations", 5)
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    with open(str(path)) as f:
+        assert json.load(f)["counters"]["evaluations"] == 5
+
+    telemetry.count("evaluations", 5)
+    telemetry.close()
+    with open(str(path)) as f:
+        assert json.load(f)["counters"]["evaluations"] == 10
+    assert not (tmp_path / "run.metrics.json.tmp").exists()
+
+def test_optimizer_writes_trace_and_metrics(sandbox):
+    result = sandbox.run(
+        "GenHLSOptimizer.py",
+        "--INPUT_SOURCE_PATH", "Applications/RodiniaHLS-KNN-Tiling/knn.cpp",
+        "--INPUT_SOURCE_INFO_PATH", "Applications/RodiniaHLS-KNN-Tiling/kernel_info.txt",
+        "--DB_NAME", "traced",
+        "--GENERATIONS", 1,
+        "--THREADS", 4,
+        "--TRACE", "true",
+        "--METRICS", "true"
+    )
+    assert result.returncode == 0, result.stdout
+
+    phases = set(e["name"] for e in _events(sandbox.path / "Traces" / "traced.trace.json") if e["ph"] == "X")
+    assert {"job", "render", "tcl", "synthesis", "parse", "db_insert"} <= phases
+
+    with open(str(sandbox.path / "Traces" / "traced.metrics.json")) as f:
+        metrics = json.load(f)
+    assert metrics["counters"]["evaluations"] > 0
+    assert metrics["in_flight"] == 0 and metrics["queued"] == 0
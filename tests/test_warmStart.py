@@ -0,0 +1,78 @@
+import numpy as np
+
+from pymoo.core.problem import Problem
+from pymoo.factory import get_sampling
+
+from modules.db import DB
+from modules.warmStart import WarmStartSampling, load_seeds, translate
+from modules.surrogate import FAILED_METRICS
+
+SOURCE = [["", "#pragma HLS unroll factor=2", "#pragma HLS unroll"], ["", "#pragma HLS pipeline"]]
+# Same directives in another order
+TARGET = [["", "#pragma HLS unroll", "#pragma HLS unroll factor=2"], ["", "#pragma HLS pipeline"]]
+
+def test_translate_matches_directive_strings():
+    variant = [["", "#pragma HLS unroll factor=2"], ["", "#pragma HLS pipeline"]]
+
+    (X, kept) = translate(np.array([[1, 0], [2, 1], [0, 1]]), SOURCE, variant)
+
+    # unroll has no counterpart in the variant
+    assert X.tolist() == [[1, 0], [0, 1]]
+    assert kept == [0, 2]
+
+def test_translate_other_number_of_action_points():
+    (X, kept) = translate(np.array([[1, 0]]), SOURCE, TARGET[:1])
+
+    assert X.shape == (0, 1)
+    assert kept == []
+
+def _source_db(path, device_id, directives=SOURCE):
+    db = DB(path, radices=[len(d) for d in directives], metadata={"device_id": device_id, "directives": directives})
+    db.insert([1, 0], [100, 0, 0, 0, 20, 0, 5])
+    db.insert([2, 0], [300, 0, 0, 0, 5, 0, 5])
+    db.insert([0, 1], [200, 0, 0, 0, 4, 0, 5])
+    db.insert([1, 1], FAILED_METRICS + [5], failure="design_error")
+    db.close()
+    return path
+
+def test_seeds_are_ranked_on_the_target_device(tmp_path):
+    # The xcu250 has 7.5 times the LUTs of the xczu7ev: 20 % become 150 %
+    path = _source_db(str(tmp_path / "xcu250.sqlite"), "xcu250-figd2104-2L-e")
+
+    seeds = load_seeds([path], TARGET, "xczu7ev-ffvc1156-2-e")
+
+    # Feasible first by Pareto rank, the fastest but infeasible one last, the failure dropped
+    assert seeds.tolist() == [[0, 1], [1, 0], [2, 0]]
+
+def test_database_of_another_space_without_directives_is_skipped(tmp_path):
+    path = str(tmp_path / "other.sqlite")
+    db = DB(path, radices=[5, 2])
+    db.insert([4, 1], [100, 0, 0, 0, 1, 0, 5])
+    db.close()
+
+    seeds = load_seeds([path], TARGET, "xczu7ev-ffvc1156-2-e")
+
+    assert seeds.shape == (0, 2)
+
+class SmallProblem(Problem):
+    def __init__(self):
+        super().__init__(n_var=2, n_obj=1, xl=0, xu=[2, 1])
+
+def test_sampling_mixes_seeds_and_samples():
+    seeds = np.array([[0, 1], [1, 0], [2, 0]])
+
+    X = WarmStartSampling(seeds, get_sampling("int_random"), fraction=0.5).do(SmallProblem(), 4, pop=None)
+
+    # Two seeds (best first), the rest sampled without duplicates
+    assert X.shape == (4, 2)
+    assert X[0:2].tolist() == [[0, 1], [1, 0]]
+    assert len(set(tuple(x) for x in X)) == 4
+
+def test_population_larger_than_the_design_space():
+    seeds = np.array([[0, 1]])
+
+    X = WarmStartSampling(seeds, get_sampling("int_random"), fraction=1.0).do(SmallProblem(), 10, pop=None)
+
+    assert X.shape == (10, 2)
+    assert X[0].tolist() == [0, 1]
+    assert len(set(tuple(x) for x in X)) <= 6
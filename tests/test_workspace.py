@@ -0,0 +1,65 @@
+import os
+import json
+
+from modules.workspace import WorkspaceManager
+
+def _job(workspace, job_id, size=0):
+    path = workspace.create(job_id)
+    with open(os.path.join(path, "vitis_hls.log"), "w") as f:
+        f.write("x" * size)
+    return path
+
+def test_job_directories_are_removed(tmp_path):
+    workspace = WorkspaceManager(str(tmp_path))
+    assert os.path.dirname(workspace.root) == str(tmp_path)
+
+    done = _job(workspace, 1)
+    running = _job(workspace, 2)
+    workspace.release(done, [0, 1], [100, 1, 1, 1, 1, 0], 1)
+    assert not os.path.exists(done)
+    assert os.path.isdir(running)
+
+    # An interrupted run leaves nothing behind
+    workspace.close()
+    assert not os.path.exists(running)
+    assert os.listdir(str(tmp_path)) == []
+
+def test_only_the_front_is_retained(tmp_path):
+    archive = tmp_path / "archive"
+    workspace = WorkspaceManager(str(tmp_path), archive_dir=str(archive))
+
+    workspace.release(_job(workspace, 1), [0, 0], [200, 1, 1, 1, 10, 0], 1)
+    # Dominated, infeasible and failed jobs are removed
+    workspace.release(_job(workspace, 2), [0, 1], [300, 1, 1, 1, 20, 0], 1)
+    workspace.release(_job(workspace, 3), [0, 2], [50, 1, 1, 1, 120, 0], 1)
+    workspace.release(_job(workspace, 4), [0, 3], None, 1)
+    assert sorted(os.listdir(str(archive))) == [os.path.basename(workspace.root) + "_job_1"]
+
+    # A dominating job replaces it, a trade-off is kept next to it
+    workspace.release(_job(workspace, 5), [1, 0], [100, 1, 1, 1, 10, 0], 1)
+    workspace.release(_job(workspace, 6), [1, 1], [400, 1, 1, 1, 5, 0], 1)
+    names = sorted(os.listdir(str(archive)))
+    assert [n.split("_job_")[1] for n in names] == ["5", "6"]
+    with open(str(archive / names[0] / "result.json")) as f:
+        assert json.load(f) == {"x": [1, 0], "metrics": [100, 1, 1, 1, 10, 0], "fidelity": 1}
+    assert os.path.isfile(str(archive / names[0] / "vitis_hls.log"))
+    workspace.close()
+
+    # A later run continues with the retained front
+    workspace = WorkspaceManager(str(tmp_path), archive_dir=str(archive))
+    assert sorted(workspace.archive.keys()) == names
+    workspace.release(_job(workspace, 1), [1, 0], [150, 1, 1, 1, 10, 0], 1)
+    assert sorted(os.listdir(str(archive))) == names
+    workspace.close()
+
+def test_disk_limit_evicts_the_oldest(tmp_path):
+    archive = tmp_path / "archive"
+    # 1 MB limit, 400 kB per job
+    workspace = WorkspaceManager(str(tmp_path), archive_dir=str(archive), disk_limit=1)
+
+    for i in range(4):
+        workspace.release(_job(workspace, i, size=400 * 1024), [i], [100 + i, 1, 1, 1, 40 - i, 0], 1)
+
+    names = sorted(os.listdir(str(archive)))
+    assert [n.split("_job_")[1] for n in names] == ["2", "3"]
+    workspace.close()
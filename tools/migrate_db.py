@@ -0,0 +1,116 @@
+"""
+Convert legacy result databases (SqliteDict, keyed by str(np.array), pickled
+dict values) to the versioned results schema of modules/db.py (mixed-radix
+integer keys, typed metric columns, run metadata).
+
+The legacy files are read with sqlite3 and pickle directly, so sqlitedict does
+not need to be installed. The device id and clock period default to the ones
+encoded in the database name (<APP>_<DEVICE_ID>_<CLK_PERIOD>.sqlite, as written
+by exec.sh). Unless OUTPUT_DIR is given, every database is converted in place and
+the legacy file is kept as <name>.sqlite.legacy.
+
+Example:
+    python3 tools/migrate_db.py --DB_PATHS ./Databases/RodiniaHLS-KNN-Baseline_*.sqlite \\
+        --INPUT_SOURCE_INFO_PATH ./Applications/RodiniaHLS-KNN-Baseline/kernel_info.txt \\
+        --INPUT_SOURCE_PATH ./Applications/RodiniaHLS-KNN-Baseline/knn.cpp
+"""
+
+import os
+import sys
+import pickle
+import sqlite3
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from modules.db import DB, file_hash
+from modules.preprocessor import Preprocessor
+from modules.utils import str2bool
+
+def read_legacy(db_path, tablename='unnamed'):
+    """
+    Read all entries of a legacy SqliteDict database.
+
+    Returns:
+        list: (directive vector, value dict) pairs.
+    """
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute('SELECT key, value FROM "%s"' % tablename).fetchall()
+    conn.close()
+
+    return [([int(v) for v in key.strip('[]').split()], pickle.loads(value)) for key, value in rows]
+
+def name_metadata(db_path):
+    """
+    Parse the device id and clock period out of a database name <APP>_<DEVICE_ID>_<CLK_PERIOD>.sqlite.
+    """
+    name = os.path.basename(db_path)
+    if name.endswith('.sqlite'):
+        name = name[:-len('.sqlite')]
+
+    parts = name.rsplit('_', 2)
+    if len(parts) != 3:
+        return ("", "")
+    return (parts[1], parts[2])
+
+parser = argparse.ArgumentParser(description='Convert legacy SqliteDict result databases to the versioned results schema.')
+
+parser.add_argument('--DB_PATHS', type=str, nargs='+', required=True, help='The legacy databases to convert.')
+parser.add_argument('--INPUT_SOURCE_INFO_PATH', type=str, required=True, help='The path to the kernel source code information of the databases.')
+parser.add_argument('--INPUT_SOURCE_PATH', type=str, default=None, help='The path to the kernel source code of the databases (recorded as source hash).')
+parser.add_argument('--DEVICE_ID', type=str, default=None, help='The target FPGA device id. (default: parsed from the database name)')
+parser.add_argument('--CLK_PERIOD', type=str, default=None, help='The target FPGA clock period. (default: parsed from the database name)')
+parser.add_argument('--OUTPUT_DIR', type=str, default=None, help='Directory of the converted databases. (default: convert in place)')
+parser.add_argument('--KEEP_LEGACY', type=str2bool, default=True, help='Keep the legacy file as <name>.sqlite.legacy when converting in place.')
+
+args = parser.parse_args()
+
+preprocessor = Preprocessor(args.INPUT_SOURCE_INFO_PATH)
+(n_var, xl, xu, top_level_function, directives) = preprocessor.preprocess()
+
+source_hash = file_hash(args.INPUT_SOURCE_PATH) if args.INPUT_SOURCE_PATH is not None else ""
+
+for db_path in args.DB_PATHS:
+    tables = [row[0] for row in sqlite3.connect(db_path).execute("SELECT name FROM sqlite_master WHERE type='table'")]
+    if "meta" in tables:
+        print("%s: already converted, skipped" % db_path)
+        continue
+
+    (device_id, clock_period) = name_metadata(db_path)
+    metadata = {
+        "device_id": args.DEVICE_ID if args.DEVICE_ID is not None else device_id,
+        "clock_period": args.CLK_PERIOD if args.CLK_PERIOD is not None else clock_period,
+        "top_level_function": top_level_function,
+        "source_hash": source_hash,
+        "directives": directives
+    }
+
+    if args.OUTPUT_DIR is not None:
+        os.makedirs(args.OUTPUT_DIR, exist_ok=True)
+        output_path = os.path.join(args.OUTPUT_DIR, os.path.basename(db_path))
+    else:
+        output_path = db_path
+    tmp_path = output_path + '.tmp'
+
+    for path in (tmp_path, tmp_path + '-wal', tmp_path + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+
+    entries = read_legacy(db_path)
+
+    db = DB(tmp_path, radices=xu + 1, metadata=metadata)
+    skipped = 0
+    for x, item in entries:
+        try:
+            db.insert(x, [item["latency"], item["util_bram"], item["util_dsp"], item["util_ff"], item["util_lut"], item["util_uram"], item["synth_time"]], item.get("fidelity", 1))
+        except ValueError:
+            # Vector of another design space (e.g. the kernel info changed since)
+            skipped += 1
+    converted = len(db.index)
+    db.close()
+
+    if args.OUTPUT_DIR is None and args.KEEP_LEGACY:
+        os.replace(db_path, db_path + '.legacy')
+    os.replace(tmp_path, output_path)
+
+    print("%s: %d entries converted, %d skipped -> %s" % (db_path, converted, skipped, output_path))
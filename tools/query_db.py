@@ -0,0 +1,124 @@
+"""
+Query the Pareto front of a result database, optionally following a running search.
+
+The database is bulk-loaded into NumPy arrays, failed and timed-out syntheses
+(and optionally infeasible points, low-fidelity points and points beyond a
+synthesis time) are filtered out, and the non-dominated configurations are
+printed with their metrics and directives (from the directive table of the
+database, or from the kernel information if the table is empty). With
+--FOLLOW true the tool keeps polling the database and prints the points that
+enter (+) and leave (-) the front as the search commits them. pymoo is not needed.
+
+Example:
+    python3 tools/query_db.py --DB_PATH ./Databases/RodiniaHLS-KNN-Baseline_xcu200-fsgd2104-2-e_10.sqlite
+    python3 tools/query_db.py --DB_PATH ./Databases/<DBName>.sqlite --OBJECTIVES latency util_lut --FOLLOW true
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from modules.db import METRIC_COLUMNS
+from modules.paretoFront import ParetoFront, OBJECTIVES
+from modules.utils import str2bool
+
+def write_rows(out, rows, fmt, show_directives, event=None):
+    """
+    Write front points as a table, CSV or JSON lines.
+
+    Args:
+        out (file): Output stream.
+        rows (list): Points returned by ParetoFront.rows().
+        fmt (str): "table", "csv" or "json".
+        show_directives (bool): Include the directive strings.
+        event (str): "+" or "-" in follow mode, None for the initial front.
+    """
+    for row in rows:
+        if fmt == "json":
+            record = dict(row)
+            if event is not None:
+                record["event"] = event
+            if not show_directives:
+                record.pop("directives", None)
+            out.write(json.dumps(record) + "\n")
+        elif fmt == "csv":
+            writer = csv.writer(out)
+            fields = ([event] if event is not None else []) + [" ".join(str(v) for v in row["x"])]
+            fields += [row[name] for name in METRIC_COLUMNS] + [row["fidelity"]]
+            if show_directives and "directives" in row:
+                fields += row["directives"]
+            writer.writerow(fields)
+        else:
+            out.write("%s %-24s %12.6f %5d %5d %5d %5d %5d %8d %3d\n" % (
+                event if event is not None else " ", str(row["x"]),
+                row["latency"], row["util_bram"], row["util_dsp"], row["util_ff"], row["util_lut"], row["util_uram"],
+                row["synth_time"], row["fidelity"]))
+            if show_directives and "directives" in row:
+                for i, directive in enumerate(row["directives"]):
+                    out.write("      L%d: %s\n" % (i + 1, directive if directive.strip() != "" else "-"))
+    out.flush()
+
+parser = argparse.ArgumentParser(description='Print the Pareto-optimal configurations of a result database.')
+
+parser.add_argument('--DB_PATH', type=str, required=True, help='The result database to query.')
+parser.add_argument('--OBJECTIVES', type=str, nargs='+', default=OBJECTIVES, choices=OBJECTIVES, help='The metrics the front is computed on. (default: all six objectives of the search)')
+parser.add_argument('--FEASIBLE', type=str2bool, default=True, help='Leave out configurations exceeding the device resources.')
+parser.add_argument('--MIN_FIDELITY', type=int, default=0, help='Leave out configurations evaluated below this fidelity (1: with IP export).')
+parser.add_argument('--TIMEOUT', type=int, default=None, help='Leave out configurations whose synthesis took at least TIMEOUT seconds.')
+parser.add_argument('--INPUT_SOURCE_INFO_PATH', type=str, default=None, help='Kernel source code information providing the directives if the database has no directive table.')
+parser.add_argument('--DIRECTIVES', type=str2bool, default=True, help='Print the directive of every action point.')
+parser.add_argument('--FORMAT', type=str, default="table", choices=["table", "csv", "json"], help='Output format (json: one JSON object per line).')
+parser.add_argument('--OUTPUT', type=str, default=None, help='File the front is written to. (default: standard output)')
+parser.add_argument('--FOLLOW', type=str2bool, default=False, help='Keep polling the database and print the changes of the front.')
+parser.add_argument('--INTERVAL', type=float, default=5.0, help='Seconds between two polls in follow mode.')
+
+args = parser.parse_args()
+
+directives = None
+if args.INPUT_SOURCE_INFO_PATH is not None:
+    from modules.preprocessor import Preprocessor
+    (n_var, xl, xu, top_level_function, directives) = Preprocessor(args.INPUT_SOURCE_INFO_PATH).preprocess()
+
+front = ParetoFront(
+    args.DB_PATH,
+    objectives=args.OBJECTIVES,
+    feasible_only=args.FEASIBLE,
+    min_fidelity=args.MIN_FIDELITY,
+    timeout=args.TIMEOUT,
+    directives=directives
+)
+
+out = open(args.OUTPUT, 'w') if args.OUTPUT is not None else sys.stdout
+
+if args.FORMAT == "table":
+    out.write("# " + front.summary() + "\n")
+    out.write("# %-24s %12s %5s %5s %5s %5s %5s %8s %3s\n" % ("x", "latency", "bram", "dsp", "ff", "lut", "uram", "synth_t", "fid"))
+elif args.FORMAT == "csv":
+    header = (["event"] if args.FOLLOW else []) + ["x"] + METRIC_COLUMNS + ["fidelity"]
+    if args.DIRECTIVES:
+        header += ["L" + str(i + 1) for i in range(len(front.directives))]
+    csv.writer(out).writerow(header)
+
+write_rows(out, front.rows(), args.FORMAT, args.DIRECTIVES, "+" if args.FOLLOW else None)
+
+try:
+    while args.FOLLOW:
+        time.sleep(args.INTERVAL)
+        (added, removed) = front.update()
+        if len(removed) > 0:
+            write_rows(out, front.rows(removed), args.FORMAT, False, "-")
+        if len(added) > 0:
+            write_rows(out, front.rows(added), args.FORMAT, args.DIRECTIVES, "+")
+        if args.FORMAT == "table" and len(added) + len(removed) > 0:
+            out.write("# " + front.summary() + "\n")
+except KeyboardInterrupt:
+    pass
+finally:
+    front.close()
+    if out is not sys.stdout:
+        out.close()